@@ -0,0 +1,1158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AI信息聚合平台 - 性能基准脚本
+用法: python3 benchmarks.py [基准名称 ...]，不带参数时运行全部基准
+"""
+
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 各运行模式的导入耗时预算（毫秒，已扣除解释器自身启动开销）
+IMPORT_BUDGET_MS = {
+    'server': 150,
+    'once': 800,
+    'service': 800,
+}
+
+
+def _run_importtime(*args: str) -> Dict[str, int]:
+    """以 -X importtime 运行解释器（args 为脚本或 -c 代码及其参数），返回 {顶层模块: 累计耗时(微秒)}"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', *args],
+        cwd=PROJECT_DIR, capture_output=True, text=True, check=True
+    )
+
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line.split('|')
+        # 顶层导入的模块名前只有一个空格，嵌套导入按层级缩进
+        if name.startswith(' ') and not name.startswith('  '):
+            timings[name.strip()] = int(cumulative_us)
+    return timings
+
+
+def measure_import_time(mode: str) -> float:
+    """测量 data_collection_service.py --mode <mode> 的启动导入耗时（毫秒）：
+    以 --dry-run 运行真实的启动路径（配置、Web 处理器、定时任务、收集器会话），不抓取、不监听端口"""
+    baseline = sum(_run_importtime('-c', 'pass').values())
+    timings = _run_importtime('data_collection_service.py', '--mode', mode, '--dry-run')
+    return (sum(timings.values()) - baseline) / 1000
+
+
+def loaded_modules(mode: str) -> set:
+    """返回以 --dry-run 走完指定运行模式的启动路径后 sys.modules 中的模块名"""
+    result = subprocess.run(
+        [sys.executable, '-c',
+         f"import runpy, sys; sys.argv = ['data_collection_service.py', '--mode', {mode!r}, '--dry-run']; "
+         f"runpy.run_path('data_collection_service.py', run_name='__main__'); "
+         f"print('\\n'.join(sys.modules))"],
+        cwd=PROJECT_DIR, capture_output=True, text=True, check=True
+    )
+    return set(result.stdout.split())
+
+
+def bench_importtime():
+    """各 --mode 启动导入耗时"""
+    print("⏱️  导入耗时 (-X importtime, 取3次最小值)")
+    for mode, budget in IMPORT_BUDGET_MS.items():
+        elapsed = min(measure_import_time(mode) for _ in range(3))
+        status = "✅" if elapsed <= budget else "❌"
+        print(f"  {status} --mode {mode:<8} {elapsed:8.1f} ms  (预算 {budget} ms)")
+
+
+class FeedStandInServer:
+    """本地 RSS 源替身服务器：/feed/<n>.xml 返回确定性生成的 RSS 内容"""
+
+    def __init__(self, entries_per_feed: int = 10, ai_entries_per_feed: int = 2, latency: float = 0.0,
+                 article_latency: float = 0.0, hub_url: str = None):
+        self.entries_per_feed = entries_per_feed
+        self.hub_url = hub_url  # 设置后各 feed 声明该 WebSub hub（<atom:link rel="hub">）
+        self.ai_entries_per_feed = ai_entries_per_feed
+        self.latency = latency
+        self.article_latency = article_latency
+        self.request_count = 0
+        self.article_downloads = 0  # 返回 200 完整正文的文章请求数
+        self.not_modified = 0
+        self.feed_requests: Dict[int, int] = {}  # 各 RSS 源被请求的次数
+        self.updates: Dict[int, List[Tuple[int, str]]] = {}  # post_update 加到 feed 开头的 (更新编号, 条目)，最新的在前
+        self.first_served: Dict[int, float] = {}  # 各更新第一次随 feed 返回给轮询方的时刻（perf_counter）
+        self.max_in_flight_per_host = 0
+        self._in_flight: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        # 监听所有地址，127.0.0.0/8 内的各回环地址都可访问
+        self._httpd = ThreadingHTTPServer(('', 0), self._make_handler())
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]
+
+    def feed_xml(self, feed_id: int) -> str:
+        rng = random.Random(feed_id)
+        items = []
+        for j in range(self.entries_per_feed):
+            # 随机拼出的伪单词（不含 ai/ml 等子串），保证标题彼此不相似
+            words = ' '.join(''.join(rng.choice('bcdfghkpqrstvwxyz') + rng.choice('eou')
+                                     for _ in range(rng.randint(2, 4)))
+                             for _ in range(8))
+            topic = 'AI' if j < self.ai_entries_per_feed else 'gadget'
+            title = f"{topic} {words} {feed_id}-{j}"
+            items.append(
+                f"<item><title>{title}</title>"
+                f"<link>http://127.0.0.1:{self.port}/story/{feed_id}/{j}</link>"
+                f"<description>&lt;p&gt;{title} {words} {words}&lt;/p&gt;</description>"
+                f"<pubDate>Mon, 05 Jan 2026 10:00:00 +0000</pubDate></item>"
+            )
+        with self._lock:
+            updates = [item for _, item in self.updates.get(feed_id, ())]
+        return self._wrap_feed(feed_id, ''.join(updates) + ''.join(items))
+
+    def _wrap_feed(self, feed_id: int, items_xml: str) -> str:
+        hub = f"<atom:link rel=\"hub\" href=\"{self.hub_url}\"/>" if self.hub_url else ''
+        return (f"<?xml version=\"1.0\"?><rss version=\"2.0\" xmlns:atom=\"http://www.w3.org/2005/Atom\">"
+                f"<channel><title>Feed {feed_id}</title>{hub}{items_xml}</channel></rss>")
+
+    def update_xml(self, feed_id: int, update_id: int) -> str:
+        """feed 的一次更新（一条新的 AI 新闻，发布时间为当前时刻），作为 WebSub 推送内容"""
+        return self._wrap_feed(feed_id, self._update_item(feed_id, update_id))
+
+    def post_update(self, feed_id: int, update_id: int):
+        """把一次更新加到 feed 开头，之后轮询该 feed 即可看到"""
+        item = self._update_item(feed_id, update_id)
+        with self._lock:
+            self.updates.setdefault(feed_id, []).insert(0, (update_id, item))
+
+    def _update_item(self, feed_id: int, update_id: int) -> str:
+        from email.utils import formatdate
+
+        rng = random.Random(f"update-{feed_id}-{update_id}")
+        words = ' '.join(''.join(rng.choice('bcdfghkpqrstvwxyz') + rng.choice('eou') for _ in range(rng.randint(2, 4)))
+                         for _ in range(8))
+        title = f"AI breaking {words} {feed_id}-u{update_id}"
+        return (f"<item><title>{title}</title>"
+                f"<link>http://127.0.0.1:{self.port}/story/{feed_id}/u{update_id}</link>"
+                f"<description>&lt;p&gt;{title} {words}&lt;/p&gt;</description>"
+                f"<pubDate>{formatdate(usegmt=True)}</pubDate></item>")
+
+    def article_html(self, feed_id: int, entry_id: int) -> str:
+        rng = random.Random(feed_id * 1000 + entry_id)
+        paragraphs = ''.join(
+            f"<p>{' '.join(''.join(rng.choice('bcdfghkpqrstvwxyz') + rng.choice('eou') for _ in range(3)) for _ in range(30))}, "
+            f"story {feed_id}-{entry_id} paragraph {k}.</p>"
+            for k in range(5)
+        )
+        return (f"<html><head><title>Story {feed_id}-{entry_id}</title><script>var tracking = 1;</script></head>"
+                f"<body><nav><a href='/'>Home</a> <a href='/about'>About us and our company</a></nav>"
+                f"<article><h1>Story {feed_id}-{entry_id}</h1>{paragraphs}</article>"
+                f"<footer><p>Copyright notice for the stand-in server, all rights reserved.</p></footer></body></html>")
+
+    def _serve_article(self, handler, feed_id: int, entry_id: int):
+        import hashlib
+
+        host = handler.headers.get('Host', '')
+        with self._lock:
+            self._in_flight[host] = self._in_flight.get(host, 0) + 1
+            self.max_in_flight_per_host = max(self.max_in_flight_per_host, self._in_flight[host])
+        try:
+            if self.article_latency:
+                time.sleep(self.article_latency)
+            body = self.article_html(feed_id, entry_id).encode('utf-8')
+            etag = '"' + hashlib.md5(body).hexdigest() + '"'
+            if handler.headers.get('If-None-Match') == etag:
+                with self._lock:
+                    self.not_modified += 1
+                handler.send_response(304)
+                handler.send_header('ETag', etag)
+                handler.end_headers()
+                return
+            with self._lock:
+                self.article_downloads += 1
+            handler.send_response(200)
+            handler.send_header('Content-Type', 'text/html; charset=utf-8')
+            handler.send_header('Content-Length', str(len(body)))
+            handler.send_header('ETag', etag)
+            handler.end_headers()
+            handler.wfile.write(body)
+        finally:
+            with self._lock:
+                self._in_flight[host] -= 1
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with server._lock:
+                    server.request_count += 1
+                if self.path.startswith('/story/'):
+                    _, _, feed_id, entry_id = self.path.split('/')
+                    server._serve_article(self, int(feed_id), int(entry_id))
+                    return
+                if server.latency:
+                    time.sleep(server.latency)
+                feed_id = int(self.path.rsplit('/', 1)[-1].split('.')[0])
+                with server._lock:
+                    server.feed_requests[feed_id] = server.feed_requests.get(feed_id, 0) + 1
+                body = server.feed_xml(feed_id).encode('utf-8')
+                with server._lock:
+                    served = time.perf_counter()
+                    for update_id, _ in server.updates.get(feed_id, ()):
+                        server.first_served.setdefault(update_id, served)
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/rss+xml')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def feed_url(self, feed_id: int, hosts: int = 8) -> str:
+        # 127.0.0.0/8 都指向本机，用不同回环地址模拟不同主机
+        return f"http://127.0.0.{feed_id % hosts + 1}:{self.port}/feed/{feed_id}.xml"
+
+    def make_sources(self, count: int) -> List:
+        from data_collector import RSSDataSource
+
+        sources = []
+        for feed_id in range(count):
+            source = RSSDataSource(f"Feed {feed_id}", self.feed_url(feed_id), "medium", "tech")
+            source.rate_limit = 0
+            sources.append(source)
+        return sources
+
+    def __enter__(self):
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+class WebSubHubStandIn:
+    """本地 WebSub hub 替身：接受订阅（202）后在后台以 GET 验证回调地址，publish() 向已验证的订阅者推送带签名的内容"""
+
+    def __init__(self, lease_seconds: int = None, verify_before_accept: bool = False):
+        self.lease_seconds = lease_seconds  # 设置时覆盖订阅者请求的租约
+        self.verify_before_accept = verify_before_accept  # 在回应订阅请求之前完成验证
+        self.subscribe_requests = 0
+        self.verifications = 0
+        self.deliveries = 0
+        self.subscribers: Dict[str, Dict[str, str]] = {}  # topic -> {callback: secret}
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), self._make_handler())
+        self._httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._httpd.server_address[1]}/hub"
+
+    def _verify(self, form: Dict[str, str]):
+        import urllib.parse
+        import urllib.request
+
+        challenge = f"challenge-{random.getrandbits(64):x}"
+        lease = self.lease_seconds or int(form.get('hub.lease_seconds') or 86400)
+        query = urllib.parse.urlencode({'hub.mode': 'subscribe', 'hub.topic': form['hub.topic'],
+                                        'hub.challenge': challenge, 'hub.lease_seconds': lease})
+        separator = '&' if '?' in form['hub.callback'] else '?'
+        try:
+            with urllib.request.urlopen(f"{form['hub.callback']}{separator}{query}", timeout=5) as response:
+                confirmed = response.status == 200 and response.read().decode('utf-8') == challenge
+        except OSError:
+            confirmed = False
+        with self._lock:
+            self.verifications += 1
+            if confirmed:
+                self.subscribers.setdefault(form['hub.topic'], {})[form['hub.callback']] = form.get('hub.secret', '')
+
+    def _make_handler(self):
+        hub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                import urllib.parse
+
+                body = self.rfile.read(int(self.headers.get('Content-Length') or 0)).decode('utf-8')
+                form = {key: values[0] for key, values in urllib.parse.parse_qs(body).items()}
+                with hub._lock:
+                    hub.subscribe_requests += 1
+                if form.get('hub.mode') != 'subscribe' or not form.get('hub.topic') or not form.get('hub.callback'):
+                    self.send_response(400)
+                    self.end_headers()
+                    return
+                if hub.verify_before_accept:
+                    hub._verify(form)
+                else:
+                    threading.Thread(target=hub._verify, args=(form,), daemon=True).start()
+                self.send_response(202)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def wait_subscribed(self, count: int, timeout: float = 10.0) -> int:
+        """等待已验证的订阅数达到 count，返回当前订阅数"""
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                subscribed = sum(len(callbacks) for callbacks in self.subscribers.values())
+            if subscribed >= count or time.monotonic() > deadline:
+                return subscribed
+            time.sleep(0.01)
+
+    def publish(self, topic: str, content: str, secret: str = None) -> List[int]:
+        """向 topic 的全部订阅者推送内容，返回各回调的状态码；secret 用于模拟错误的签名"""
+        import hashlib
+        import hmac
+        import urllib.error
+        import urllib.request
+
+        body = content.encode('utf-8')
+        with self._lock:
+            callbacks = list(self.subscribers.get(topic, {}).items())
+        statuses = []
+        for callback, subscriber_secret in callbacks:
+            key = (secret if secret is not None else subscriber_secret).encode('utf-8')
+            request = urllib.request.Request(callback, data=body, method='POST', headers={
+                'Content-Type': 'application/rss+xml',
+                'X-Hub-Signature': 'sha256=' + hmac.new(key, body, hashlib.sha256).hexdigest(),
+                'Link': f'<{self.url}>; rel="hub", <{topic}>; rel="self"',
+            })
+            try:
+                with urllib.request.urlopen(request, timeout=10) as response:
+                    statuses.append(response.status)
+            except urllib.error.HTTPError as e:
+                statuses.append(e.code)
+            with self._lock:
+                self.deliveries += 1
+        return statuses
+
+    def __enter__(self):
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+class RespStandInServer:
+    """本地 Redis 协议替身：内存键值 + 毫秒级过期，支持租约协调用到的命令；
+    EVAL 只识别 coordination 中的续期脚本，用等价的 Python 实现执行"""
+
+    def __init__(self):
+        import socketserver
+        from coordination import RENEW_SCRIPT
+
+        self._data: Dict[str, tuple] = {}  # 键 -> (值, 过期时间 monotonic 或 None)
+        self._lock = threading.Lock()
+        self.command_count = 0
+        self._scripts = {RENEW_SCRIPT: self._renew}
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            disable_nagle_algorithm = True
+
+            def handle(self):
+                while True:
+                    try:
+                        command = server._read_command(self.rfile)
+                    except (ConnectionError, ValueError):
+                        return
+                    if command is None:
+                        return
+                    self.wfile.write(server._encode(server._dispatch(command)))
+
+        self._server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+
+    @property
+    def url(self) -> str:
+        return f"redis://127.0.0.1:{self.port}/0"
+
+    @staticmethod
+    def _read_command(rfile):
+        line = rfile.readline()
+        if not line:
+            return None
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(rfile.readline()[1:])
+            args.append(rfile.read(length + 2)[:-2].decode('utf-8'))
+        return args
+
+    @staticmethod
+    def _encode(value) -> bytes:
+        if value is None:
+            return b'$-1\r\n'
+        if isinstance(value, Exception):
+            return f"-ERR {value}\r\n".encode('utf-8')
+        if isinstance(value, bool):
+            return b'+OK\r\n'
+        if isinstance(value, int):
+            return b':%d\r\n' % value
+        if isinstance(value, list):
+            return b'*%d\r\n' % len(value) + b''.join(RespStandInServer._encode(v) for v in value)
+        data = str(value).encode('utf-8')
+        return b'$%d\r\n%s\r\n' % (len(data), data)
+
+    def _get(self, key: str):
+        entry = self._data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+            del self._data[key]
+            return None
+        return entry
+
+    def _renew(self, key: str, owner: str, ttl_ms: str) -> int:
+        entry = self._get(key)
+        if entry is not None and entry[0] == owner:
+            self._data[key] = (owner, time.monotonic() + int(ttl_ms) / 1000)
+            return 1
+        return 0
+
+    def _dispatch(self, args: List[str]):
+        import fnmatch
+
+        name = args[0].upper()
+        with self._lock:
+            self.command_count += 1
+            if name in ('PING', 'AUTH', 'SELECT'):
+                return True
+            if name == 'GET':
+                entry = self._get(args[1])
+                return entry[0] if entry else None
+            if name == 'SET':
+                options = [a.upper() for a in args[3:]]
+                if 'NX' in options and self._get(args[1]) is not None:
+                    return None
+                expires = time.monotonic() + int(args[options.index('PX') + 4]) / 1000 if 'PX' in options else None
+                self._data[args[1]] = (args[2], expires)
+                return True
+            if name == 'DEL':
+                return sum(1 for key in args[1:] if self._get(key) is not None and self._data.pop(key))
+            if name == 'PTTL':
+                entry = self._get(args[1])
+                if entry is None:
+                    return -2
+                return -1 if entry[1] is None else int((entry[1] - time.monotonic()) * 1000)
+            if name == 'SCAN':
+                pattern = args[args.index('MATCH') + 1] if 'MATCH' in args else '*'
+                return ['0', [key for key in list(self._data) if self._get(key) and fnmatch.fnmatchcase(key, pattern)]]
+            if name == 'EVAL':
+                script = self._scripts.get(args[1])
+                if script is None:
+                    return ValueError('unknown script')
+                return script(args[3], *args[4:])
+            return ValueError(f"unknown command '{args[0]}'")
+
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def bench_sharded():
+    """分片收集在不同工作进程数下的吞吐"""
+    import asyncio
+    import logging
+    from sharded_collector import ShardedCollector
+
+    logging.getLogger().setLevel(logging.WARNING)
+    num_sources = 300
+    print(f"🧩 分片收集吞吐 ({num_sources} 个本地替身源, CPU核数 {os.cpu_count()})")
+    with FeedStandInServer(ai_entries_per_feed=1, latency=0.02) as server:
+        sources = server.make_sources(num_sources)
+        for workers in sorted({1, 2, 4, os.cpu_count() or 1}):
+            collector = ShardedCollector(workers)
+            collector.data_sources = sources
+            started = time.perf_counter()
+            items = asyncio.run(collector.collect_all())
+            elapsed = time.perf_counter() - started
+            # 最慢分片的抓取耗时；其余为进程启动与协调进程的全局去重/排序
+            shard_elapsed = max(stats.get('elapsed', 0.0) for stats in collector.shard_stats.values())
+            print(f"  workers={workers:<2} 总耗时 {elapsed:6.2f} s  分片抓取 {shard_elapsed:6.2f} s  "
+                  f"{num_sources / shard_elapsed:7.1f} 源/s  {len(items)} 条唯一新闻")
+
+
+def bench_rescore():
+    """对全部历史快照重新评分（不写回）"""
+    import logging
+    from scoring import ScoringWeights, load_source_bonus, print_report, rescore_history
+    from snapshots import list_snapshot_files
+
+    logging.getLogger().setLevel(logging.WARNING)
+    paths = list_snapshot_files()
+    weights = ScoringWeights.load()
+    source_bonus = load_source_bonus()
+    for workers in sorted({1, os.cpu_count() or 1}):
+        print(f"🔁 批量重新评分 (workers={workers})")
+        started = time.perf_counter()
+        results = rescore_history(paths, weights, source_bonus, workers=workers)
+        print_report(results, time.perf_counter() - started)
+
+
+def bench_clusters():
+    """按时间顺序回放全部历史快照做故事聚类，观察单条归类耗时是否随历史规模增长"""
+    import logging
+    import tempfile
+    from data_collector import NewsItem
+    from snapshots import iter_snapshots, list_snapshot_files
+    from story_clusters import StoryClusterIndex
+
+    logging.getLogger().setLevel(logging.WARNING)
+    total_files = len(list_snapshot_files())
+    checkpoint = max(total_files // 10, 1)
+    index = StoryClusterIndex(path=None)
+    window_items, window_elapsed = 0, 0.0
+
+    print("🧵 故事聚类回放")
+    print(f"{'快照数':>8} {'已归类':>8} {'故事数':>8} {'LSH桶':>8} {'μs/条':>8}")
+    for file_no, (_, news_dicts) in enumerate(iter_snapshots(), 1):
+        news_list = [NewsItem(**d) for d in news_dicts]
+        started = time.perf_counter()
+        window_items += index.assign_all(news_list)
+        window_elapsed += time.perf_counter() - started
+        if file_no % checkpoint == 0 or file_no == total_files:
+            per_item = window_elapsed / max(window_items, 1) * 1e6
+            print(f"{file_no:>8} {len(index.item_clusters):>8} {len(index.clusters):>8} "
+                  f"{len(index.buckets):>8} {per_item:>8.1f}")
+            window_items, window_elapsed = 0, 0.0
+
+    multi_source = sum(1 for c in index.clusters.values() if len(c.sources) > 1)
+    print(f"多信源故事: {multi_source} 个")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'story_clusters.json')
+        started = time.perf_counter()
+        index.save(path)
+        saved = time.perf_counter()
+        StoryClusterIndex.load(path)
+        loaded = time.perf_counter()
+        print(f"持久化: 保存 {(saved - started) * 1000:.0f} ms, 加载 {(loaded - saved) * 1000:.0f} ms, "
+              f"文件 {os.path.getsize(path) / 1024:.0f} KB")
+
+
+def bench_related():
+    """相关文章索引：全量重建与逐轮增量更新"""
+    import logging
+    import tempfile
+    from related_index import RelatedIndex, iter_history_items
+    from snapshots import list_snapshot_files
+
+    logging.getLogger().setLevel(logging.WARNING)
+    paths = list_snapshot_files()
+    incremental_runs = min(20, len(paths) // 2)
+
+    print("🔗 相关文章索引")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        index = RelatedIndex(os.path.join(tmp_dir, 'related_index.npz'))
+        started = time.perf_counter()
+        count = index.rebuild(iter_history_items(paths))
+        rebuilt = time.perf_counter()
+        index.save()
+        print(f"全量重建: {count} 条, {rebuilt - started:.2f} s, 保存 {(time.perf_counter() - rebuilt) * 1000:.0f} ms, "
+              f"文件 {os.path.getsize(index.path) / 1024:.0f} KB")
+
+        index.rebuild(iter_history_items(paths[:-incremental_runs]))
+        timings = []
+        for path in paths[-incremental_runs:]:
+            news_list = list(iter_history_items([path]))
+            started = time.perf_counter()
+            added = index.update(news_list)
+            timings.append((added, time.perf_counter() - started))
+        worst = max(elapsed for _, elapsed in timings)
+        average = sum(elapsed for _, elapsed in timings) / len(timings)
+        print(f"增量更新: {incremental_runs} 轮, 平均新增 {sum(a for a, _ in timings) / len(timings):.1f} 条, "
+              f"平均 {average * 1000:.1f} ms, 最慢 {worst * 1000:.1f} ms")
+
+
+def bench_rollups():
+    """时间序列汇总：全量构建与查询延迟"""
+    import logging
+    from related_index import iter_history_items
+    from rollups import DAY, RollupStore, rollup_key
+
+    logging.getLogger().setLevel(logging.WARNING)
+    news_list = list(iter_history_items())
+    store = RollupStore(None)
+    started = time.perf_counter()
+    added = store.update(news_list)
+    print("📈 时间序列汇总")
+    print(f"构建: {len(news_list)} 条快照记录 -> {added} 条新闻, {len(store.keys)} 个键, "
+          f"{(time.perf_counter() - started) * 1000:.0f} ms")
+
+    started = time.perf_counter()
+    store.update(news_list[-500:])
+    print(f"重复收集 500 条: {(time.perf_counter() - started) * 1000:.2f} ms（不重复计数）")
+
+    end = store.daily.start * DAY + store.daily.counts.shape[0] * DAY
+    queries = [
+        ('区间求和 90 天/天粒度', lambda: store.range_sum(rollup_key('keyword', 'Anthropic'), end - 90 * DAY, end, 'day')),
+        ('区间求和 30 天/小时粒度', lambda: store.range_sum(rollup_key('source', 'TechCrunch AI'), end - 30 * DAY, end, 'hour')),
+        ('逐日序列 90 天', lambda: store.series(rollup_key('keyword', 'OpenAI'), end - 90 * DAY, end, 'day')),
+        ('关键词涨幅榜 7 天', lambda: store.top_movers('keyword', 7 * DAY, end)),
+    ]
+    for name, query in queries:
+        rounds = 200
+        started = time.perf_counter()
+        for _ in range(rounds):
+            query()
+        print(f"{name}: {(time.perf_counter() - started) / rounds * 1000:.3f} ms")
+
+
+def bench_profiling():
+    """性能剖析钩子在关闭与开启时的开销"""
+    import timeit
+    import feedparser
+    import profiling
+    from data_collector import RSSDataSource
+
+    rounds = 200_000
+    bare = timeit.timeit('pass', number=rounds)
+    hooked = timeit.timeit("with stage('parse', 'Feed 0'): pass", globals={'stage': profiling.stage}, number=rounds)
+    print("🔬 性能剖析钩子")
+    print(f"关闭时单个钩子: {(hooked - bare) / rounds * 1e9:.0f} ns")
+
+    server = FeedStandInServer(entries_per_feed=10, ai_entries_per_feed=10)
+    source = RSSDataSource("Feed 0", server.feed_url(0))
+    entries = feedparser.parse(server.feed_xml(0)).entries
+    server._httpd.server_close()
+
+    def parse_entries():
+        for entry in entries:
+            with profiling.stage('_parse_rss_entry', source.name):
+                source._parse_rss_entry(entry)
+
+    parse_entries()  # 预热发布时间解析缓存
+    repeat = 200
+    direct = min(timeit.repeat(lambda: [source._parse_rss_entry(e) for e in entries], number=repeat, repeat=3))
+    off = min(timeit.repeat(parse_entries, number=repeat, repeat=3))
+    profiling.enable()
+    try:
+        on = min(timeit.repeat(parse_entries, number=repeat, repeat=3))
+    finally:
+        profiling.disable()
+    per_entry = repeat * len(entries) / 1e6
+    print(f"_parse_rss_entry: 无钩子 {direct / per_entry:.1f} μs/条, 钩子关闭 {off / per_entry:.1f} μs/条, "
+          f"剖析开启 {on / per_entry:.1f} μs/条")
+
+
+def _legacy_clean_summary(summary: str, max_length: int = 300) -> str:
+    """原 _clean_and_truncate_summary 的实现（三次未编译的 re.sub，实体直接删除），仅作对照"""
+    import re
+
+    clean_summary = re.sub(r'<[^>]+>', '', summary)
+    clean_summary = re.sub(r'\s+', ' ', clean_summary).strip()
+    clean_summary = re.sub(r'&[a-zA-Z0-9#]+;', '', clean_summary)
+    if len(clean_summary) > max_length:
+        truncated = clean_summary[:max_length]
+        last_period = truncated.rfind('.')
+        last_space = truncated.rfind(' ')
+        if last_period > max_length * 0.6:
+            return truncated[:last_period + 1]
+        elif last_space > max_length * 0.6:
+            return truncated[:last_space] + '...'
+        else:
+            return truncated + '...'
+    return clean_summary
+
+
+def bench_normalize():
+    """摘要清理吞吐：把历史摘要还原成带标签和实体的 HTML 后分别用新旧实现处理"""
+    import html
+    from snapshots import iter_snapshots
+    from text_normalize import clean_summary, normalize_text
+
+    texts = sorted({item['summary'] for _, items in iter_snapshots() for item in items if item['summary']})
+    raw = [f"<p>{html.escape(text, quote=False).replace(chr(39), '&#8217;')}</p>\n<p><a href=\"#\">Read more</a></p>"
+           for text in texts]
+    total_mb = sum(len(r.encode('utf-8')) for r in raw) / 1e6
+    titles = sorted({item['title'] for _, items in iter_snapshots() for item in items})
+
+    print("🧹 文本规范化")
+    for name, func, corpus, size in [
+        ('旧实现 摘要', _legacy_clean_summary, raw, total_mb),
+        ('新实现 摘要', clean_summary, raw, total_mb),
+        ('新实现 标题', normalize_text, titles, sum(len(t.encode('utf-8')) for t in titles) / 1e6),
+    ]:
+        started = time.perf_counter()
+        for text in corpus:
+            func(text)
+        elapsed = time.perf_counter() - started
+        print(f"{name}: {len(corpus)} 条, {len(corpus) / elapsed / 1000:.0f}k 条/s, {size / elapsed:.1f} MB/s")
+    lost = sum(1 for r in raw if '’' in clean_summary(r) and '’' not in _legacy_clean_summary(r))
+    print(f"旧实现丢失撇号等实体字符的摘要: {lost} 条")
+
+
+def bench_hotcache():
+    """热点缓存：把历史新闻还原成 RSS 条目，对比无缓存、首轮（写入缓存）和后续轮（全部命中）的解析耗时"""
+    from types import SimpleNamespace
+    from data_collector import RSSDataSource
+    from hot_cache import HotItemCache
+    from snapshots import iter_snapshots
+
+    seen, entries = set(), []
+    for _, items in iter_snapshots():
+        for item in items:
+            if item['id'] not in seen:
+                seen.add(item['id'])
+                entries.append(SimpleNamespace(title=item['title'], summary=f"<p>{item['summary']}</p>",
+                                               link=item['url'], published=item.get('published_date') or '',
+                                               author=item.get('author') or ''))
+
+    cache = HotItemCache(max_items=len(entries))
+    plain, cached = RSSDataSource("基准源", "https://example.com/rss"), RSSDataSource("基准源", "https://example.com/rss")
+    cached.entry_cache = cache
+    print(f"🧊 热点缓存（{len(entries)} 条历史条目）")
+    for name, source in [('无缓存', plain), ('首轮（写入）', cached), ('后续轮（命中）', cached)]:
+        started = time.perf_counter()
+        for entry in entries:
+            source._parse_rss_entry(entry)
+        elapsed = time.perf_counter() - started
+        print(f"{name}: {elapsed / len(entries) * 1e6:.1f} μs/条")
+    stats = cache.stats()
+    print(f"命中率 {stats['hit_rate']:.1%}, 内存约 {stats['memory_kb']:.0f} KB "
+          f"({stats['memory_kb'] / max(len(cache), 1) * 1024:.0f} B/条)")
+
+
+def bench_urls():
+    """URL 规范化：回放历史快照，对比旧ID（标题+原始URL）和新ID（规范化URL）的重复识别与跨轮命中"""
+    from snapshots import iter_snapshots
+    from url_canonical import canonicalize_url, stable_id
+
+    snapshots = [items for _, items in iter_snapshots()]
+    urls = sorted({item['url'] for items in snapshots for item in items if item['url']})
+
+    started = time.perf_counter()
+    canonical = {url: canonicalize_url.__wrapped__(url) for url in urls}
+    elapsed = time.perf_counter() - started
+
+    seen_old, seen_new = set(), set()
+    hits_old = hits_new = extra_duplicates = total = 0
+    for items in snapshots:
+        in_snapshot = set()
+        for item in items:
+            total += 1
+            key = canonical.get(item['url'], item['url'])
+            if item['url'] and key in in_snapshot:
+                extra_duplicates += 1
+            in_snapshot.add(key)
+            new_id = stable_id(item['source'], item['url'], title=item['title'])
+            hits_old += item['id'] in seen_old
+            hits_new += new_id in seen_new
+            seen_old.add(item['id'])
+            seen_new.add(new_id)
+
+    print(f"🔗 URL 规范化（{len(snapshots)} 个快照，{total} 条新闻）")
+    print(f"规范化: {len(urls)} 个 URL -> {len(set(canonical.values()))} 个, {elapsed / len(urls) * 1e6:.1f} μs/个（未缓存）")
+    print(f"唯一ID: 旧 {len(seen_old)} 个 -> 新 {len(seen_new)} 个（减少 {len(seen_old) - len(seen_new)} 个）")
+    print(f"跨轮ID命中（按ID增量更新的索引/汇总无需重复处理）: 旧 {hits_old} -> 新 {hits_new} (+{hits_new - hits_old})")
+    print(f"单个快照内旧去重漏掉的重复: {extra_duplicates} 条")
+
+
+def bench_prerender():
+    """预渲染页面：1000 条新闻的首次渲染（含模板解析）与模板缓存后的渲染耗时"""
+    import prerender
+    from snapshots import load_snapshot
+
+    news = load_snapshot(os.path.join(PROJECT_DIR, 'latest_news.json'))
+    items = [dict(news[i % len(news)], id=f"item_{i}") for i in range(1000)]
+
+    print("🖼️ 预渲染页面（1000 条新闻）")
+    prerender._compile_template.cache_clear()
+    started = time.perf_counter()
+    page = prerender.render_page(items)
+    print(f"首次渲染（含模板解析）: {(time.perf_counter() - started) * 1000:.2f} ms")
+    rounds = 100
+    started = time.perf_counter()
+    for _ in range(rounds):
+        prerender.render_page(items)
+    print(f"模板缓存后: {(time.perf_counter() - started) / rounds * 1000:.2f} ms, 页面 {len(page.encode('utf-8')) / 1024:.0f} KB")
+
+
+def bench_coordination():
+    """多副本协调：500 个数据源在 3 个副本间加租约与抓取后续期的耗时"""
+    import logging
+    import shutil
+    import tempfile
+    from coordination import SourceCoordinator, open_backend
+    from data_collector import RSSDataSource
+
+    logging.getLogger('coordination').setLevel(logging.WARNING)
+    sources = [RSSDataSource(f"Feed {i}", f"https://feeds{i % 50}.example.com/{i}.xml") for i in range(500)]
+    tmp_dir = tempfile.mkdtemp()
+    print(f"🔒 多副本协调（{len(sources)} 个数据源, 3 个副本）")
+    try:
+        with RespStandInServer() as redis_server:
+            for name, url in (('sqlite', f"sqlite:{os.path.join(tmp_dir, 'leases.db')}"), ('redis', redis_server.url)):
+                replicas = [SourceCoordinator(open_backend(url), f"replica-{i}") for i in range(3)]
+                for replica in replicas:
+                    replica.heartbeat()
+                started = time.perf_counter()
+                claimed = [replica.claim(sources) for replica in replicas]
+                claim_ms = (time.perf_counter() - started) * 1000
+                started = time.perf_counter()
+                for replica, held in zip(replicas, claimed):
+                    replica.mark_fetched(held)
+                renew_ms = (time.perf_counter() - started) * 1000
+                again = sum(len(replica.claim(sources)) for replica in replicas)
+                print(f"  {name:<6} 加租约 {claim_ms:6.1f} ms, 续期 {renew_ms:6.1f} ms, "
+                      f"各副本分得 {'/'.join(str(len(held)) for held in claimed)}, 间隔内再次获取 {again} 个")
+                for replica in replicas:
+                    replica.backend.close()
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def bench_classifier():
+    """本地分类器：冷加载（内存映射）耗时、整批推理吞吐（目标单核 5 万条/秒）和单轮采集规模的延迟"""
+    import shutil
+    import tempfile
+    from classifier import DEFAULT_MODEL_DIR, HashedLinearModel, get_classifier, news_text, train
+    from snapshots import iter_snapshots
+
+    texts, items = [], {}
+    for _, snapshot in iter_snapshots():
+        for item in snapshot:
+            items[item['id']] = item
+            texts.append(news_text(item['title'], item['summary']))
+
+    model_dir = None
+    if get_classifier() is None:
+        # 没有训练好的模型时临时训练一个（只影响耗时统计的前置准备，不影响推理速度）
+        model_dir = tempfile.mkdtemp()
+        print("未找到 models/ 下的模型，临时训练中...")
+        train(list(items.values())).save(model_dir)
+    try:
+        started = time.perf_counter()
+        model = HashedLinearModel.load(model_dir or DEFAULT_MODEL_DIR)
+        print("🤖 本地分类器")
+        print(f"冷加载: {(time.perf_counter() - started) * 1000:.1f} ms")
+        model.predict(texts[:1000])
+        started = time.perf_counter()
+        model.predict(texts)
+        elapsed = time.perf_counter() - started
+        print(f"整批推理: {len(texts)} 条, {len(texts) / elapsed / 1000:.0f}k 条/s (目标 50k 条/s)")
+        rounds = 50
+        started = time.perf_counter()
+        for _ in range(rounds):
+            model.predict(texts[:200])
+        print(f"单轮 200 条: {(time.perf_counter() - started) / rounds * 1000:.2f} ms")
+    finally:
+        if model_dir:
+            shutil.rmtree(model_dir)
+
+
+def bench_ranking():
+    """读取时排序：1 万条新闻构建数组、取前 K 条（argpartition）的延迟，
+    对照按同一衰减分数完整排序（NumPy argsort，以及逐条计算分数后 sorted() 字典列表），并核对前 K 条一致"""
+    import numpy as np
+    from ranking import DecayRanker
+
+    rng = np.random.default_rng(0)
+    now = time.time()
+    items = [{'id': str(i), 'base_score': float(b), 'published_ts': now - float(age)}
+             for i, (b, age) in enumerate(zip(rng.uniform(3, 9, 10000), rng.uniform(0, 7 * 86400, 10000)))]
+    print("📈 读取时排序（1 万条）")
+    started = time.perf_counter()
+    ranker = DecayRanker(items)
+    print(f"构建数组: {(time.perf_counter() - started) * 1000:.2f} ms")
+    rounds = 200
+    for k in (10, 100):
+        started = time.perf_counter()
+        for _ in range(rounds):
+            top = ranker.top_indices(k, now)
+        elapsed = (time.perf_counter() - started) / rounds
+        started = time.perf_counter()
+        for _ in range(rounds):
+            scores = ranker.scores(now)
+            full = np.argsort(-scores, kind='stable')[:k]
+        full_elapsed = (time.perf_counter() - started) / rounds
+        # 分数封顶（10 分）时存在并列，比较逐位的分数序列
+        assert np.array_equal(scores[top], scores[full]), f"前 {k} 条与完整排序不一致"
+        print(f"前 {k} 条: {elapsed * 1000:.3f} ms（对照 argsort 完整排序 {full_elapsed * 1000:.3f} ms）")
+
+    max_bonus, max_score, half_life = ranker.max_bonus, ranker.max_score, ranker._half_life_seconds
+
+    def decayed(item):
+        bonus = max_bonus * 0.5 ** (max(now - item['published_ts'], 0.0) / half_life)
+        return min(item['base_score'] + bonus, max_score)
+
+    started = time.perf_counter()
+    for _ in range(10):
+        ordered = sorted(items, key=decayed, reverse=True)[:10]
+    print(f"对照逐条计算分数后 sorted() 完整排序: {(time.perf_counter() - started) / 10 * 1000:.3f} ms")
+    expected = ranker.scores(now)[ranker.top_indices(10, now)]
+    assert np.allclose([decayed(item) for item in ordered], expected), "sorted() 的前 10 条与 DecayRanker 不一致"
+
+
+def bench_json():
+    """JSON 编解码：全部历史快照在各后端下的读取（字典 / NewsItem / 流式）和写入吞吐"""
+    import io
+    from json_codec import available_backends, get_codec, iter_array, news_from_dict
+    from snapshots import list_snapshot_files
+
+    blobs = []
+    for path in list_snapshot_files():
+        with open(path, 'rb') as f:
+            blobs.append(f.read())
+    total_mb = sum(len(b) for b in blobs) / 1e6
+    print(f"🧾 JSON 编解码（{len(blobs)} 个快照, {total_mb:.1f} MB）")
+    for name in available_backends():
+        codec = get_codec(name)
+        started = time.perf_counter()
+        decoded = [codec.loads(b) for b in blobs]
+        load_elapsed = time.perf_counter() - started
+        started = time.perf_counter()
+        items = sum(len(codec.loads_news(b)) for b in blobs)
+        news_elapsed = time.perf_counter() - started
+        started = time.perf_counter()
+        for news in decoded:
+            codec.dumps(news, indent=True)
+        dump_elapsed = time.perf_counter() - started
+        print(f"{name:>7}: 读取 {load_elapsed:.2f}s ({total_mb / load_elapsed:.0f} MB/s), "
+              f"读取为 NewsItem {news_elapsed:.2f}s ({items / news_elapsed / 1000:.0f}k 条/s), "
+              f"写入 {dump_elapsed:.2f}s ({total_mb / dump_elapsed:.0f} MB/s)")
+    texts = [b.decode('utf-8') for b in blobs]
+    started = time.perf_counter()
+    streamed = sum(1 for text in texts for _ in iter_array(io.StringIO(text), object_hook=news_from_dict))
+    elapsed = time.perf_counter() - started
+    print(f"   流式: 读取为 NewsItem {elapsed:.2f}s ({streamed / elapsed / 1000:.0f}k 条/s)")
+
+
+def bench_logging():
+    """日志开销：每 1000 个数据源的逐源日志在调用方（事件循环）上的耗时，及写完全部记录的总耗时；
+    对照原来的同步 FileHandler + StreamHandler 和 f-string"""
+    import contextlib
+    import logging
+    import shutil
+    import tempfile
+    from log_pipeline import CONSOLE_FORMAT, setup_logging, shutdown_logging, timed
+
+    sources = [(f"source-{i}", f"https://feeds.example{i % 50}.com/rss/{i}", 1000 + i) for i in range(1000)]
+    logger = logging.getLogger('data_collector')
+    root = logging.getLogger()
+    saved_handlers, saved_level = root.handlers[:], root.level
+
+    def legacy_source_lines():
+        # 原实现：每个源两行 INFO，约 2% 的源额外一行 WARNING
+        for name, url, status in sources:
+            logger.info(f"抓取RSS源: {name} - {url}")
+            logger.info(f"从 {name} 抓取到 {status % 10} 条新闻")
+            if status % 50 == 0:
+                logger.warning(f"RSS源 {name} 返回状态码: {status}")
+
+    def pipeline_source_lines():
+        for name, url, status in sources:
+            timings = {}
+            with timed(timings, 'fetch'):
+                pass
+            logger.debug("抓取RSS源: %s - %s", name, url, extra={'source': name})
+            logger.info("从 %s 抓取到 %d 条新闻", name, status % 10, extra={'source': name, 'timings': timings})
+            if status % 50 == 0:
+                logger.warning("RSS源 %s 返回状态码: %s", name, status, extra={'source': name, 'timings': timings})
+
+    def configure_legacy(log_file):
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+        formatter = logging.Formatter(CONSOLE_FORMAT)
+        for handler in (logging.FileHandler(log_file), logging.StreamHandler()):
+            handler.setFormatter(formatter)
+            root.addHandler(handler)
+        root.setLevel(logging.INFO)
+
+    def shutdown_legacy():
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+            handler.close()
+
+    cases = [
+        ('同步 FileHandler + f-string', configure_legacy, shutdown_legacy, legacy_source_lines),
+        ('队列写线程（不采样）', lambda path: setup_logging(path, sample_rates={}), shutdown_logging,
+         pipeline_source_lines),
+        ('队列写线程（默认采样）', lambda path: setup_logging(path), shutdown_logging, pipeline_source_lines),
+    ]
+    rounds = 5
+    tmp_dir = tempfile.mkdtemp()
+    print("🪵 日志开销（每 1000 个数据源，控制台输出到 /dev/null）")
+    try:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stderr(devnull):
+            for label, configure, shutdown, emit in cases:
+                log_file = os.path.join(tmp_dir, 'collection.log')
+                caller = total = 0.0
+                for _ in range(rounds):
+                    configure(log_file)
+                    started = time.perf_counter()
+                    emit()
+                    caller += time.perf_counter() - started
+                    shutdown()
+                    total += time.perf_counter() - started
+                    os.remove(log_file)
+                print(f"{label}: 调用方 {caller / rounds * 1000:.1f} ms, 含写出 {total / rounds * 1000:.1f} ms",
+                      file=sys.stdout)
+    finally:
+        for handler in saved_handlers:
+            root.addHandler(handler)
+        root.setLevel(saved_level)
+        shutil.rmtree(tmp_dir)
+
+
+def bench_websub():
+    """WebSub 推送：20 个源、50 次更新从 hub 推送到出现在最新新闻中的延迟，以及请求数；
+    对照实际运行的轮询：轮询间隔按 4 秒 = 30 分钟压缩，更新在随机时刻写入替身 feed。
+    轮询延迟 = 更新写入到替身服务器第一次把它返回给轮询方的等待（按压缩比例还原）
+    + 从返回到该轮收集结束、出现在结果中的实际耗时；请求数读取替身服务器的计数"""
+    import asyncio
+    import logging
+    import re
+    import shutil
+    import statistics
+    import tempfile
+    from http.server import HTTPServer
+    import data_collection_service
+    from data_collector import DataCollector
+    from related_index import RelatedIndex
+    from rollups import RollupStore
+    from story_clusters import StoryClusterIndex
+    from websub import WebSubManager, subscription_id
+
+    feed_count, update_count, poll_interval = 20, 50, 30 * 60
+    poll_seconds, poll_rounds = 4.0, 8  # 压缩后的轮询间隔（对应 30 分钟，需长于一轮收集的耗时）和轮数
+    scale = poll_interval / poll_seconds
+    logging.getLogger().setLevel(logging.WARNING)
+    tmp_dir = tempfile.mkdtemp()
+    service = data_collection_service.DataCollectionService()
+    service.publish_dir = tmp_dir
+    service.story_index = StoryClusterIndex(os.path.join(tmp_dir, 'stories.json'))
+    service.related_index = RelatedIndex(os.path.join(tmp_dir, 'related.npz'))
+    service.rollup_store = RollupStore(os.path.join(tmp_dir, 'rollups.npz'))
+    saved_service, data_collection_service.service = data_collection_service.service, service
+    admin = HTTPServer(('127.0.0.1', 0), data_collection_service.create_web_server())
+    threading.Thread(target=admin.serve_forever, daemon=True).start()
+    print(f"📡 WebSub 推送（{feed_count} 个源, {update_count} 次更新）")
+    try:
+        with WebSubHubStandIn() as hub, FeedStandInServer(ai_entries_per_feed=2, hub_url=hub.url) as feeds:
+            service.websub = WebSubManager(f"http://127.0.0.1:{admin.server_address[1]}",
+                                           os.path.join(tmp_dir, 'websub.json'))
+            sources = feeds.make_sources(feed_count)
+
+            async def collect():
+                async with DataCollector(websub=service.websub) as collector:
+                    collector.data_sources = sources
+                    return await collector.collect_all()
+
+            service.latest_news = asyncio.run(collect())
+            service.push_sources = {source.url: source for source in sources}
+            hub.wait_subscribed(feed_count)
+            topics = [service.websub.get(subscription_id(source.url)).topic for source in sources]
+            known = {news.id for news in service.latest_news}
+
+            latencies = []
+            requests_before = feeds.request_count
+            for update_id in range(update_count):
+                feed_id = update_id % feed_count
+                started = time.perf_counter()
+                hub.publish(topics[feed_id], feeds.update_xml(feed_id, update_id))
+                # 回调在并入最新新闻并发布后才回应，返回即可见
+                latencies.append((time.perf_counter() - started) * 1000)
+            visible = sum(1 for item in service.get_latest_news() if item['id'] not in known)
+            print(f"  推送: 可见 {visible}/{update_count} 条, 延迟中位数 {statistics.median(latencies):.1f} ms, "
+                  f"最大 {max(latencies):.1f} ms")
+            print(f"        订阅请求 {hub.subscribe_requests} 次, 验证 {hub.verifications} 次, 推送 {hub.deliveries} 次, "
+                  f"推送期间 feed 请求 {feeds.request_count - requests_before} 次")
+    finally:
+        admin.shutdown()
+        admin.server_close()
+        data_collection_service.service = saved_service
+        shutil.rmtree(tmp_dir)
+
+    # 轮询：同样 20 个源、50 次更新，更新在前 poll_rounds - 1 个间隔内的随机时刻写入 feed
+    rng = random.Random(0)
+    schedule = sorted((rng.uniform(0, (poll_rounds - 1) * poll_seconds), update_id % feed_count, update_id)
+                      for update_id in range(update_count))
+    marker = re.compile(r'(\d+)-u(\d+)\b')
+
+    async def poll(feeds, sources):
+        posted, first_seen = {}, {}
+        started = time.perf_counter()
+
+        async def post_updates():
+            for at, feed_id, update_id in schedule:
+                await asyncio.sleep(max(0.0, started + at - time.perf_counter()))
+                feeds.post_update(feed_id, update_id)
+                posted[update_id] = time.perf_counter()
+
+        poster = asyncio.create_task(post_updates())
+        async with DataCollector() as collector:
+            collector.data_sources = sources
+            for round_index in range(poll_rounds):
+                await asyncio.sleep(max(0.0, started + round_index * poll_seconds - time.perf_counter()))
+                for news in await collector.collect_all():
+                    match = marker.search(news.title)
+                    if match and int(match.group(2)) not in first_seen:
+                        first_seen[int(match.group(2))] = time.perf_counter()
+        await poster
+        return posted, first_seen, time.perf_counter() - started
+
+    with FeedStandInServer(ai_entries_per_feed=2) as feeds:
+        sources = feeds.make_sources(feed_count)
+        posted, first_seen, elapsed = asyncio.run(poll(feeds, sources))
+        feed_requests = sum(feeds.feed_requests.values())
+        served = dict(feeds.first_served)
+    delays = [(served[update_id] - posted[update_id]) * scale + (first_seen[update_id] - served[update_id])
+              for update_id in first_seen]
+    per_day = feed_requests / poll_rounds * (86400 / poll_interval)
+    print(f"  轮询（每 30 分钟, 实测 {poll_rounds} 轮）: 看到 {len(first_seen)}/{update_count} 条, "
+          f"延迟中位数 {statistics.median(delays) / 60:.1f} min, 最大 {max(delays) / 60:.1f} min, 实际耗时 {elapsed:.0f} s")
+    print(f"  请求数: 轮询 {feed_requests} 次抓取（按每轮实测折合每天 {per_day:.0f} 次）; "
+          f"推送 {feed_count} 次订阅 + {update_count} 次推送（轮询保留为兜底时两者相加）")
+
+
+BENCHMARKS = {
+    'importtime': bench_importtime,
+    'sharded': bench_sharded,
+    'rescore': bench_rescore,
+    'clusters': bench_clusters,
+    'related': bench_related,
+    'rollups': bench_rollups,
+    'profiling': bench_profiling,
+    'normalize': bench_normalize,
+    'hotcache': bench_hotcache,
+    'urls': bench_urls,
+    'prerender': bench_prerender,
+    'coordination': bench_coordination,
+    'classifier': bench_classifier,
+    'ranking': bench_ranking,
+    'json': bench_json,
+    'logging': bench_logging,
+    'websub': bench_websub,
+}
+
+
+def main():
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"❌ 未知基准: {name}，可选: {', '.join(BENCHMARKS)}")
+            sys.exit(1)
+        BENCHMARKS[name]()
+        print()
+
+
+if __name__ == "__main__":
+    main()
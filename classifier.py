@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AI信息聚合平台 - 本地分类器
+哈希特征的线性模型（多分类逻辑回归），离线从历史快照训练，预测每条新闻的类别（tech / research）和情感。
+权重保存为 .npy，推理时以内存映射方式加载（每个进程一次），一轮的全部新闻批量向量化推理；
+模型文件不存在或置信度不足时保留原有的关键词启发式结果
+"""
+
+import json
+import logging
+import os
+import re
+import sys
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from data_collector import NewsItem
+
+logger = logging.getLogger(__name__)
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_MODEL_DIR = os.path.join(PROJECT_DIR, 'models')
+WEIGHTS_FILE = 'classifier.npy'
+META_FILE = 'classifier.json'
+
+HASH_BITS = 18
+MIN_CONFIDENCE = 0.7  # 预测概率低于该值时保留启发式结果
+CHUNK_ITEMS = 4096    # 每批拼接的条目数，限制特征提取的临时数组大小
+
+# 训练情感时使用的扩展种子词表（弱标注）；模型从共现中学到种子词以外的信号
+POSITIVE_SEEDS = (
+    'breakthrough', 'success', 'successful', 'innovation', 'innovative', 'milestone', 'record', 'outperform',
+    'outperforms', 'improve', 'improves', 'improved', 'boost', 'boosts', 'surge', 'surges', 'wins', 'win',
+    'achieve', 'achieves', 'advance', 'advances', 'sota', 'faster', 'breakthroughs', 'praised',
+    '突破', '进展', '成功', '创新', '提升', '领先', '里程碑', '增长', '刷新', '超越',
+)
+NEGATIVE_SEEDS = (
+    'problem', 'problems', 'failure', 'fails', 'failed', 'error', 'errors', 'controversy', 'controversial',
+    'lawsuit', 'sues', 'sued', 'ban', 'banned', 'layoffs', 'risk', 'risks', 'concern', 'concerns', 'criticism',
+    'criticized', 'warns', 'warning', 'threat', 'threats', 'breach', 'leak', 'leaked', 'scam', 'fraud',
+    'misinformation', 'deepfake', 'deepfakes', 'outage', 'crash', 'investigation', 'probe', 'decline',
+    '问题', '失败', '错误', '批评', '争议', '诉讼', '裁员', '风险', '泄露', '下跌', '禁止', '调查', '漏洞',
+)
+# 研究类线索词：来自研究类信源，或正文提到论文/数据集等至少两个线索时标为 research
+RESEARCH_SEEDS = (
+    'paper', 'papers', 'arxiv', 'preprint', 'researchers', 'study', 'benchmark', 'benchmarks', 'dataset',
+    'datasets', 'theorem', 'proof', 'empirical', 'experiments', 'novel', 'propose', 'proposed', 'we',
+    '论文', '研究', '数据集', '基准', '实验',
+)
+
+# 多项式前缀哈希（模 2^64，numpy 的 uint64 运算自然回绕）
+_HASH_BASE = 0x100000001B3
+_HASH_BASE_INV = pow(_HASH_BASE, -1, 1 << 64)
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+_powers: Tuple[np.ndarray, np.ndarray] = (np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=np.uint64))
+# 与特征提取一致的英文分词（字母数字串）
+_WORD = re.compile(r'[a-z0-9]+')
+
+
+def _power_tables(size: int) -> Tuple[np.ndarray, np.ndarray]:
+    """base^j 与 base^-j（j < size）；只保留目前最大的一张表，按 2 的幂扩容"""
+    global _powers
+    if _powers[0].size < size:
+        capacity = 1 << (size - 1).bit_length()
+        powers = np.full(capacity, _HASH_BASE, dtype=np.uint64)
+        powers[0] = 1
+        inverses = np.full(capacity, _HASH_BASE_INV, dtype=np.uint64)
+        inverses[0] = 1
+        _powers = (np.cumprod(powers, dtype=np.uint64), np.cumprod(inverses, dtype=np.uint64))
+    return _powers
+
+
+def hashed_features(texts: Sequence[str], bits: int = HASH_BITS) -> Tuple[np.ndarray, np.ndarray]:
+    """批量提取哈希特征，返回 (条目序号, 特征桶) 两个等长数组
+
+    特征为小写后的 ASCII 字母数字串（单词、数字、版本号片段）和每个非 ASCII 字符（中文按字）。
+    整批文本拼接成一个字节数组，用前缀哈希一次算出所有词的哈希，不在 Python 中逐词循环
+    """
+    item_parts, feature_parts = [], []
+    for offset in range(0, len(texts), CHUNK_ITEMS):
+        chunk = texts[offset:offset + CHUNK_ITEMS]
+        data = np.frombuffer('\x00'.join(chunk).lower().encode('utf-8'), dtype=np.uint8)
+        size = data.size
+        if not size:
+            continue
+
+        word = ((data >= 97) & (data <= 122)) | ((data >= 48) & (data <= 57))
+        word_start = word.copy()
+        word_start[1:] &= ~word[:-1]
+        word_end = word.copy()
+        word_end[:-1] &= ~word[1:]
+        lead = np.flatnonzero(data >= 0xC0)
+        starts = np.concatenate((np.flatnonzero(word_start), lead))
+        ends = np.concatenate((np.flatnonzero(word_end) + 1,
+                               lead + 2 + (data[lead] >= 0xE0) + (data[lead] >= 0xF0)))
+        np.minimum(ends, size, out=ends)
+
+        powers, inverses = _power_tables(size + 1)
+        prefix = np.zeros(size + 1, dtype=np.uint64)
+        np.cumsum(data.astype(np.uint64) * powers[:size], dtype=np.uint64, out=prefix[1:])
+        hashes = (prefix[ends] - prefix[starts]) * inverses[starts]
+        hashes ^= hashes >> np.uint64(31)
+        hashes *= _MIX
+
+        separators = np.flatnonzero(data == 0)
+        item_parts.append(np.searchsorted(separators, starts) + offset)
+        feature_parts.append((hashes >> np.uint64(64 - bits)).astype(np.int64))
+
+    if not item_parts:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(item_parts), np.concatenate(feature_parts)
+
+
+def weak_sentiment(text: str) -> str:
+    """按扩展种子词表给训练数据打情感标签"""
+    lowered = text.lower()
+    words = set(_WORD.findall(lowered))
+    positive = sum(1 for seed in POSITIVE_SEEDS if (seed in words if seed.isascii() else seed in lowered))
+    negative = sum(1 for seed in NEGATIVE_SEEDS if (seed in words if seed.isascii() else seed in lowered))
+    if positive > negative:
+        return 'positive'
+    if negative > positive:
+        return 'negative'
+    return 'neutral'
+
+
+def weak_category(text: str, source_category: str) -> str:
+    """类别弱标注：研究类信源的条目，以及正文含至少两个研究线索词的条目标为 research"""
+    if source_category == 'research':
+        return 'research'
+    lowered = text.lower()
+    words = set(_WORD.findall(lowered))
+    cues = sum(1 for seed in RESEARCH_SEEDS if (seed in words if seed.isascii() else seed in lowered))
+    return 'research' if cues >= 2 else source_category
+
+
+def news_text(title: str, summary: str) -> str:
+    return f"{title} {summary}"
+
+
+class HashedLinearModel:
+    """多个分类头共用一个哈希特征空间：权重矩阵每列对应一个类别，同一分类头的各列做 softmax"""
+
+    def __init__(self, weights: np.ndarray, bias: np.ndarray, heads: Dict[str, List[str]], bits: int = HASH_BITS):
+        self.weights = weights  # (2^bits, 类别总数) float32，加载时为内存映射
+        self.bias = bias
+        self.heads = heads
+        self.bits = bits
+        self._slices = {}
+        column = 0
+        for head, labels in heads.items():
+            self._slices[head] = slice(column, column + len(labels))
+            column += len(labels)
+
+    @classmethod
+    def load(cls, directory: str = DEFAULT_MODEL_DIR) -> 'HashedLinearModel':
+        with open(os.path.join(directory, META_FILE), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        weights = np.load(os.path.join(directory, WEIGHTS_FILE), mmap_mode='r')
+        if weights.shape != (1 << meta['bits'], sum(len(labels) for labels in meta['heads'].values())):
+            raise ValueError(f"权重形状 {weights.shape} 与元数据不一致")
+        return cls(weights, np.asarray(meta['bias'], dtype=np.float32), meta['heads'], meta['bits'])
+
+    def save(self, directory: str = DEFAULT_MODEL_DIR, **extra):
+        """原子写入权重和元数据（先写权重，元数据最后替换）"""
+        os.makedirs(directory, exist_ok=True)
+        weights_path = os.path.join(directory, WEIGHTS_FILE)
+        tmp_path = f"{weights_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.save(f, np.ascontiguousarray(self.weights, dtype=np.float32))
+        os.replace(tmp_path, weights_path)
+        meta_path = os.path.join(directory, META_FILE)
+        with open(f"{meta_path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(dict(extra, bits=self.bits, heads=self.heads, bias=[float(x) for x in self.bias]),
+                      f, ensure_ascii=False, indent=2)
+        os.replace(f"{meta_path}.tmp", meta_path)
+
+    def scores(self, texts: Sequence[str]) -> np.ndarray:
+        """各条目在每个类别上的得分（logit），形状 (条目数, 类别总数)"""
+        items, features = hashed_features(texts, self.bits)
+        return _sum_by_item(self.weights[features], items, len(texts)) + self.bias
+
+    def predict(self, texts: Sequence[str]) -> Dict[str, Tuple[List[str], np.ndarray]]:
+        """{分类头: (预测标签列表, 预测概率)}"""
+        scores = self.scores(texts)
+        predictions = {}
+        for head, labels in self.heads.items():
+            probabilities = _softmax(scores[:, self._slices[head]])
+            best = probabilities.argmax(axis=1)
+            predictions[head] = ([labels[i] for i in best], probabilities[np.arange(len(texts)), best])
+        return predictions
+
+
+def _sum_by_item(values: np.ndarray, items: np.ndarray, count: int) -> np.ndarray:
+    """按条目序号累加每个特征的权重行，返回 (count, 列数)"""
+    result = np.empty((count, values.shape[1]), dtype=np.float64)
+    for column in range(values.shape[1]):
+        result[:, column] = np.bincount(items, weights=values[:, column], minlength=count)
+    return result
+
+
+def _softmax(scores: np.ndarray) -> np.ndarray:
+    exp = np.exp(scores - scores.max(axis=1, keepdims=True))
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+def _fit_head(items: np.ndarray, features: np.ndarray, y: np.ndarray, classes: int, size: int,
+              epochs: int, learning_rate: float, l2: float) -> Tuple[np.ndarray, np.ndarray]:
+    """全批量 AdaGrad 训练一个 softmax 分类头；样本按类别频率反比加权，少数类（正面/负面）不被淹没"""
+    count = len(y)
+    targets = np.eye(classes)[y]
+    sample_weights = (count / (classes * np.bincount(y, minlength=classes)))[y][:, None] / count
+    weights = np.zeros((size, classes))
+    bias = np.zeros(classes)
+    weight_sq = np.full((size, classes), 1e-8)
+    bias_sq = np.full(classes, 1e-8)
+    for _ in range(epochs):
+        residual = (_softmax(_sum_by_item(weights[features], items, count) + bias) - targets) * sample_weights
+        gradient = _sum_by_item(residual[items], features, size) + l2 * weights
+        bias_gradient = residual.sum(axis=0)
+        weight_sq += gradient * gradient
+        bias_sq += bias_gradient * bias_gradient
+        weights -= learning_rate * gradient / np.sqrt(weight_sq)
+        bias -= learning_rate * bias_gradient / np.sqrt(bias_sq)
+    return weights, bias
+
+
+def train(items: Sequence[Dict], bits: int = HASH_BITS, epochs: int = 150, learning_rate: float = 0.5,
+          l2: float = 1e-3) -> HashedLinearModel:
+    """从快照条目训练：类别和情感都取种子词表的弱标注"""
+    texts = [news_text(item['title'], item.get('summary') or '') for item in items]
+    targets = {
+        'category': [weak_category(text, item['category']) for text, item in zip(texts, items)],
+        'sentiment': [weak_sentiment(text) for text in texts],
+    }
+    item_index, features = hashed_features(texts, bits)
+
+    heads, weight_blocks, biases = {}, [], []
+    for head, values in targets.items():
+        labels = sorted(set(values))
+        label_of = {label: i for i, label in enumerate(labels)}
+        y = np.fromiter((label_of[v] for v in values), dtype=np.int64, count=len(values))
+        weights, bias = _fit_head(item_index, features, y, len(labels), 1 << bits, epochs, learning_rate, l2)
+        weight_blocks.append(weights)
+        biases.append(bias)
+        heads[head] = labels
+
+    return HashedLinearModel(np.hstack(weight_blocks).astype(np.float32), np.concatenate(biases).astype(np.float32),
+                             heads, bits)
+
+
+@lru_cache(maxsize=None)
+def get_classifier(directory: str = DEFAULT_MODEL_DIR) -> Optional[HashedLinearModel]:
+    """每个进程只加载一次；模型不存在或损坏时返回 None（使用启发式）"""
+    if not os.path.exists(os.path.join(directory, META_FILE)):
+        return None
+    try:
+        return HashedLinearModel.load(directory)
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning("分类模型加载失败，使用关键词启发式: %s", e)
+        return None
+
+
+def classify_news(news_list: List['NewsItem'], model: Optional[HashedLinearModel] = None,
+                  min_confidence: float = MIN_CONFIDENCE) -> int:
+    """批量改写置信度足够的类别和情感，返回被改写的字段数"""
+    model = model or get_classifier()
+    if model is None or not news_list:
+        return 0
+    predictions = model.predict([news_text(news.title, news.summary) for news in news_list])
+    changed = 0
+    for head, (labels, confidence) in predictions.items():
+        confident = (confidence >= min_confidence).tolist()
+        for news, label, ok in zip(news_list, labels, confident):
+            if ok and getattr(news, head) != label:
+                setattr(news, head, label)
+                changed += 1
+    return changed
+
+
+def _split(items: List[Dict], holdout: float) -> Tuple[List[Dict], List[Dict]]:
+    """按 ID 哈希切分训练/验证集（同一条新闻总在同一侧）"""
+    import zlib
+
+    threshold = int(holdout * 100)
+    train_items = [item for item in items if zlib.crc32(item['id'].encode()) % 100 >= threshold]
+    test_items = [item for item in items if zlib.crc32(item['id'].encode()) % 100 < threshold]
+    return train_items, test_items
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description='训练/使用本地新闻分类器')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    train_parser = subparsers.add_parser('train', help='从历史快照训练并保存模型')
+    train_parser.add_argument('--output', default=DEFAULT_MODEL_DIR, help='模型目录')
+    train_parser.add_argument('--bits', type=int, default=HASH_BITS, help='哈希特征位数')
+    train_parser.add_argument('--holdout', type=float, default=0.2, help='验证集比例')
+    predict_parser = subparsers.add_parser('predict', help='预测文本的类别和情感')
+    predict_parser.add_argument('texts', nargs='+')
+    predict_parser.add_argument('--model', default=DEFAULT_MODEL_DIR, help='模型目录')
+    args = parser.parse_args(argv)
+
+    if args.command == 'predict':
+        model = get_classifier(args.model)
+        if model is None:
+            print(f"❌ 未找到模型: {args.model}，请先运行 python3 classifier.py train")
+            return 1
+        predictions = model.predict(args.texts)
+        for i, text in enumerate(args.texts):
+            print(text)
+            for head, (labels, confidence) in predictions.items():
+                print(f"  {head}: {labels[i]} ({confidence[i]:.2f})")
+        return 0
+
+    from snapshots import iter_snapshots
+
+    unique: Dict[str, Dict] = {}
+    for _, snapshot in iter_snapshots():
+        for item in snapshot:
+            unique[item['id']] = item
+    items = list(unique.values())
+    train_items, test_items = _split(items, args.holdout)
+    model = train(train_items, args.bits)
+    if test_items:
+        predictions = model.predict([news_text(item['title'], item.get('summary') or '') for item in test_items])
+        truth = {'category': [weak_category(news_text(item['title'], item.get('summary') or ''), item['category'])
+                              for item in test_items],
+                 'sentiment': [weak_sentiment(news_text(item['title'], item.get('summary') or ''))
+                               for item in test_items]}
+        for head, (labels, confidence) in predictions.items():
+            accuracy = sum(a == b for a, b in zip(labels, truth[head])) / len(labels)
+            coverage = float((confidence >= MIN_CONFIDENCE).mean())
+            print(f"📊 {head}: 验证集准确率 {accuracy:.1%}（{len(test_items)} 条），置信度 ≥ {MIN_CONFIDENCE} 的占 {coverage:.1%}")
+    # 验证后用全部数据重新训练
+    model = train(items, args.bits)
+    model.save(args.output, trained_items=len(items))
+    print(f"✅ 已用 {len(items)} 条新闻训练模型，保存到 {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
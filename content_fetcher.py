@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AI信息聚合平台 - 全文抓取器
+在去重排序之后抓取前 N 条新闻的原文页面，提取正文写入 NewsItem.content
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from typing import Dict, List, Optional, TYPE_CHECKING
+from urllib.parse import urlparse
+
+if TYPE_CHECKING:
+    import aiohttp
+    from data_collector import NewsItem
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = '.content_cache'
+
+# 提取正文时整体移除的标签
+_NOISE_TAGS = ['script', 'style', 'noscript', 'nav', 'header', 'footer', 'aside', 'form', 'iframe', 'svg']
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def _atomic_write(path: str, data: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class ContentCache:
+    """
+    正文磁盘缓存
+
+    index/ 下按 URL 哈希保存校验信息（ETag / Last-Modified / 抓取时间），
+    objects/ 下按正文内容哈希保存提取结果，相同正文只存一份
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def _index_path(self, url: str) -> str:
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, 'index', key[:2], f"{key}.json")
+
+    def _object_path(self, content_hash: str) -> str:
+        return os.path.join(self.cache_dir, 'objects', content_hash[:2], f"{content_hash}.txt")
+
+    def get(self, url: str) -> Optional[Dict]:
+        """读取 URL 的缓存条目，不存在或正文丢失时返回 None"""
+        try:
+            with open(self._index_path(url), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not os.path.exists(self._object_path(entry['content_hash'])):
+            return None
+        return entry
+
+    def read_text(self, entry: Dict) -> str:
+        with open(self._object_path(entry['content_hash']), 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def put(self, url: str, text: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> Dict:
+        content_hash = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        object_path = self._object_path(content_hash)
+        if not os.path.exists(object_path):
+            _atomic_write(object_path, text)
+
+        entry = {
+            'url': url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'content_hash': content_hash,
+            'fetched_at': time.time(),
+        }
+        _atomic_write(self._index_path(url), json.dumps(entry, ensure_ascii=False))
+        return entry
+
+    def touch(self, entry: Dict):
+        """服务端返回 304 时刷新抓取时间"""
+        entry['fetched_at'] = time.time()
+        _atomic_write(self._index_path(entry['url']), json.dumps(entry, ensure_ascii=False))
+
+
+def extract_main_text(html: str, max_length: int = 20000) -> str:
+    """
+    Readability 风格的正文提取
+
+    按段落给父节点打分（段落数、逗号数、文本长度），取得分最高的容器拼接其段落文本
+    """
+    from bs4 import BeautifulSoup
+
+    try:
+        soup = BeautifulSoup(html, 'lxml')
+    except Exception:
+        soup = BeautifulSoup(html, 'html.parser')
+
+    for tag in soup(_NOISE_TAGS):
+        tag.decompose()
+
+    scores: Dict[int, float] = {}
+    containers = {}
+    for paragraph in soup.find_all('p'):
+        text = paragraph.get_text(' ', strip=True)
+        if len(text) < 25:
+            continue
+        score = 1 + text.count(',') + text.count('，') + min(len(text) / 100, 3)
+        parent = paragraph.parent
+        if parent is None:
+            continue
+        containers[id(parent)] = parent
+        scores[id(parent)] = scores.get(id(parent), 0) + score
+        grandparent = parent.parent
+        if grandparent is not None:
+            containers[id(grandparent)] = grandparent
+            scores[id(grandparent)] = scores.get(id(grandparent), 0) + score / 2
+
+    if scores:
+        best = containers[max(scores, key=scores.get)]
+        paragraphs = [p.get_text(' ', strip=True) for p in best.find_all(['p', 'h2', 'h3', 'li'])]
+    else:
+        body = soup.body or soup
+        paragraphs = [body.get_text(' ', strip=True)]
+
+    text = '\n\n'.join(_WHITESPACE_RE.sub(' ', p) for p in paragraphs if p)
+    return text[:max_length]
+
+
+class ArticleFetcher:
+    """带主机级并发限制、磁盘缓存和时间预算的原文抓取器"""
+
+    def __init__(self, session: 'aiohttp.ClientSession', cache: Optional[ContentCache] = None,
+                 per_host_limit: int = 2, time_budget: float = 20.0, max_age: float = 24 * 3600,
+                 max_bytes: int = 2 * 1024 * 1024):
+        self.session = session
+        self.cache = cache or ContentCache()
+        self.per_host_limit = per_host_limit
+        self.time_budget = time_budget
+        self.max_age = max_age  # 缓存在此时间内直接使用，不发请求
+        self.max_bytes = max_bytes
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.stats = {'cache_hits': 0, 'not_modified': 0, 'downloaded': 0, 'failed': 0, 'timed_out': 0}
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).hostname or ''
+        if host not in self._host_semaphores:
+            self._host_semaphores[host] = asyncio.Semaphore(self.per_host_limit)
+        return self._host_semaphores[host]
+
+    async def fetch_text(self, url: str, source: Optional[str] = None) -> Optional[str]:
+        """获取单个页面的正文（优先使用缓存）；source 为所属数据源，随日志记录输出"""
+        entry = self.cache.get(url)
+        if entry and time.time() - entry['fetched_at'] < self.max_age:
+            self.stats['cache_hits'] += 1
+            return self.cache.read_text(entry)
+
+        headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
+        if entry and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+
+        try:
+            async with self._host_semaphore(url):
+                async with self.session.get(url, headers=headers, timeout=15) as response:
+                    if response.status == 304 and entry:
+                        self.cache.touch(entry)
+                        self.stats['not_modified'] += 1
+                        return self.cache.read_text(entry)
+                    if response.status != 200:
+                        logger.warning("原文 %s 返回状态码: %s", url, response.status, extra={'source': source})
+                        self.stats['failed'] += 1
+                        return None
+                    body = await response.content.read(self.max_bytes)
+                    charset = response.charset or 'utf-8'
+                    etag = response.headers.get('ETag')
+                    last_modified = response.headers.get('Last-Modified')
+
+            # 正文提取是CPU密集操作，放到线程池避免阻塞事件循环
+            loop = asyncio.get_running_loop()
+            html = body.decode(charset, errors='replace')
+            text = await loop.run_in_executor(None, extract_main_text, html)
+            self.cache.put(url, text, etag, last_modified)
+            self.stats['downloaded'] += 1
+            return text
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("抓取原文 %s 失败: %s", url, e, extra={'source': source})
+            self.stats['failed'] += 1
+            return None
+
+    async def enrich(self, news_list: List['NewsItem'], top_n: int) -> Dict[str, int]:
+        """为前 top_n 条新闻填充正文，超出时间预算的请求直接取消"""
+        targets = [news for news in news_list[:top_n] if news.url]
+        if not targets:
+            return self.stats
+
+        tasks = {asyncio.create_task(self.fetch_text(news.url, news.source)): news for news in targets}
+        done, pending = await asyncio.wait(tasks, timeout=self.time_budget)
+
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+            self.stats['timed_out'] += len(pending)
+            logger.warning("原文抓取超出时间预算 %ss，取消 %d 个请求", self.time_budget, len(pending))
+
+        for task in done:
+            text = task.result()
+            news = tasks[task]
+            if text and len(text) > len(news.summary):
+                news.content = text
+
+        logger.info("原文抓取完成: %s", self.stats)
+        return self.stats
@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AI信息聚合平台 - 多副本协调
+多个数据收集服务副本共享同一份数据源列表：每个副本在抓取前对数据源逐个加租约，
+只抓取自己持有租约的源，抓取完成后把租约延长到该源的轮询间隔，其他副本在此期间跳过该源；
+副本中途退出时租约到期自动释放，由其他副本接手。
+租约存储可插拔：本机多进程用 SQLite（文件锁），跨主机用 Redis 协议的服务
+"""
+
+import logging
+import math
+import os
+import re
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from urllib.parse import unquote, urlparse
+
+if TYPE_CHECKING:
+    from data_collector import DataSource
+
+logger = logging.getLogger(__name__)
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_NAMESPACE = 'ai_news'
+DEFAULT_CLAIM_TTL = 300  # 抓取期间的租约（秒）：副本抓取中途退出，最多 5 分钟后由其他副本接手
+DEFAULT_HEARTBEAT_TTL = 45 * 60  # 副本存活心跳（秒），约为定时间隔的 1.5 倍
+POLL_MARGIN = 0.9  # 抓取完成后租约延长到轮询间隔的 90%，与 DataCollector._due_sources 的余量一致
+SHARED_WINDOW = 30 * 60  # 合并共享历史时取最近一个定时间隔内各副本写入的快照
+
+# 子进程中从父进程继承的 SQLite 连接：只保留引用，不在子进程中关闭（见 SQLiteLeaseBackend._release_inherited）
+_INHERITED_CONNECTIONS: List[sqlite3.Connection] = []
+
+# Redis 的续期脚本：只有持有者才能续期（获取直接用 SET NX PX）
+RENEW_SCRIPT = """if redis.call('get', KEYS[1]) == ARGV[1] then
+  return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0"""
+
+
+class LeaseBackendError(RuntimeError):
+    """租约存储不可用或返回了错误"""
+
+
+class LeaseBackend:
+    """租约存储接口：键 -> (持有者, 到期时间)，所有操作按批进行"""
+
+    def acquire(self, items: Sequence[Tuple[str, float]], owner: str, limit: Optional[int] = None) -> List[str]:
+        """按顺序尝试获取空闲或已过期的 [(键, TTL秒)]，成功 limit 个后停止，返回获取到的键
+        （自己持有且未过期的租约也不能再次获取：源的租约表示本轮已由持有者抓取）"""
+        raise NotImplementedError
+
+    def renew(self, items: Sequence[Tuple[str, float]], owner: str) -> List[str]:
+        """把自己持有的租约的剩余时间重设为 TTL，返回续期成功的键"""
+        raise NotImplementedError
+
+    def holders(self, keys: Sequence[str]) -> Dict[str, Tuple[str, float]]:
+        """未过期租约的 {键: (持有者, 剩余秒数)}"""
+        raise NotImplementedError
+
+    def count(self, prefix: str) -> int:
+        """以 prefix 开头的未过期租约数量"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class SQLiteLeaseBackend(LeaseBackend):
+    """本机多进程共享的租约表：每批操作在一个 BEGIN IMMEDIATE 事务内完成，由 SQLite 的文件锁串行化"""
+
+    def __init__(self, path: str, clock=time.time):
+        self.path = path
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._pid = None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._connection()
+
+    def _connection(self) -> sqlite3.Connection:
+        """当前进程的连接：SQLite 连接不能跨 fork 使用（子进程继承的连接会破坏 WAL 锁状态），子进程中重新打开"""
+        if self._pid != os.getpid():
+            self._release_inherited()
+            self._conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('CREATE TABLE IF NOT EXISTS leases ('
+                               'key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)')
+            self._pid = os.getpid()
+        return self._conn
+
+    def _transaction(self, statement: str, rows: Iterable[Tuple[str, Tuple]], limit: Optional[int] = None) -> List[str]:
+        """在一个事务内逐行执行 [(键, 参数)]，返回影响了一行的键"""
+        done = []
+        with self._lock:
+            conn = self._connection()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                for key, params in rows:
+                    if limit is not None and len(done) >= limit:
+                        break
+                    if conn.execute(statement, params).rowcount:
+                        done.append(key)
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+        return done
+
+    def acquire(self, items, owner, limit=None):
+        now = self.clock()
+        return self._transaction(
+            'INSERT INTO leases (key, owner, expires_at) VALUES (?, ?, ?) '
+            'ON CONFLICT(key) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at '
+            'WHERE leases.expires_at <= ?',
+            ((key, (key, owner, now + ttl, now)) for key, ttl in items), limit)
+
+    def renew(self, items, owner):
+        now = self.clock()
+        return self._transaction(
+            'UPDATE leases SET expires_at = ? WHERE key = ? AND owner = ? AND expires_at > ?',
+            ((key, (now + ttl, key, owner, now)) for key, ttl in items))
+
+    def holders(self, keys):
+        now = self.clock()
+        result = {}
+        with self._lock:
+            conn = self._connection()
+            for key in keys:
+                row = conn.execute('SELECT owner, expires_at FROM leases WHERE key = ? AND expires_at > ?',
+                                         (key, now)).fetchone()
+                if row:
+                    result[key] = (row[0], row[1] - now)
+        return result
+
+    def count(self, prefix):
+        with self._lock:
+            return self._connection().execute('SELECT COUNT(*) FROM leases WHERE substr(key, 1, ?) = ? AND expires_at > ?',
+                                      (len(prefix), prefix, self.clock())).fetchone()[0]
+
+    def _release_inherited(self):
+        """子进程关闭继承的连接时，SQLite 认为自己是最后一个连接，会检查点并删除 WAL，丢掉其他进程已提交的租约；
+        因此继承的连接只放进模块级列表保持引用，不在子进程中关闭"""
+        if self._conn is not None and self._pid != os.getpid():
+            _INHERITED_CONNECTIONS.append(self._conn)
+            self._pid = self._conn = None
+
+    def close(self):
+        self._release_inherited()
+        if self._conn is not None:
+            self._conn.close()
+        self._pid = self._conn = None
+
+    def __del__(self):
+        # 连接与其语句缓存互相引用，不在这里关闭就只能等循环回收，而回收可能发生在 fork 出的子进程中
+        self.close()
+
+
+class RedisLeaseBackend(LeaseBackend):
+    """Redis 协议的租约存储：过期由服务端的 PX 计时，获取用 SET NX，续期用脚本保证“比较后写入”的原子性。
+    内置最小的 RESP 客户端（只用到 SET / EVAL / SCAN / GET / PTTL / AUTH / SELECT），不依赖 redis 包"""
+
+    def __init__(self, host: str = 'localhost', port: int = 6379, db: int = 0, password: Optional[str] = None,
+                 timeout: float = 5.0):
+        self.address = (host, port)
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._sock: Optional[socket.socket] = None
+        self._reader = None
+        self._pid = os.getpid()
+
+    def _connect(self):
+        try:
+            self._sock = socket.create_connection(self.address, self.timeout)
+        except OSError as e:
+            raise LeaseBackendError(f"无法连接租约服务 {self.address[0]}:{self.address[1]}: {e}") from e
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._reader = self._sock.makefile('rb')
+        if self.password:
+            self._send([('AUTH', self.password)])
+        if self.db:
+            self._send([('SELECT', self.db)])
+
+    @staticmethod
+    def _encode(command: Tuple) -> bytes:
+        parts = [b'*%d\r\n' % len(command)]
+        for arg in command:
+            data = arg if isinstance(arg, bytes) else str(arg).encode('utf-8')
+            parts.append(b'$%d\r\n%s\r\n' % (len(data), data))
+        return b''.join(parts)
+
+    def _read_reply(self):
+        line = self._reader.readline()
+        if not line:
+            raise LeaseBackendError("租约服务关闭了连接")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b'+':
+            return payload.decode('utf-8')
+        if kind == b'-':
+            return LeaseBackendError(payload.decode('utf-8'))
+        if kind == b':':
+            return int(payload)
+        if kind == b'$':
+            length = int(payload)
+            if length < 0:
+                return None
+            data = self._reader.read(length + 2)
+            return data[:-2].decode('utf-8')
+        if kind == b'*':
+            length = int(payload)
+            return None if length < 0 else [self._read_reply() for _ in range(length)]
+        raise LeaseBackendError(f"无法解析的响应: {line!r}")
+
+    def _send(self, commands: List[Tuple]) -> List:
+        """流水线发送一批命令并按顺序读取全部响应"""
+        self._sock.sendall(b''.join(map(self._encode, commands)))
+        replies = [self._read_reply() for _ in commands]
+        for reply in replies:
+            if isinstance(reply, LeaseBackendError):
+                raise reply
+        return replies
+
+    def execute(self, commands: List[Tuple]) -> List:
+        with self._lock:
+            if self._pid != os.getpid():
+                # fork 出的子进程不能共用父进程的连接（响应会交错），丢弃后重新连接
+                self._sock = self._reader = None
+                self._pid = os.getpid()
+            if self._sock is None:
+                self._connect()
+            try:
+                return self._send(commands)
+            except (OSError, LeaseBackendError):
+                # 连接状态未知，下次重新连接
+                self._close()
+                raise
+
+    def acquire(self, items, owner, limit=None):
+        acquired = []
+        pending = list(items)
+        while pending and (limit is None or len(acquired) < limit):
+            # 每批只发出还需要的数量，避免多获取再释放
+            batch_size = len(pending) if limit is None else limit - len(acquired)
+            batch, pending = pending[:batch_size], pending[batch_size:]
+            replies = self.execute([('SET', key, owner, 'NX', 'PX', max(int(ttl * 1000), 1)) for key, ttl in batch])
+            acquired.extend(key for (key, _), ok in zip(batch, replies) if ok)
+        return acquired
+
+    def renew(self, items, owner):
+        items = list(items)
+        if not items:
+            return []
+        replies = self.execute([('EVAL', RENEW_SCRIPT, 1, key, owner, max(int(ttl * 1000), 1)) for key, ttl in items])
+        return [key for (key, _), ok in zip(items, replies) if ok]
+
+    def holders(self, keys):
+        keys = list(keys)
+        if not keys:
+            return {}
+        commands = []
+        for key in keys:
+            commands += [('GET', key), ('PTTL', key)]
+        replies = self.execute(commands)
+        return {key: (owner, ttl / 1000) for key, owner, ttl in zip(keys, replies[::2], replies[1::2])
+                if owner is not None and ttl > 0}
+
+    def count(self, prefix):
+        keys, cursor = set(), '0'
+        pattern = re.sub(r'([*?\[\]\\])', r'\\\1', prefix) + '*'
+        while True:
+            cursor, batch = self.execute([('SCAN', cursor, 'MATCH', pattern, 'COUNT', 1000)])[0]
+            keys.update(batch)
+            if cursor == '0':
+                return len(keys)
+
+    def _close(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = self._reader = None
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+
+def open_backend(spec: str) -> LeaseBackend:
+    """按地址创建租约存储：sqlite:路径 或 redis://[:密码@]主机:端口/库"""
+    if spec.startswith('sqlite:'):
+        path = spec[len('sqlite:'):]
+        if path.startswith('//'):
+            path = path[2:]
+        return SQLiteLeaseBackend(path or os.path.join(PROJECT_DIR, 'leases.db'))
+    parsed = urlparse(spec)
+    if parsed.scheme == 'redis':
+        db = int(parsed.path.strip('/') or 0)
+        password = unquote(parsed.password) if parsed.password else None
+        return RedisLeaseBackend(parsed.hostname or 'localhost', parsed.port or 6379, db, password)
+    raise ValueError(f"不支持的协调后端: {spec}（可选 sqlite:路径 或 redis://主机:端口/库）")
+
+
+def default_replica_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _rendezvous(replica_id: str, url: str) -> int:
+    """最高随机权重哈希：各副本按不同顺序尝试获取，同时运行时自然分摊到不同的源"""
+    return zlib.crc32(f"{replica_id}|{url}".encode('utf-8'))
+
+
+class SourceCoordinator:
+    """按数据源加租约，决定本副本本轮抓取哪些源"""
+
+    def __init__(self, backend: LeaseBackend, replica_id: Optional[str] = None, namespace: str = DEFAULT_NAMESPACE,
+                 claim_ttl: float = DEFAULT_CLAIM_TTL, heartbeat_ttl: float = DEFAULT_HEARTBEAT_TTL):
+        self.backend = backend
+        self.replica_id = replica_id or default_replica_id()
+        self.namespace = namespace
+        self.claim_ttl = claim_ttl
+        self.heartbeat_ttl = heartbeat_ttl
+        self.last_claim: Dict = {}
+
+    @property
+    def replica_tag(self) -> str:
+        """可用于文件名的副本标识"""
+        return re.sub(r'[^A-Za-z0-9]+', '-', self.replica_id).strip('-')
+
+    def source_key(self, url: str) -> str:
+        return f"{self.namespace}:source:{url}"
+
+    def _replica_prefix(self) -> str:
+        return f"{self.namespace}:replica:"
+
+    def heartbeat(self) -> int:
+        """登记本副本存活（续期，首次或已过期时重新获取），返回当前存活的副本数"""
+        item = [(self._replica_prefix() + self.replica_id, self.heartbeat_ttl)]
+        if not self.backend.renew(item, self.replica_id):
+            self.backend.acquire(item, self.replica_id)
+        return max(self.backend.count(self._replica_prefix()), 1)
+
+    def claim(self, sources: List['DataSource']) -> List['DataSource']:
+        """从到期的源中获取租约，每个副本最多取 ceil(到期数 / 存活副本数) 个；返回本副本持有的源"""
+        if not sources:
+            return []
+        replicas = self.heartbeat()
+        share = math.ceil(len(sources) / replicas)
+        ordered = sorted(sources, key=lambda s: _rendezvous(self.replica_id, s.url))
+        acquired: Set[str] = set(self.backend.acquire(
+            [(self.source_key(s.url), self.claim_ttl) for s in ordered], self.replica_id, limit=share))
+        claimed = [s for s in sources if self.source_key(s.url) in acquired]
+        self.last_claim = {'due': len(sources), 'claimed': len(claimed), 'replicas': replicas}
+        logger.info("🔒 多副本协调: %d 个到期数据源中获取 %d 个租约（%d 个存活副本，每副本上限 %d）",
+                    len(sources), len(claimed), replicas, share)
+        return claimed
+
+    def mark_fetched(self, sources: List['DataSource']) -> int:
+        """抓取完成后把租约延长到轮询间隔，期间其他副本不再抓取这些源"""
+        renewed = self.backend.renew(
+            [(self.source_key(s.url), s.poll_interval * 60 * POLL_MARGIN) for s in sources], self.replica_id)
+        if len(renewed) < len(sources):
+            logger.warning("⚠️ %d 个数据源的租约在抓取期间已过期，可能被其他副本重复抓取", len(sources) - len(renewed))
+        return len(renewed)
+
+    def status(self, sources: List['DataSource']) -> Dict:
+        holders = self.backend.holders([self.source_key(s.url) for s in sources])
+        return {
+            'replica_id': self.replica_id,
+            'live_replicas': self.backend.count(self._replica_prefix()),
+            'held_by_me': sum(1 for owner, _ in holders.values() if owner == self.replica_id),
+            'leased': len(holders),
+            'sources': len(sources),
+            'last_claim': self.last_claim,
+        }
+
+
+def merge_recent_snapshots(window: float = SHARED_WINDOW, directory: str = PROJECT_DIR,
+                           now: Optional[float] = None) -> List[Dict]:
+    """合并共享历史中最近 window 秒内（按文件修改时间）各副本写入的快照，按 ID 去重后按重要性排序"""
+    from snapshots import list_snapshot_files, load_snapshot
+
+    now = time.time() if now is None else now
+    merged: Dict[str, Dict] = {}
+    for path in list_snapshot_files(directory):
+        if now - os.path.getmtime(path) <= window:
+            # 按时间顺序读取，同一 ID 保留最新的一份
+            for item in load_snapshot(path):
+                merged[item['id']] = item
+    return sorted(merged.values(), key=lambda item: item.get('importance_score', 0.0), reverse=True)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+    from source_registry import DEFAULT_REGISTRY_PATH, SourceRegistry
+
+    parser = argparse.ArgumentParser(description='查看多副本协调的租约状态')
+    parser.add_argument('--backend', default='sqlite:', help='租约存储: sqlite:路径 或 redis://主机:端口/库')
+    parser.add_argument('--registry', default=DEFAULT_REGISTRY_PATH, help='数据源注册表')
+    parser.add_argument('--namespace', default=DEFAULT_NAMESPACE)
+    args = parser.parse_args(argv)
+
+    backend = open_backend(args.backend)
+    coordinator = SourceCoordinator(backend, replica_id='status', namespace=args.namespace)
+    sources = list(SourceRegistry.load(args.registry).build_sources())
+    holders = backend.holders([coordinator.source_key(s.url) for s in sources])
+    print(f"存活副本: {backend.count(coordinator._replica_prefix())}，已加租约的数据源: {len(holders)}/{len(sources)}")
+    for source in sources:
+        holder = holders.get(coordinator.source_key(source.url))
+        print(f"  {source.name}: " + (f"{holder[0]}（剩余 {holder[1]:.0f} 秒）" if holder else "空闲"))
+    backend.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
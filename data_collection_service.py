@@ -5,23 +5,19 @@ AI信息聚合平台 - 自动化数据收集服务
 定期运行数据收集器，确保数据实时更新
 """
 
-import asyncio
-import schedule
+import os
+import threading
 import time
 import logging
-import json
 from datetime import datetime
-from data_collector import DataCollector
 
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('data_collection.log'),
-        logging.StreamHandler()
-    ]
-)
+from log_pipeline import DEFAULT_LOG_FILE, SAMPLE_ENV, parse_sample_rates, setup_logging, start_run, timed
+
+# asyncio / schedule / data_collector 按运行模式延迟导入：
+# server 模式只提供状态页，不需要加载 aiohttp、feedparser、bs4 等抓取依赖
+# （启动耗时基准用 --dry-run 运行真实的启动路径来测量）
+
+# 日志在 main() 中由 setup_logging 配置：后台线程写出，data_collection.log 为 JSON 行并按大小轮转
 logger = logging.getLogger(__name__)
 
 class DataCollectionService:
@@ -32,47 +28,235 @@ class DataCollectionService:
         self.last_successful_run = None
         self.run_count = 0
         self.error_count = 0
+        # 各数据源上次抓取时间，跨定时运行保留，用于按注册表中的 interval 跳过未到期的源
+        self.last_polled = {}
+        self.registry_path = None  # 数据源注册表，None 表示默认的 sources.yaml
+        # 故事聚类、相关文章索引和时间序列汇总常驻内存，首次运行时从磁盘加载
+        self.story_index = None
+        self.related_index = None
+        self.rollup_store = None
+        # 条目派生结果缓存跨定时运行复用；最近一轮的新闻常驻内存，供 /news 直接返回
+        from hot_cache import HotItemCache
+        self.hot_cache = HotItemCache()
+        self.latest_news = []
+        self._latest_dicts = None
+        # latest_news.json 和预渲染首页的输出目录
+        self.publish_dir = os.path.dirname(os.path.abspath(__file__))
+        # 最近一轮新闻的读取时排序器（基础分与发布时间数组），新闻更新后重建
+        self._ranker = None
+        # 多副本协调（--coordination），None 表示单副本运行
+        self.coordinator = None
+        self.last_run_id = None
+        # WebSub 推送接收（--websub-callback），None 表示只轮询；推送由管理服务器线程处理，
+        # 与定时收集共用下面的锁修改最近一轮的新闻和各索引
+        self.websub = None
+        self.push_sources = {}  # 数据源地址 -> 数据源对象（最近一轮收集的源，未收集过时按注册表构建）
+        self._state_lock = threading.RLock()
         
-    async def run_collection(self):
-        """执行数据收集"""
+    async def run_collection(self, dry_run=False):
+        """执行数据收集；dry_run 时打开收集器会话后立即返回（--dry-run）"""
+        # 本轮的运行 ID 随每条日志输出，各阶段耗时汇总在完成日志的 timings 字段中
+        self.last_run_id = start_run()
+        timings = {}
         try:
             logger.info("=" * 60)
-            logger.info(f"开始数据收集 - 第 {self.run_count + 1} 次运行")
-            logger.info(f"时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+            logger.info("开始数据收集 - 第 %d 次运行 (运行 %s)", self.run_count + 1, self.last_run_id)
+            logger.info("时间: %s", datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+            from data_collector import DataCollector
             
-            async with DataCollector() as collector:
+            cache_before = self.hot_cache.stats()
+            async with DataCollector(registry_path=self.registry_path, last_polled=self.last_polled,
+                                     news_cache=self.hot_cache,
+                                     coordinator=self.coordinator, websub=self.websub) as collector:
+                if dry_run:
+                    return True
                 # 收集数据
-                news_items = await collector.collect_all()
+                with timed(timings, 'collect'):
+                    news_items = await collector.collect_all()
+                self.push_sources = {source.url: source for source in collector.data_sources}
+                self.hot_cache.prune()
+                self._log_cache_stats(cache_before)
+                
+                if self.coordinator is None and not collector.polled_sources:
+                    # 没有到期的源（如紧接在 30 分钟定时任务之后的 02:00 任务），保留上一轮的快照和发布结果
+                    self.last_successful_run = datetime.now()
+                    self.run_count += 1
+                    logger.info("⏭️ 本轮没有到期的数据源，保留上一轮的结果")
+                    return True
                 
-                # 保存数据
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                filename = f"ai_news_{timestamp}.json"
-                collector.save_to_news_list(news_items, filename)
+                with self._state_lock:
+                    self._update_indexes(news_items, timings)
+                    
+                    # 保存数据
+                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                    if self.coordinator is None:
+                        # 本轮未到期的源（轮询间隔长于定时间隔）沿用上一轮的条目，快照始终是完整的最新结果
+                        polled = {source.name for source in collector.polled_sources}
+                        carried = [news for news in self.latest_news if news.source not in polled]
+                        news_items = collector._sort_by_importance(collector._deduplicate(news_items, kept=carried))
+                        filename = f"ai_news_{timestamp}.json"
+                    else:
+                        # 各副本把自己抓取的部分写入共享历史（文件名带副本标识），没有新内容时不写
+                        filename = f"ai_news_{timestamp}_{self.coordinator.replica_tag}.json" if news_items else None
+                    self.latest_news = news_items
+                    self._latest_dicts = None
+                    with timed(timings, 'save'):
+                        if filename:
+                            collector.save_to_news_list(news_items, filename)
+                        if self.coordinator is not None:
+                            from coordination import merge_recent_snapshots
+                            self._latest_dicts = merge_recent_snapshots()
+                    
+                    # 更新 latest_news.json 和预渲染首页
+                    from prerender import publish
+                    with timed(timings, 'publish'):
+                        publish(self.get_latest_news(), self.publish_dir)
                 
                 # 更新统计信息
                 self.last_successful_run = datetime.now()
                 self.run_count += 1
                 
-                logger.info(f"✅ 数据收集成功完成!")
-                logger.info(f"📊 收集到 {len(news_items)} 条新闻")
-                logger.info(f"💾 数据已保存到: {filename}")
-                logger.info(f"⏰ 下次运行时间: {self.get_next_run_time()}")
+                logger.info("✅ 数据收集成功完成!", extra={'timings': timings})
+                logger.info("📊 收集到 %d 条新闻", len(news_items))
+                if filename:
+                    logger.info("💾 数据已保存到: %s", filename)
+                else:
+                    logger.info("💾 本副本本轮没有抓取到新闻，未写入快照")
+                logger.info("⏰ 下次运行时间: %s", self.get_next_run_time())
                 
                 return True
                 
         except Exception as e:
             self.error_count += 1
-            logger.error(f"❌ 数据收集失败: {str(e)}")
-            logger.error(f"错误统计: 总运行 {self.run_count + 1} 次, 成功 {self.run_count} 次, 失败 {self.error_count} 次")
+            logger.error("❌ 数据收集失败: %s", e, extra={'timings': timings})
+            logger.error("错误统计: 总运行 %d 次, 成功 %d 次, 失败 %d 次",
+                         self.run_count + 1, self.run_count, self.error_count)
             return False
     
+    def _update_indexes(self, news_items, timings):
+        """把新闻并入故事聚类、相关文章索引和时间序列汇总（定时收集和推送共用）"""
+        # 跨运行故事聚类
+        with timed(timings, 'stories'):
+            if self.story_index is None:
+                from story_clusters import StoryClusterIndex
+                self.story_index = StoryClusterIndex.load()
+            self.story_index.update(news_items)
+        
+        # 增量更新相关文章索引
+        with timed(timings, 'related'):
+            if self.related_index is None:
+                from related_index import RelatedIndex
+                self.related_index = RelatedIndex.load()
+            added = self.related_index.update(news_items)
+            self.related_index.save()
+        logger.info("🔗 相关文章索引新增 %d 条，共 %d 条", added, len(self.related_index.ids))
+        
+        # 时间序列汇总只累加首次出现的新闻
+        with timed(timings, 'rollups'):
+            if self.rollup_store is None:
+                from rollups import RollupStore
+                self.rollup_store = RollupStore.load()
+            self.rollup_store.update(news_items)
+            self.rollup_store.save()
+    
+    def handle_push(self, subscription_id, body, signature):
+        """处理 hub 推送的内容，返回回应 hub 的 HTTP 状态码：
+        未知订阅回应 410（hub 据此停止推送），签名错误按 WebSub 规范回应 2xx 但丢弃内容"""
+        subscription = self.websub.get(subscription_id) if self.websub else None
+        if subscription is None:
+            return 410
+        if not self.websub.signature_valid(subscription, body, signature):
+            logger.warning("⚠️ WebSub 推送签名无效，已丢弃: %s", subscription.topic)
+            return 202
+        self.websub.record_delivery(subscription)
+        source = self._push_source(subscription.source_url)
+        if source is None:
+            return 410
+        import feedparser
+        # 解析在锁外进行，不阻塞定时收集；与收集线程共用的条目缓存自带锁
+        items = source.parse_entries(feedparser.parse(body).entries)
+        added = self.ingest_pushed(items)
+        logger.info("📨 WebSub 推送: %s 共 %d 条，新增 %d 条", source.name, len(items), added,
+                    extra={'source': source.name})
+        return 202
+    
+    def _push_source(self, source_url):
+        """推送对应的数据源；注册表中已删除的源返回 None"""
+        if source_url not in self.push_sources:
+            from data_collector import DataCollector
+            self.push_sources = {source.url: source for source in DataCollector().data_sources}
+            for source in self.push_sources.values():
+                source.entry_cache = self.hot_cache
+        return self.push_sources.get(source_url)
+    
+    def ingest_pushed(self, news_items):
+        """推送的新闻与最近一轮的新闻一起去重、分类、排序，立即更新 /news、/top、latest_news.json 和预渲染首页；
+        返回新增的条数"""
+        from data_collector import DataCollector
+        from json_codec import news_from_dict
+        from prerender import publish
+        
+        with self._state_lock:
+            if not self.latest_news and self.get_latest_news():
+                # 本进程尚未收集过（如 server 模式），以最新快照为基础
+                self.latest_news = [news_from_dict(dict(item)) for item in self.get_latest_news()]
+            known = {news.id for news in self.latest_news}
+            fresh = [news for news in news_items if news.id not in known]
+            if not fresh:
+                return 0
+            collector = DataCollector()
+            # 最近一轮的结果已去重，只比较新条目与它们（及新条目之间）
+            merged = collector._deduplicate(fresh, kept=self.latest_news)
+            added = [news for news in merged if news.id not in known]
+            if not added:
+                return 0
+            collector._classify(added)
+            self._update_indexes(added, {})
+            self.latest_news = collector._sort_by_importance(merged)
+            self._latest_dicts = None
+            publish(self.get_latest_news(), self.publish_dir)
+        return len(added)
+    
+    def _log_cache_stats(self, before):
+        """输出本轮的缓存命中率和当前内存占用"""
+        after = self.hot_cache.stats()
+        hits = after['hits'] - before['hits']
+        lookups = hits + after['misses'] - before['misses']
+        rate = hits / lookups * 100 if lookups else 0.0
+        logger.info("🧊 热点缓存: 本轮命中 %d/%d (%.1f%%), 共 %d 条, 约 %.0f KB",
+                    hits, lookups, rate, after['items'], after['memory_kb'])
+    
+    def get_latest_news(self, limit=None):
+        """最近一轮收集的新闻（字典列表），尚未运行过时读取最新的快照文件一次"""
+        if self._latest_dicts is None:
+            if self.latest_news:
+                from dataclasses import asdict
+                self._latest_dicts = [asdict(news) for news in self.latest_news]
+            else:
+                from snapshots import list_snapshot_files, load_snapshot
+                files = list_snapshot_files()
+                self._latest_dicts = load_snapshot(files[-1]) if files else []
+        return self._latest_dicts[:limit] if limit else self._latest_dicts
+    
+    def get_top_news(self, k=10):
+        """当前时刻按衰减后分数排序的前 k 条新闻（importance_score 为当前分数）"""
+        latest = self.get_latest_news()
+        if self._ranker is None or self._ranker.items is not latest:
+            from ranking import DecayRanker
+            self._ranker = DecayRanker(latest)
+        return self._ranker.top(k)
+    
     def get_next_run_time(self):
         """获取下次运行时间"""
+        import schedule
         next_run = schedule.next_run()
         return next_run.strftime('%Y-%m-%d %H:%M:%S') if next_run else "未知"
     
     def setup_schedule(self):
         """设置定时任务"""
+        import asyncio
+        import schedule
+        
         # 每30分钟运行一次（生产环境可以调整）
         schedule.every(30).minutes.do(lambda: asyncio.run(self.run_collection()))
         
@@ -93,11 +277,19 @@ class DataCollectionService:
             "success_rate": f"{((self.run_count - self.error_count) / max(self.run_count, 1) * 100):.1f}%",
             "last_successful_run": self.last_successful_run.isoformat() if self.last_successful_run else None,
             "next_run": self.get_next_run_time(),
-            "current_time": datetime.now().isoformat()
+            "current_time": datetime.now().isoformat(),
+            "latest_news_count": len(self.latest_news),
+            "last_run_id": self.last_run_id,
+            "hot_cache": self.hot_cache.stats(),
+            "coordination": self.coordinator.last_claim if self.coordinator else None,
+            "websub": self.websub.stats() if self.websub else None
         }
     
-    def start_service(self):
-        """启动服务"""
+    def start_service(self, dry_run=False):
+        """启动服务；dry_run 时设置定时任务并打开收集器会话后退出（--dry-run）"""
+        import asyncio
+        import schedule
+        
         logger.info("🚀 AI信息聚合平台数据收集服务启动")
         logger.info("=" * 60)
         
@@ -106,7 +298,10 @@ class DataCollectionService:
         
         # 立即运行一次
         logger.info("🔄 执行初始数据收集...")
-        asyncio.run(self.run_collection())
+        asyncio.run(self.run_collection(dry_run=dry_run))
+        if dry_run:
+            schedule.clear()
+            return
         
         logger.info("⏰ 服务已进入定时运行模式")
         
@@ -119,7 +314,7 @@ class DataCollectionService:
         except KeyboardInterrupt:
             logger.info("🛑 收到停止信号，正在关闭服务...")
         except Exception as e:
-            logger.error(f"❌ 服务运行异常: {str(e)}")
+            logger.error("❌ 服务运行异常: %s", e)
         finally:
             logger.info("👋 数据收集服务已停止")
 
@@ -127,17 +322,69 @@ def create_web_server():
     """创建简单的Web服务器用于管理"""
     from http.server import HTTPServer, SimpleHTTPRequestHandler
     import urllib.parse
+    import json_codec
+    from websub import CALLBACK_PREFIX as WEBSUB_PREFIX
     
     class DataCollectionHandler(SimpleHTTPRequestHandler):
         def do_GET(self):
-            if self.path == '/status':
+            if self.path.startswith(WEBSUB_PREFIX):
+                # hub 的订阅验证：原样返回 hub.challenge 表示确认
+                parsed = urllib.parse.urlparse(self.path)
+                params = {key: values[0] for key, values in urllib.parse.parse_qs(parsed.query).items()}
+                challenge = None
+                if service.websub is not None:
+                    challenge = service.websub.verify(parsed.path[len(WEBSUB_PREFIX):], params)
+                if challenge is None:
+                    self.send_error(404)
+                    return
+                body = challenge.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-type', 'text/plain')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+            
+            elif self.path == '/status':
                 self.send_response(200)
                 self.send_header('Content-type', 'application/json')
                 self.send_header('Access-Control-Allow-Origin', '*')
                 self.end_headers()
                 
                 status = service.get_status()
-                self.wfile.write(json.dumps(status, ensure_ascii=False, indent=2).encode())
+                self.wfile.write(json_codec.dumps(status, indent=True))
+                return
+            
+            elif self.path == '/news' or self.path.startswith('/news?'):
+                # 直接返回内存中最近一轮的新闻，不读取磁盘
+                query = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+                try:
+                    limit = int(query.get('limit', ['0'])[0])
+                except ValueError:
+                    limit = 0
+                self.send_response(200)
+                self.send_header('Content-type', 'application/json')
+                self.send_header('Access-Control-Allow-Origin', '*')
+                self.end_headers()
+                
+                news = service.get_latest_news(limit)
+                self.wfile.write(json_codec.dumps(news))
+                return
+            
+            elif self.path == '/top' or self.path.startswith('/top?'):
+                # 按当前时刻的时效衰减排序，不依赖收集时写入的 importance_score
+                query = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+                try:
+                    k = int(query.get('k', ['10'])[0])
+                except ValueError:
+                    k = 10
+                self.send_response(200)
+                self.send_header('Content-type', 'application/json')
+                self.send_header('Access-Control-Allow-Origin', '*')
+                self.end_headers()
+                
+                news = service.get_top_news(k)
+                self.wfile.write(json_codec.dumps(news))
                 return
             
             elif self.path == '/run':
@@ -146,8 +393,10 @@ def create_web_server():
                 self.send_header('Content-type', 'text/html')
                 self.end_headers()
                 
-                # 在后台运行数据收集
-                asyncio.create_task(service.run_collection())
+                # 在后台线程运行数据收集（HTTP服务器线程中没有事件循环）
+                import asyncio
+                import threading
+                threading.Thread(target=lambda: asyncio.run(service.run_collection()), daemon=True).start()
                 
                 html = """
                 <!DOCTYPE html>
@@ -198,6 +447,7 @@ def create_web_server():
                         <p><strong>成功率:</strong> <span class="info">{status['success_rate']}</span></p>
                         <p><strong>最后成功运行:</strong> {status['last_successful_run'] or '尚未运行'}</p>
                         <p><strong>下次运行:</strong> {status['next_run']}</p>
+                        <p><strong>热点缓存:</strong> {status['hot_cache']['items']} 条, 命中率 {status['hot_cache']['hit_rate'] * 100:.1f}%, 约 {status['hot_cache']['memory_kb']:.0f} KB</p>
                     </div>
                     
                     <h2>控制面板</h2>
@@ -207,7 +457,10 @@ def create_web_server():
                     <h2>API端点</h2>
                     <ul>
                         <li><code>GET /status</code> - 获取服务状态 (JSON)</li>
+                        <li><code>GET /news?limit=N</code> - 最近一轮收集的新闻 (JSON，内存直出)</li>
+                        <li><code>GET /top?k=N</code> - 按当前时刻时效衰减排序的前 N 条新闻 (JSON)</li>
                         <li><code>GET /run</code> - 手动触发数据收集</li>
+                        <li><code>GET/POST /websub/&lt;id&gt;</code> - WebSub 订阅验证与推送接收（--websub-callback）</li>
                         <li><code>GET /</code> - 管理界面</li>
                     </ul>
                     
@@ -220,6 +473,23 @@ def create_web_server():
             
             else:
                 super().do_GET()
+        
+        def do_POST(self):
+            if not self.path.startswith(WEBSUB_PREFIX):
+                self.send_error(404)
+                return
+            # WebSub 推送：先读完请求体，处理完成后回应（hub 按状态码判断是否投递成功）
+            length = int(self.headers.get('Content-Length') or 0)
+            body = self.rfile.read(length)
+            subscription_id = urllib.parse.urlparse(self.path).path[len(WEBSUB_PREFIX):]
+            try:
+                status = service.handle_push(subscription_id, body, self.headers.get('X-Hub-Signature'))
+            except Exception as e:
+                logger.error("❌ 处理 WebSub 推送失败: %s", e)
+                status = 500
+            self.send_response(status)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
     
     return DataCollectionHandler
 
@@ -234,27 +504,77 @@ def main():
     parser.add_argument('--mode', choices=['service', 'server', 'once'], default='service',
                        help='运行模式: service(服务模式), server(Web服务器), once(单次运行)')
     parser.add_argument('--port', type=int, default=8082, help='Web服务器端口')
+    parser.add_argument('--host', default='localhost', help='Web服务器监听地址（接收 WebSub 推送时需要 hub 能访问到）')
+    parser.add_argument('--profile', nargs='?', const='profiles', default=None, metavar='DIR',
+                       help='开启性能剖析，结果写入 DIR（默认 profiles/，仅 once 模式）')
+    parser.add_argument('--coordination', default=None, metavar='BACKEND',
+                       help='多副本协调的租约存储: sqlite:路径 或 redis://主机:端口/库')
+    parser.add_argument('--replica-id', default=None, help='副本标识（默认 主机名:进程号）')
+    parser.add_argument('--log-sample', default=None, metavar='SPEC',
+                       help='逐源日志的采样率，如 INFO=0.5,DEBUG=0（默认读取环境变量 AI_NEWS_LOG_SAMPLE）')
+    parser.add_argument('--websub-callback', default=None, metavar='URL',
+                       help='接收 WebSub 推送的外部可访问地址（指向本服务器，如 https://news.example.com），'
+                            '仅 service 模式（订阅由定时收集发起和续订），会同时启动管理服务器')
+    parser.add_argument('--dry-run', action='store_true',
+                       help='完成所选模式的启动（导入、配置、打开收集器会话）后退出，不抓取、不监听端口、不写日志文件')
     
     args = parser.parse_args()
+    if args.profile and args.mode != 'once':
+        parser.error('--profile 只能与 --mode once 一起使用')
+    if args.websub_callback and args.mode != 'service':
+        # server 模式不运行定时收集，订阅无法续订，租约到期后 hub 会停止推送
+        parser.error('--websub-callback 只能与 --mode service 一起使用（订阅由定时收集发起和续订）')
+    try:
+        sample_rates = parse_sample_rates(args.log_sample or os.environ.get(SAMPLE_ENV))
+    except ValueError as e:
+        parser.error(str(e))
+    setup_logging(log_file=None if args.dry_run else DEFAULT_LOG_FILE, sample_rates=sample_rates)
+    if args.coordination:
+        from coordination import SourceCoordinator, open_backend
+        try:
+            service.coordinator = SourceCoordinator(open_backend(args.coordination), args.replica_id)
+        except ValueError as e:
+            parser.error(str(e))
+        logger.info("🔒 多副本协调已启用: %s，副本 %s", args.coordination, service.coordinator.replica_id)
+    if args.websub_callback:
+        from websub import WebSubManager
+        service.websub = WebSubManager.load(args.websub_callback)
+        logger.info("📡 WebSub 推送接收已启用: %s（轮询保留为兜底）", args.websub_callback)
     
     if args.mode == 'once':
         # 单次运行模式
-        asyncio.run(service.run_collection())
+        import asyncio
+        import profiling
+        if args.profile:
+            profiling.enable()
+        try:
+            asyncio.run(service.run_collection(dry_run=args.dry_run))
+        finally:
+            if args.profile:
+                profiling.disable().write_report(args.profile)
         
     elif args.mode == 'server':
         # Web服务器模式
+        from http.server import HTTPServer
         handler = create_web_server()
-        server = HTTPServer(('localhost', args.port), handler)
-        logger.info(f"🌐 Web管理服务器启动在 http://localhost:{args.port}")
-        logger.info("📋 访问 http://localhost:{args.port} 查看管理界面")
+        if args.dry_run:
+            return
+        server = HTTPServer((args.host, args.port), handler)
+        logger.info("🌐 Web管理服务器启动在 http://%s:%d", args.host, args.port)
+        logger.info("📋 访问 http://%s:%d 查看管理界面", args.host, args.port)
         try:
             server.serve_forever()
         except KeyboardInterrupt:
             logger.info("🛑 Web服务器已停止")
             
     else:
-        # 服务模式
-        service.start_service()
+        # 服务模式；接收 WebSub 推送时在后台线程运行管理服务器
+        if service.websub is not None and not args.dry_run:
+            from http.server import HTTPServer
+            server = HTTPServer((args.host, args.port), create_web_server())
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            logger.info("🌐 Web管理服务器（含 WebSub 回调）启动在 http://%s:%d", args.host, args.port)
+        service.start_service(dry_run=args.dry_run)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -6,19 +6,27 @@ AI信息聚合平台 - 真实数据收集器
 """
 
 import asyncio
-import aiohttp
-import feedparser
-import json
 import re
 import time
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass, asdict
+from typing import List, Dict, Any, Optional, Tuple, TYPE_CHECKING
+from dataclasses import dataclass
 from urllib.parse import urljoin, urlparse
-import hashlib
-from bs4 import BeautifulSoup
 import logging
 
+import profiling
+from log_pipeline import timed
+from text_normalize import clean_summary, normalize_text
+from url_canonical import canonicalize_url, entry_url, stable_id
+
+# aiohttp / feedparser / bs4 导入开销较大，只在真正抓取时才导入
+if TYPE_CHECKING:
+    import aiohttp
+    from bs4 import BeautifulSoup
+    from coordination import SourceCoordinator
+    from hot_cache import HotItemCache, ParsedEntry
+    from websub import WebSubManager
+
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -39,7 +47,11 @@ class NewsItem:
     keywords: List[str] = None
     sentiment: str = "neutral"
     created_at: str = None
-    
+    base_score: Optional[float] = None  # 不含时效性的基础分（含信源加分），读取时由 ranking 叠加衰减
+    published_ts: Optional[float] = None  # 发布时间戳，无法解析时为 None
+    story_id: Optional[str] = None  # 所属故事簇，由 story_clusters 填写
+    trend_velocity: float = 0.0  # 所属故事的热度（到达速度按信源数加权）
+
     def __post_init__(self):
         if self.keywords is None:
             self.keywords = []
@@ -53,8 +65,12 @@ class DataSource:
         self.url = url
         self.priority = priority  # high, medium, low
         self.rate_limit = 1  # 请求间隔（秒）
+        self.authority_bonus = 0.0  # 信源权威性加分，由数据源注册表配置
+        self.poll_interval = 30  # 轮询间隔（分钟）
+        self.entry_cache: Optional['HotItemCache'] = None  # 条目派生结果缓存，由收集器注入
+        self.websub: Optional['WebSubManager'] = None  # 记录抓取时发现的 WebSub hub，由收集器注入
         
-    async def fetch(self, session: aiohttp.ClientSession) -> List[NewsItem]:
+    async def fetch(self, session: 'aiohttp.ClientSession') -> List[NewsItem]:
         raise NotImplementedError
 
 class RSSDataSource(DataSource):
@@ -63,32 +79,59 @@ class RSSDataSource(DataSource):
         super().__init__(name, url, priority)
         self.category = category
         
-    async def fetch(self, session: aiohttp.ClientSession) -> List[NewsItem]:
+    async def fetch(self, session: 'aiohttp.ClientSession') -> List[NewsItem]:
+        with profiling.span('source', self.name):
+            return await self._fetch_feed(session)
+    
+    async def _fetch_feed(self, session: 'aiohttp.ClientSession') -> List[NewsItem]:
+        # 逐源日志带 source 字段（按级别采样），抓取结果一行带各阶段耗时
+        timings = {}
         try:
-            logger.info(f"抓取RSS源: {self.name} - {self.url}")
+            logger.debug("抓取RSS源: %s - %s", self.name, self.url, extra={'source': self.name})
+            import feedparser
             
-            async with session.get(self.url, timeout=10) as response:
-                if response.status == 200:
-                    content = await response.text()
+            with profiling.span('fetch', self.name), timed(timings, 'fetch'):
+                async with session.get(self.url, timeout=10) as response:
+                    status = response.status
+                    content = await response.text() if status == 200 else None
+                    link_header = response.headers.get('Link')
+            
+            if status == 200:
+                with profiling.stage('parse', self.name), timed(timings, 'parse'):
                     feed = feedparser.parse(content)
-                    
-                    news_items = []
-                    for entry in feed.entries[:10]:  # 限制每源10条
-                        if self._should_include(entry):
-                            news_item = self._parse_rss_entry(entry)
-                            if news_item:
-                                news_items.append(news_item)
-                    
-                    logger.info(f"从 {self.name} 抓取到 {len(news_items)} 条新闻")
-                    return news_items
-                else:
-                    logger.warning(f"RSS源 {self.name} 返回状态码: {response.status}")
-                    return []
+                
+                with timed(timings, 'entries'):
+                    news_items = self.parse_entries(feed.entries)
+                
+                if self.websub is not None:
+                    from websub import discover
+                    found = discover(feed, link_header, self.url)
+                    if found:
+                        self.websub.note(self.url, *found)
+                
+                logger.info("从 %s 抓取到 %d 条新闻", self.name, len(news_items),
+                            extra={'source': self.name, 'timings': timings})
+                return news_items
+            else:
+                logger.warning("RSS源 %s 返回状态码: %s", self.name, status,
+                               extra={'source': self.name, 'timings': timings})
+                return []
                     
         except Exception as e:
-            logger.error(f"抓取RSS源 {self.name} 失败: {str(e)}")
+            logger.error("抓取RSS源 %s 失败: %s", self.name, e, extra={'source': self.name, 'timings': timings})
             return []
     
+    def parse_entries(self, entries) -> List[NewsItem]:
+        """解析 feed 条目（轮询抓取和 WebSub 推送共用）"""
+        news_items = []
+        for entry in entries[:10]:  # 限制每源10条
+            if self._should_include(entry):
+                with profiling.stage('_parse_rss_entry', self.name):
+                    news_item = self._parse_rss_entry(entry)
+                if news_item:
+                    news_items.append(news_item)
+        return news_items
+    
     def _should_include(self, entry) -> bool:
         """检查是否应该包含该条目"""
         # 过滤条件：标题或摘要中包含AI相关关键词
@@ -104,76 +147,98 @@ class RSSDataSource(DataSource):
         return any(keyword.lower() in content for keyword in ai_keywords)
     
     def _clean_and_truncate_summary(self, summary: str, max_length: int = 300) -> str:
-        """清理HTML标签并截断摘要"""
-        # 移除HTML标签
-        clean_summary = re.sub(r'<[^>]+>', '', summary)
-        # 移除多余空白
-        clean_summary = re.sub(r'\s+', ' ', clean_summary).strip()
-        # 移除HTML实体
-        clean_summary = re.sub(r'&[a-zA-Z0-9#]+;', '', clean_summary)
-        
-        # 截断到指定长度
-        if len(clean_summary) > max_length:
-            truncated = clean_summary[:max_length]
-            last_period = truncated.rfind('.')
-            last_space = truncated.rfind(' ')
-            
-            if last_period > max_length * 0.6:
-                return truncated[:last_period + 1]
-            elif last_space > max_length * 0.6:
-                return truncated[:last_space] + '...'
-            else:
-                return truncated + '...'
-        
-        return clean_summary
+        """清理HTML标签、解码实体并截断摘要"""
+        return clean_summary(summary, max_length)
     
     def _parse_rss_entry(self, entry) -> Optional[NewsItem]:
         """解析RSS条目"""
+        from scoring import published_timestamp
+        
         try:
-            title = getattr(entry, 'title', '').strip()
-            summary = getattr(entry, 'summary', '').strip()
-            url = getattr(entry, 'link', '')
+            raw_title = getattr(entry, 'title', '').strip()
+            raw_summary = getattr(entry, 'summary', '').strip()
+            guid = getattr(entry, 'id', None)
+            url = entry_url(getattr(entry, 'link', ''), guid)
             author = getattr(entry, 'author', '')
             published = getattr(entry, 'published', '')
             
-            # 清理并截断摘要
-            summary = self._clean_and_truncate_summary(summary, max_length=300)
-            
-            # 生成唯一ID
-            content_hash = hashlib.md5(f"{title}{url}".encode()).hexdigest()[:16]
-            news_id = f"{self.name}_{content_hash}"
+            # 由规范化URL（无URL时用GUID）生成稳定ID，标题修改和跟踪参数不影响ID
+            news_id = stable_id(self.name, url, guid, raw_title)
             
-            # 提取关键词
-            keywords = self._extract_keywords(title + ' ' + summary)
+            # 清洗、关键词、情感和评分只依赖条目原始内容，内容未变化时直接复用上一轮的结果
+            parsed = self._derive_entry(raw_title, raw_summary, url, published)
             
-            # 计算重要性评分（传入发布时间用于时效性加分）
-            importance_score = self._calculate_importance(title, summary, keywords, published)
-            
-            # 信源权威性加分
-            importance_score = self._apply_source_bonus(importance_score)
-            
-            # 情感分析
-            sentiment = self._analyze_sentiment(title + ' ' + summary)
+            base_score, importance_score = self._scores(parsed.base_score, published)
             
             return NewsItem(
                 id=news_id,
-                title=title,
-                summary=summary,
-                content=summary,
+                title=parsed.title,
+                summary=parsed.summary,
+                content=parsed.summary,
                 url=url,
                 source=self.name,
                 author=author,
                 published_date=published,
                 importance_score=importance_score,
                 category=self.category,
-                keywords=keywords,
-                sentiment=sentiment
+                keywords=list(parsed.keywords),
+                sentiment=parsed.sentiment,
+                base_score=base_score,
+                published_ts=published_timestamp(published)
             )
             
         except Exception as e:
-            logger.error(f"解析RSS条目失败: {str(e)}")
+            logger.error("解析RSS条目失败: %s", e, extra={'source': self.name})
             return None
     
+    def _scores(self, text_score: float, published: str) -> Tuple[float, float]:
+        """由文本得分计算 (base_score, importance_score)：
+        存储不随时间变化的基础分（含信源权威性加分）和发布时间，时效性在读取时由 ranking 连续衰减；
+        importance_score 仍按收集时的时效性档位给出，作为兼容字段"""
+        from scoring import default_weights, hours_since, recency_bonus
+        
+        weights = default_weights()
+        recency = recency_bonus(weights, hours_since(published))
+        return (self._apply_source_bonus(text_score),
+                self._apply_source_bonus(min(text_score + recency, weights.max_score)))
+    
+    def rescore_content(self, news: NewsItem):
+        """抓取到原文正文后，按正文（而不是 300 字摘要）重新提取关键词并计算评分"""
+        keywords = self._extract_keywords(news.title + ' ' + news.content)
+        text_score = self._calculate_importance(news.title, news.content, keywords, with_recency=False)
+        news.keywords = keywords
+        news.base_score, news.importance_score = self._scores(text_score, news.published_date)
+    
+    def _derive_entry(self, raw_title: str, raw_summary: str, url: str, published: str) -> 'ParsedEntry':
+        """计算条目的派生结果（有缓存时先查缓存）"""
+        from hot_cache import ParsedEntry, entry_fingerprint
+        
+        key = None
+        if self.entry_cache is not None:
+            key = entry_fingerprint(self.name, raw_title, url, raw_summary, published)
+            cached = self.entry_cache.get(key)
+            # 缓存的是不含时效性的基础分，命中后始终可以直接复用
+            if cached is not None:
+                return cached
+        
+        title = normalize_text(raw_title)
+        # 清理并截断摘要
+        summary = self._clean_and_truncate_summary(raw_summary, max_length=300)
+        
+        # 提取关键词
+        keywords = self._extract_keywords(title + ' ' + summary)
+        
+        # 计算基础分（时效性加分在使用时按发布时间叠加）
+        base_score = self._calculate_importance(title, summary, keywords, published, with_recency=False)
+        
+        # 情感分析
+        sentiment = self._analyze_sentiment(title + ' ' + summary)
+        
+        parsed = ParsedEntry(title, summary, tuple(keywords), sentiment, base_score)
+        if key is not None:
+            self.entry_cache.put(key, parsed)
+        return parsed
+    
     def _apply_source_bonus(self, base_score: float) -> float:
         """
         根据信源权威性调整分数
@@ -182,32 +247,10 @@ class RSSDataSource(DataSource):
         T2 专业博客：+0.3
         T3 学术源：+0.2
         T4 社区源：+0.0
-        """
-        source_bonus = {
-            # T1: 头部科技媒体
-            'TechCrunch AI': 0.5,
-            'The Verge AI': 0.5,
-            'Wired AI': 0.5,
-            'Ars Technica': 0.4,
-            'MIT Technology Review': 0.5,
-            # T2: 官方博客/专业媒体
-            'OpenAI News': 0.6,  # 官方源额外加分
-            'DeepMind Blog': 0.5,
-            'Google AI Blog': 0.5,
-            'Anthropic Blog': 0.5,
-            'Hugging Face Blog': 0.4,
-            'VentureBeat AI': 0.3,
-            'AI News': 0.3,
-            # T3: 学术源
-            'arXiv AI': 0.3,
-            'arXiv ML': 0.3,
-            # T4: 社区源
-            '机器之心': 0.3,
-            'Reddit ML': 0.1,
-            'Lobsters AI': 0.1,
-        }
         
-        bonus = source_bonus.get(self.name, 0.0)
+        加分值配置在数据源注册表（sources.yaml）的 bonus 字段
+        """
+        bonus = self.authority_bonus
         return min(base_score + bonus, 10.0)
     
     def _extract_keywords(self, text: str) -> List[str]:
@@ -230,7 +273,8 @@ class RSSDataSource(DataSource):
         
         return found_keywords[:5]  # 限制5个关键词
     
-    def _calculate_importance(self, title: str, summary: str, keywords: List[str], published_date: str = None) -> float:
+    def _calculate_importance(self, title: str, summary: str, keywords: List[str], published_date: str = None,
+                              with_recency: bool = True) -> float:
         """
         计算重要性评分 (优化版)
         
@@ -238,97 +282,17 @@ class RSSDataSource(DataSource):
         1. 基础分：4.0
         2. 核心关键词加分：头部公司/产品 +1.5，重要公司 +0.8
         3. 事件类型加分：发布/突破 +1.0
-        4. 关键词丰富度：每个关键词 +0.3
-        5. 时效性加分：24小时内 +1.0，48小时内 +0.5
+        4. 关键词丰富度：每个关键词 +0.2
+        5. 时效性加分：6小时内 +1.5，24小时内 +1.0，48小时内 +0.5
         6. 信源权威性：由外部传入（在调用时处理）
-        """
-        score = 4.0  # 基础分（降低以给其他维度留空间）
-        
-        text = (title + ' ' + summary).lower()
-        title_lower = title.lower()
-        
-        # ===== 1. 核心关键词加分 =====
-        # 头部AI公司/产品（最高权重）
-        tier1_keywords = {
-            'openai': 1.5, 'chatgpt': 1.5, 'gpt-4': 1.5, 'gpt-5': 2.0,
-            'anthropic': 1.3, 'claude': 1.3,
-            'gemini': 1.2, 'deepmind': 1.2,
-            'sora': 1.5, 'dall-e': 1.2
-        }
-        
-        # 重要AI公司（中等权重）
-        tier2_keywords = {
-            'google': 0.8, 'meta': 0.8, 'microsoft': 0.8, 'nvidia': 0.8,
-            'apple': 0.8, 'amazon': 0.6, 'tesla': 0.6, 'hugging face': 0.7,
-            'mistral': 0.8, 'llama': 0.8, 'copilot': 0.7
-        }
-        
-        # 重要事件/概念（中等权重）
-        tier3_keywords = {
-            '融资': 1.0, 'funding': 1.0, 'valuation': 1.0, '估值': 1.0,
-            'agi': 1.2, '通用人工智能': 1.2,
-            '法规': 0.8, 'regulation': 0.8, 'safety': 0.7, '安全': 0.7,
-            'open source': 0.8, '开源': 0.8
-        }
-        
-        # 计算关键词加分（每类最多计1次最高分，避免重复叠加）
-        tier1_score = max([v for k, v in tier1_keywords.items() if k in text], default=0)
-        tier2_score = max([v for k, v in tier2_keywords.items() if k in text], default=0)
-        tier3_score = max([v for k, v in tier3_keywords.items() if k in text], default=0)
-        
-        score += tier1_score + tier2_score + tier3_score
-        
-        # ===== 2. 事件类型加分 =====
-        event_words = {
-            # 重大发布
-            '发布': 1.0, '推出': 1.0, 'release': 1.0, 'launch': 1.0, 'announce': 0.8,
-            # 技术突破
-            '突破': 1.2, 'breakthrough': 1.2, '首次': 1.0, 'first': 0.8,
-            # 重大变动
-            '收购': 1.0, 'acquisition': 1.0, '合并': 0.8, 'merger': 0.8
-        }
-        
-        event_score = max([v for k, v in event_words.items() if k in title_lower], default=0)
-        score += event_score
         
-        # ===== 3. 关键词丰富度加分 =====
-        score += min(len(keywords) * 0.2, 1.0)  # 最多加1分
+        with_recency=False 时不含第 5 项，得到不随时间变化的基础分（读取时由 ranking 连续衰减）。
+        各项权重配置在 scoring_weights.yaml，评分逻辑见 scoring.score_text
+        """
+        from scoring import default_weights, score_text
         
-        # ===== 4. 时效性加分 =====
-        if published_date:
-            try:
-                from datetime import datetime
-                from email.utils import parsedate_to_datetime
-                
-                # 尝试解析日期
-                try:
-                    pub_time = parsedate_to_datetime(published_date)
-                except:
-                    pub_time = datetime.fromisoformat(published_date.replace('Z', '+00:00'))
-                
-                now = datetime.now(pub_time.tzinfo) if pub_time.tzinfo else datetime.now()
-                hours_ago = (now - pub_time).total_seconds() / 3600
-                
-                if hours_ago < 6:
-                    score += 1.5  # 6小时内
-                elif hours_ago < 24:
-                    score += 1.0  # 24小时内
-                elif hours_ago < 48:
-                    score += 0.5  # 48小时内
-            except Exception:
-                pass  # 解析失败则不加分
-        
-        # ===== 5. 标题质量加分 =====
-        # 标题长度适中（15-80字符）
-        if 15 <= len(title) <= 80:
-            score += 0.2
-        
-        # 标题包含具体数字（如融资金额、性能提升）
-        import re
-        if re.search(r'\$[\d.]+[BMK]|\d+%|\d+x', title):
-            score += 0.5
-        
-        return min(max(score, 1.0), 10.0)  # 限制在1-10分
+        return score_text(default_weights(), title, summary, len(keywords), published_date,
+                          with_recency=with_recency)
     
     def _analyze_sentiment(self, text: str) -> str:
         """简单的情感分析"""
@@ -353,33 +317,41 @@ class WebDataSource(DataSource):
         super().__init__(name, url, priority)
         self.category = category
         
-    async def fetch(self, session: aiohttp.ClientSession) -> List[NewsItem]:
+    async def fetch(self, session: 'aiohttp.ClientSession') -> List[NewsItem]:
+        timings = {}
         try:
-            logger.info(f"抓取网页源: {self.name} - {self.url}")
+            logger.debug("抓取网页源: %s - %s", self.name, self.url, extra={'source': self.name})
+            from bs4 import BeautifulSoup
             
             headers = {
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
             }
             
-            async with session.get(self.url, headers=headers, timeout=15) as response:
-                if response.status == 200:
-                    content = await response.text()
+            with timed(timings, 'fetch'):
+                async with session.get(self.url, headers=headers, timeout=15) as response:
+                    status = response.status
+                    content = await response.text() if status == 200 else None
+            
+            if status == 200:
+                with timed(timings, 'parse'):
                     soup = BeautifulSoup(content, 'html.parser')
                     
                     # 这里需要根据具体网站结构调整解析逻辑
                     news_items = self._parse_webpage(soup)
-                    
-                    logger.info(f"从 {self.name} 抓取到 {len(news_items)} 条新闻")
-                    return news_items
-                else:
-                    logger.warning(f"网页源 {self.name} 返回状态码: {response.status}")
-                    return []
+                
+                logger.info("从 %s 抓取到 %d 条新闻", self.name, len(news_items),
+                            extra={'source': self.name, 'timings': timings})
+                return news_items
+            else:
+                logger.warning("网页源 %s 返回状态码: %s", self.name, status,
+                               extra={'source': self.name, 'timings': timings})
+                return []
                     
         except Exception as e:
-            logger.error(f"抓取网页源 {self.name} 失败: {str(e)}")
+            logger.error("抓取网页源 %s 失败: %s", self.name, e, extra={'source': self.name, 'timings': timings})
             return []
     
-    def _parse_webpage(self, soup: BeautifulSoup) -> List[NewsItem]:
+    def _parse_webpage(self, soup: 'BeautifulSoup') -> List[NewsItem]:
         """解析网页内容"""
         # 这里需要根据具体网站的结构来实现
         # 示例：解析Hacker News的AI相关内容
@@ -392,19 +364,19 @@ class WebDataSource(DataSource):
             for item in items[:5]:  # 限制5条
                 title_elem = item.find('a', string=re.compile(r'AI|artificial|intelligence|machine', re.I))
                 if title_elem:
-                    title = title_elem.get_text().strip()
+                    raw_title = title_elem.get_text().strip()
+                    title = normalize_text(raw_title)
                     url = title_elem.get('href', '')
                     
                     if url and not url.startswith('http'):
                         url = urljoin(self.url, url)
                     
                     # 生成ID
-                    content_hash = hashlib.md5(f"{title}{url}".encode()).hexdigest()[:16]
-                    news_id = f"{self.name}_{content_hash}"
+                    news_id = stable_id(self.name, url, title=raw_title)
                     
                     # 提取摘要
                     summary_elem = item.find(['p', 'div'], class_=['excerpt', 'summary'])
-                    summary = summary_elem.get_text().strip() if summary_elem else title
+                    summary = normalize_text(summary_elem.get_text()) if summary_elem else title
                     
                     # 计算重要性
                     importance_score = self._calculate_importance(title, summary)
@@ -417,11 +389,12 @@ class WebDataSource(DataSource):
                         url=url,
                         source=self.name,
                         importance_score=importance_score,
-                        category=self.category
+                        category=self.category,
+                        base_score=importance_score  # 网页源没有发布时间，也没有时效性加分
                     ))
                     
         except Exception as e:
-            logger.error(f"解析网页内容失败: {str(e)}")
+            logger.error("解析网页内容失败: %s", e, extra={'source': self.name})
         
         return news_items
     
@@ -441,55 +414,56 @@ class WebDataSource(DataSource):
 
 class DataCollector:
     """数据收集器主类"""
-    def __init__(self):
-        self.session: Optional[aiohttp.ClientSession] = None
-        self.data_sources: List[DataSource] = []
-        self.news_cache: Dict[str, NewsItem] = {}
-        
-        # 初始化数据源
-        self._init_data_sources()
+    def __init__(self, registry_path: Optional[str] = None, last_polled: Optional[Dict[str, float]] = None,
+                 enrich_top_n: int = 0, enrich_budget: float = 20.0, news_cache: Optional['HotItemCache'] = None,
+                 coordinator: Optional['SourceCoordinator'] = None, websub: Optional['WebSubManager'] = None):
+        self.session: Optional['aiohttp.ClientSession'] = None
+        self.registry_path = registry_path
+        self._data_sources: Optional[List[DataSource]] = None
+        # 条目派生结果缓存（由服务持有并跨运行复用），None 表示不缓存
+        self.news_cache = news_cache
+        # 各数据源上次抓取时间（URL -> 时间戳），传入时按 poll_interval 跳过未到期的源
+        self.last_polled = last_polled
+        # 多副本协调：只抓取本副本持有租约的源，None 表示单副本运行
+        self.coordinator = coordinator
+        # WebSub 订阅：抓取时记录各源声明的 hub，本轮结束后订阅或续订，None 表示不接收推送
+        self.websub = websub
+        # 去重排序后为前 N 条新闻抓取原文正文（0 表示不抓取）
+        self.enrich_top_n = enrich_top_n
+        self.enrich_budget = enrich_budget
+        # 最近一次 collect_all 实际抓取的数据源（未到期或未分到租约的源不在其中）
+        self.polled_sources: List[DataSource] = []
+    
+    @property
+    def data_sources(self) -> List[DataSource]:
+        """数据源列表（首次访问时才初始化）"""
+        if self._data_sources is None:
+            self._init_data_sources()
+        return self._data_sources
+    
+    @data_sources.setter
+    def data_sources(self, sources: List[DataSource]):
+        self._data_sources = list(sources)
     
     def _init_data_sources(self):
-        """初始化数据源"""
-        # 第一层：头部权威源（高优先级）
-        tier1_sources = [
-            RSSDataSource("TechCrunch AI", "https://techcrunch.com/category/artificial-intelligence/feed/", "high", "tech"),
-            RSSDataSource("The Verge AI", "https://www.theverge.com/rss/ai-artificial-intelligence/index.xml", "high", "tech"),
-            RSSDataSource("Wired AI", "https://www.wired.com/feed/tag/ai/latest/rss", "high", "tech"),
-            RSSDataSource("Ars Technica", "https://feeds.arstechnica.com/arstechnica/technology-lab", "high", "tech"),
-            RSSDataSource("Google AI Blog", "https://blog.google/technology/ai/rss/", "high", "tech"),
-        ]
-        
-        # 第二层：专业技术源（中高优先级）
-        tier2_sources = [
-            RSSDataSource("MIT Technology Review", "https://www.technologyreview.com/feed/", "high", "tech"),
-            RSSDataSource("DeepMind Blog", "https://deepmind.google/blog/rss.xml", "high", "tech"),
-            RSSDataSource("OpenAI News", "https://openai.com/news/rss.xml", "high", "tech"),
-            RSSDataSource("Hugging Face Blog", "https://huggingface.co/blog/feed.xml", "medium", "tech"),
-            RSSDataSource("AI News", "https://artificialintelligence-news.com/feed/", "medium", "tech"),
-            RSSDataSource("VentureBeat AI", "https://venturebeat.com/category/ai/feed/", "medium", "tech"),
-        ]
-        
-        # 第三层：学术与研究源
-        tier3_sources = [
-            RSSDataSource("arXiv AI", "https://rss.arxiv.org/rss/cs.AI", "medium", "research"),
-            RSSDataSource("arXiv ML", "https://rss.arxiv.org/rss/cs.LG", "medium", "research"),
-        ]
-        
-        # 第四层：社区源（低优先级）
-        tier4_sources = [
-            RSSDataSource("Reddit ML", "https://www.reddit.com/r/MachineLearning/.rss", "low", "tech"),
-            RSSDataSource("Lobsters AI", "https://lobste.rs/t/ai.rss", "low", "tech"),
-        ]
-        
-        # 第五层：中文源
-        tier5_sources = [
-            RSSDataSource("机器之心", "https://www.jiqizhixin.com/rss", "medium", "tech"),
-        ]
+        """从数据源注册表初始化数据源"""
+        from source_registry import DEFAULT_REGISTRY_PATH, SourceRegistry
         
-        self.data_sources = tier1_sources + tier2_sources + tier3_sources + tier4_sources + tier5_sources
+        registry = SourceRegistry.load(self.registry_path or DEFAULT_REGISTRY_PATH)
+        self.data_sources = registry.build_sources()
+    
+    def _due_sources(self) -> List[DataSource]:
+        """按轮询间隔筛选本次需要抓取的数据源"""
+        if self.last_polled is None:
+            return self.data_sources
+        
+        now = time.time()
+        # 留10%余量，避免定时任务的秒级漂移导致整轮错过
+        return [s for s in self.data_sources
+                if now - self.last_polled.get(s.url, 0.0) >= s.poll_interval * 60 * 0.9]
     
     async def __aenter__(self):
+        import aiohttp
         self.session = aiohttp.ClientSession()
         return self
     
@@ -500,44 +474,89 @@ class DataCollector:
     async def collect_all(self) -> List[NewsItem]:
         """收集所有数据源的数据"""
         all_news = []
+        due_sources = self._due_sources()
+        if self.coordinator is not None:
+            due_sources = self.coordinator.claim(due_sources)
+        self.polled_sources = due_sources
         
         # 按优先级分组
-        high_priority = [s for s in self.data_sources if s.priority == "high"]
-        medium_priority = [s for s in self.data_sources if s.priority == "medium"]
-        low_priority = [s for s in self.data_sources if s.priority == "low"]
+        high_priority = [s for s in due_sources if s.priority == "high"]
+        medium_priority = [s for s in due_sources if s.priority == "medium"]
+        low_priority = [s for s in due_sources if s.priority == "low"]
         
         # 抓取高优先级数据源
         if high_priority:
-            logger.info(f"开始抓取 {len(high_priority)} 个高优先级数据源...")
+            logger.info("开始抓取 %d 个高优先级数据源...", len(high_priority))
             high_news = await self._collect_sources(high_priority)
             all_news.extend(high_news)
             await asyncio.sleep(2)  # 短暂休息
         
         # 抓取中优先级数据源
         if medium_priority:
-            logger.info(f"开始抓取 {len(medium_priority)} 个中优先级数据源...")
+            logger.info("开始抓取 %d 个中优先级数据源...", len(medium_priority))
             medium_news = await self._collect_sources(medium_priority)
             all_news.extend(medium_news)
             await asyncio.sleep(2)
         
         # 抓取低优先级数据源
         if low_priority:
-            logger.info(f"开始抓取 {len(low_priority)} 个低优先级数据源...")
+            logger.info("开始抓取 %d 个低优先级数据源...", len(low_priority))
             low_news = await self._collect_sources(low_priority)
             all_news.extend(low_news)
         
+        if self.last_polled is not None:
+            polled_at = time.time()
+            for source in due_sources:
+                self.last_polled[source.url] = polled_at
+        if self.coordinator is not None:
+            self.coordinator.mark_fetched(due_sources)
+        if self.websub is not None and self.session is not None:
+            await self.websub.sync(self.session)
+        
         # 去重和排序
-        unique_news = self._deduplicate(all_news)
+        timings = {}
+        with profiling.stage('_deduplicate'), timed(timings, 'deduplicate'):
+            unique_news = self._deduplicate(all_news)
+        with profiling.stage('_classify'), timed(timings, 'classify'):
+            self._classify(unique_news)
         sorted_news = self._sort_by_importance(unique_news)
         
-        logger.info(f"数据收集完成，共获取 {len(sorted_news)} 条唯一新闻")
+        if self.enrich_top_n:
+            with timed(timings, 'enrich'):
+                await self._enrich(sorted_news)
+                self._rescore_enriched(sorted_news)
+            sorted_news = self._sort_by_importance(sorted_news)
+        
+        logger.info("数据收集完成，共获取 %d 条唯一新闻（%d 个数据源）", len(sorted_news), len(due_sources),
+                    extra={'timings': timings})
         return sorted_news
     
+    async def _enrich(self, news_list: List[NewsItem]):
+        """抓取前 enrich_top_n 条新闻的原文正文"""
+        from content_fetcher import ArticleFetcher
+        
+        if self.session is None:
+            import aiohttp
+            async with aiohttp.ClientSession() as session:
+                await ArticleFetcher(session, time_budget=self.enrich_budget).enrich(news_list, self.enrich_top_n)
+        else:
+            await ArticleFetcher(self.session, time_budget=self.enrich_budget).enrich(news_list, self.enrich_top_n)
+    
+    def _rescore_enriched(self, news_list: List[NewsItem]):
+        """抓取到正文的新闻按正文重新计算关键词和评分（排序前调用）"""
+        sources = {source.name: source for source in self.data_sources}
+        for news in news_list[:self.enrich_top_n]:
+            source = sources.get(news.source)
+            if news.content != news.summary and isinstance(source, RSSDataSource):
+                source.rescore_content(news)
+    
     async def _collect_sources(self, sources: List[DataSource]) -> List[NewsItem]:
         """并发收集指定数据源"""
         tasks = []
         
         for source in sources:
+            source.entry_cache = self.news_cache
+            source.websub = self.websub
             task = asyncio.create_task(source.fetch(self.session))
             tasks.append(task)
             
@@ -549,44 +568,65 @@ class DataCollector:
         news_items = []
         for i, result in enumerate(results):
             if isinstance(result, Exception):
-                logger.error(f"数据源 {sources[i].name} 抓取失败: {result}")
+                logger.error("数据源 %s 抓取失败: %s", sources[i].name, result, extra={'source': sources[i].name})
             elif isinstance(result, list):
                 news_items.extend(result)
         
         return news_items
     
-    def _deduplicate(self, news_list: List[NewsItem]) -> List[NewsItem]:
-        """去除重复新闻（基于URL和标题相似度）"""
+    def _classify(self, news_list: List[NewsItem]):
+        """本地分类模型存在时对本轮全部新闻批量预测类别和情感，否则保留关键词启发式的结果"""
+        from classifier import classify_news
+        
+        changed = classify_news(news_list)
+        if changed:
+            logger.info("本地分类模型改写了 %d 个类别/情感标签", changed)
+    
+    def _deduplicate(self, news_list: List[NewsItem], kept: List[NewsItem] = ()) -> List[NewsItem]:
+        """去除重复新闻（基于规范化URL和标题相似度）；
+        kept 为已去重的新闻（如推送时最近一轮的结果），彼此之间不再比较，返回值中排在最前"""
         from difflib import SequenceMatcher
         
-        seen_urls = set()
-        unique_news = []
+        seen_urls = {canonicalize_url(news.url) for news in kept if news.url}
+        unique_news = list(kept)
+        # 每条已保留新闻对应一个以其标题为 seq2 的匹配器，seq2 的索引只需构建一次
+        title_matchers: Dict[int, SequenceMatcher] = {
+            id(news): SequenceMatcher(None, b=news.title.lower()) for news in kept
+        }
         
-        def is_similar_title(title1: str, title2: str, threshold: float = 0.75) -> bool:
-            """检查两个标题是否相似"""
-            ratio = SequenceMatcher(None, title1.lower(), title2.lower()).ratio()
-            return ratio > threshold
+        def is_similar_title(title: str, existing: NewsItem, threshold: float = 0.75) -> bool:
+            """检查标题是否与已保留新闻的标题相似"""
+            matcher = title_matchers[id(existing)]
+            matcher.set_seq1(title)
+            # 先用廉价的上界快速排除，分片模式下全局去重的条目数可达上万
+            return (matcher.real_quick_ratio() > threshold
+                    and matcher.quick_ratio() > threshold
+                    and matcher.ratio() > threshold)
         
         for news in news_list:
-            # 基于URL去重
-            if news.url and news.url in seen_urls:
+            # 基于规范化URL去重（跟踪参数、http/https、AMP 等差异视为同一URL）
+            canonical_url = canonicalize_url(news.url) if news.url else ''
+            if canonical_url and canonical_url in seen_urls:
                 continue
                 
             # 基于标题相似度去重
+            title = news.title.lower()
             is_duplicate = False
             for existing in unique_news:
-                if is_similar_title(news.title, existing.title):
+                if is_similar_title(title, existing):
                     is_duplicate = True
                     # 保留重要性更高的版本
                     if news.importance_score > existing.importance_score:
                         unique_news.remove(existing)
+                        del title_matchers[id(existing)]
                         is_duplicate = False
                     break
             
             if not is_duplicate:
-                if news.url:
-                    seen_urls.add(news.url)
+                if canonical_url:
+                    seen_urls.add(canonical_url)
                 unique_news.append(news)
+                title_matchers[id(news)] = SequenceMatcher(None, b=title)
         
         return unique_news
     
@@ -597,32 +637,63 @@ class DataCollector:
     def save_to_news_list(self, news_list: List[NewsItem], filename: str = "collected_news.json"):
         """保存到文件"""
         try:
-            news_dicts = [asdict(news) for news in news_list]
-            
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(news_dicts, f, ensure_ascii=False, indent=2)
+            with profiling.stage('save_to_news_list'):
+                # NewsItem 由编解码层直接序列化（orjson 原生支持 dataclass，不经过 asdict）
+                from json_codec import write_path
+                write_path(filename, news_list)
             
-            logger.info(f"数据已保存到 {filename}")
+            logger.info("数据已保存到 %s", filename)
             
         except Exception as e:
-            logger.error(f"保存数据失败: {str(e)}")
+            logger.error("保存数据失败: %s", e)
 
-async def main():
+async def main(workers: int = 1, enrich_top_n: int = 0, enrich_budget: float = 20.0):
     """主函数"""
-    logger.info("开始AI信息聚合数据收集...")
+    from log_pipeline import start_run
     
-    async with DataCollector() as collector:
+    logger.info("开始AI信息聚合数据收集... (运行 %s)", start_run())
+    
+    if workers > 1:
+        from sharded_collector import ShardedCollector
+        collector_context = ShardedCollector(workers)
+    else:
+        collector_context = DataCollector()
+    collector_context.enrich_top_n = enrich_top_n
+    collector_context.enrich_budget = enrich_budget
+    
+    async with collector_context as collector:
         # 收集数据
         news_items = await collector.collect_all()
         
+        # 跨运行故事聚类，写入 story_id / trend_velocity
+        from story_clusters import StoryClusterIndex
+        story_index = StoryClusterIndex.load()
+        story_index.update(news_items)
+        
+        # 增量更新相关文章索引
+        from related_index import RelatedIndex
+        related_index = RelatedIndex.load()
+        related_index.update(news_items)
+        related_index.save()
+        
+        # 累加关键词/信源/类别/情感的时间序列汇总
+        from rollups import RollupStore
+        rollup_store = RollupStore.load()
+        rollup_store.update(news_items)
+        rollup_store.save()
+        
         # 保存数据
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"ai_news_{timestamp}.json"
         collector.save_to_news_list(news_items, filename)
         
+        # 更新 latest_news.json 和预渲染首页
+        from prerender import publish
+        publish(news_items)
+        
         # 输出统计信息
-        logger.info(f"\n数据收集统计:")
-        logger.info(f"总新闻数: {len(news_items)}")
+        logger.info("\n数据收集统计:")
+        logger.info("总新闻数: %d", len(news_items))
         
         # 按类别统计
         categories = {}
@@ -630,18 +701,46 @@ async def main():
             categories[news.category] = categories.get(news.category, 0) + 1
         
         for category, count in categories.items():
-            logger.info(f"{category}: {count} 条")
+            logger.info("%s: %d 条", category, count)
         
         # 按重要性统计
         high_importance = sum(1 for news in news_items if news.importance_score >= 8.0)
-        logger.info(f"高重要性新闻 (>=8.0): {high_importance} 条")
+        logger.info("高重要性新闻 (>=8.0): %d 条", high_importance)
         
         # 显示前5条最重要新闻
-        logger.info(f"\n前5条最重要新闻:")
+        logger.info("\n前5条最重要新闻:")
         for i, news in enumerate(news_items[:5], 1):
-            logger.info(f"{i}. {news.title} (重要性: {news.importance_score:.1f})")
+            logger.info("%d. %s (重要性: %.1f)", i, news.title, news.importance_score)
+        
+        # 显示当前最热的故事
+        logger.info("\n热门故事:")
+        for i, story in enumerate(story_index.trending(limit=5), 1):
+            logger.info("%d. %s (%d 个信源, 热度: %.2f)", i, story.title, len(story.sources), story.trend_score(time.time()))
     
     logger.info("数据收集完成!")
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='AI信息聚合平台数据收集器')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='工作进程数，大于1时按主机分片多进程收集')
+    parser.add_argument('--enrich-top', type=int, default=0,
+                        help='为重要性最高的前N条新闻抓取原文正文')
+    parser.add_argument('--enrich-budget', type=float, default=20.0,
+                        help='原文抓取的时间预算（秒）')
+    parser.add_argument('--profile', nargs='?', const=profiling.DEFAULT_PROFILE_DIR, default=None, metavar='DIR',
+                        help='开启性能剖析，结果写入 DIR（默认 profiles/）')
+    args = parser.parse_args()
+    
+    from log_pipeline import setup_logging
+    setup_logging(log_file=None)
+    if args.profile:
+        profiling.enable()
+        if args.workers > 1:
+            logger.warning("分片模式下只剖析协调进程（合并与去重），工作进程内的抓取和解析不会被记录")
+    try:
+        asyncio.run(main(workers=args.workers, enrich_top_n=args.enrich_top, enrich_budget=args.enrich_budget))
+    finally:
+        if args.profile:
+            profiling.disable().write_report(args.profile)
\ No newline at end of file
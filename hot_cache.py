@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AI信息聚合平台 - 热点条目缓存
+进程内的 LRU + TTL 缓存，以 RSS 条目原始内容的指纹为键，保存规范化后的标题/摘要、
+关键词、情感和评分等派生结果；服务在多次定时运行之间复用同一个缓存，
+内容未变化的条目无需重新清洗和评分。定时收集、手动 /run 和 WebSub 推送在不同线程中共用缓存，
+各操作在缓存自己的锁内完成
+"""
+
+import hashlib
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+DEFAULT_MAX_ITEMS = 5000
+DEFAULT_TTL = 6 * 3600  # 派生结果最长复用 6 小时，之后按当前的评分规则重新计算
+
+
+@dataclass(frozen=True)
+class ParsedEntry:
+    """RSS 条目的派生结果（不含信源权威性加分，该加分随注册表变化，命中后再叠加）"""
+    title: str
+    summary: str
+    keywords: Tuple[str, ...]
+    sentiment: str
+    base_score: float       # 不含时效性加分的基础分，不随时间变化（时效性在使用时按发布时间叠加）
+
+
+def entry_fingerprint(source: str, title: str, url: str, summary: str, published: str) -> str:
+    """条目原始内容的指纹：任何字段变化都视为新条目"""
+    raw = '\x1f'.join((source, title, url, summary, published))
+    return hashlib.md5(raw.encode('utf-8')).hexdigest()
+
+
+def _entry_size(key: str, value) -> int:
+    """单个缓存项的近似内存占用（键、值对象及其字符串字段）"""
+    size = sys.getsizeof(key) + sys.getsizeof(value)
+    if isinstance(value, ParsedEntry):
+        size += sys.getsizeof(value.title) + sys.getsizeof(value.summary) + sys.getsizeof(value.keywords)
+    return size
+
+
+class HotItemCache:
+    """有容量和 TTL 上限的 LRU 缓存（线程安全）"""
+
+    def __init__(self, max_items: int = DEFAULT_MAX_ITEMS, ttl: float = DEFAULT_TTL,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_items = max_items
+        self.ttl = ttl
+        self.clock = clock
+        # 键 -> (过期时间, 值, 近似字节数)，按最近使用顺序排列
+        self._entries: 'OrderedDict[str, Tuple[float, object, int]]' = OrderedDict()
+        self.memory_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        """是否有未过期的缓存项（不计入命中统计，也不调整最近使用顺序；遇到过期项顺带清除）"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False
+            if entry[0] <= self.clock():
+                self._remove(key)
+                self.expirations += 1
+                return False
+            return True
+
+    def get(self, key: str):
+        """命中时返回值并移到最近使用端，未命中或已过期返回 None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] <= self.clock():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, value):
+        """写入或覆盖，超出容量时淘汰最久未使用的条目"""
+        size = _entry_size(key, value)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (self.clock() + self.ttl, value, size)
+            self.memory_bytes += size
+            while len(self._entries) > self.max_items:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def prune(self) -> int:
+        """清除所有已过期的条目，返回清除数量（每轮运行结束时调用，保证内存不随时间增长）"""
+        with self._lock:
+            now = self.clock()
+            expired = [key for key, (expires_at, _, _) in self._entries.items() if expires_at <= now]
+            for key in expired:
+                self._remove(key)
+            self.expirations += len(expired)
+            return len(expired)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.memory_bytes = 0
+
+    def _remove(self, key: str):
+        """调用方需持有 self._lock"""
+        _, _, size = self._entries.pop(key)
+        self.memory_bytes -= size
+
+    def stats(self) -> Dict:
+        """命中率与内存占用统计"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'items': len(self._entries),
+                'max_items': self.max_items,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'memory_kb': round(self.memory_bytes / 1024, 1),
+            }
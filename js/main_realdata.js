@@ -146,7 +146,11 @@ class AIInfoAppRealData {
    * 加载初始数据
    */
   async loadInitialData() {
-    this.showLoading('正在加载最新AI资讯...');
+    // 预渲染页面（prerender.py 生成）已带首屏卡片，数据加载完成前保留，不显示加载状态
+    const prerendered = this.newsContainer.dataset.prerendered === 'true';
+    if (!prerendered) {
+      this.showLoading('正在加载最新AI资讯...');
+    }
     
     try {
       // 初始化数据源管理器并加载数据
@@ -154,7 +158,7 @@ class AIInfoAppRealData {
       
       // 设置数据
       this.allNews = data.news;
-      this.applyFilters();
+      this.applyFilters({ keepContent: prerendered });
       this.hideLoading();
       
       // 显示数据来源信息
@@ -336,9 +340,12 @@ class AIInfoAppRealData {
   
   /**
    * 应用筛选条件
+   * @param {Object} options - keepContent 为 true 时保留当前内容直接替换（用于接管预渲染页面）
    */
-  applyFilters() {
-    this.showLoading('正在筛选资讯...');
+  applyFilters(options = {}) {
+    if (!options.keepContent) {
+      this.showLoading('正在筛选资讯...');
+    }
     
     // 模拟处理延迟
     setTimeout(() => {
@@ -375,7 +382,7 @@ class AIInfoAppRealData {
       this.filteredNews = filtered;
       this.updateDisplay();
       this.hideLoading();
-    }, 300);
+    }, options.keepContent ? 0 : 300);
   }
   
   /**
@@ -6,6 +6,8 @@
 class RealDataLoader {
   constructor() {
     this.realData = null;
+    // 时效衰减参数，由 decay_params.json 覆盖（与 scoring_weights.yaml 的 decay 一致）
+    this.decay = { max_bonus: 1.5, half_life_hours: 24, max_score: 10.0 };
     this.hotNews = [];
     this.stats = {
       totalNews: 0,
@@ -31,6 +33,7 @@ class RealDataLoader {
       ];
 
       let loadedData = null;
+      const decayLoaded = this.loadDecayParams();
       
       for (const filename of realDataFiles) {
         try {
@@ -47,6 +50,7 @@ class RealDataLoader {
 
       if (loadedData && loadedData.length > 0) {
         this.realData = loadedData;
+        await decayLoaded;
         this.processRealData();
         return this.getProcessedData();
       } else {
@@ -60,12 +64,48 @@ class RealDataLoader {
     }
   }
 
+  /**
+   * 加载 prerender.publish 写出的衰减参数，文件不存在时保留默认值
+   */
+  async loadDecayParams() {
+    try {
+      const response = await fetch('decay_params.json');
+      if (response.ok) {
+        this.decay = { ...this.decay, ...(await response.json()) };
+      }
+    } catch (error) {
+      console.log('无法加载衰减参数，使用默认值:', error);
+    }
+  }
+
+  /**
+   * 当前时刻的分数：基础分 + 连续时效衰减加分（与 ranking.py 一致）
+   * @param {Object} item - 含 base_score / published_ts 的新闻
+   * @param {number} now - 当前时间（秒）
+   * @returns {number} 分数
+   */
+  decayedScore(item, now) {
+    const decay = this.decay;
+    let bonus = 0;
+    if (item.published_ts != null) {
+      const hours = Math.max(now - item.published_ts, 0) / 3600;
+      bonus = decay.max_bonus * Math.pow(0.5, hours / decay.half_life_hours);
+    }
+    return Math.min(item.base_score + bonus, decay.max_score);
+  }
+
   /**
    * 处理真实数据，转换为前端需要的格式
    */
   processRealData() {
     if (!this.realData) return;
 
+    // 有基础分的数据按当前时刻重新计算时效衰减后的分数（latest_news.json 中的 importance_score 是写入时刻的值）
+    const now = Date.now() / 1000;
+    this.realData = this.realData.map(item => (
+      item.base_score != null ? { ...item, importance_score: this.decayedScore(item, now) } : item
+    ));
+
     // 转换数据格式，使其与组件期望的字段匹配
     this.realData = this.realData.map(item => ({
       ...item,
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AI信息聚合平台 - JSON 编解码
+快照、latest_news.json 和管理接口的 JSON 读写统一经过这里：安装了 orjson 时自动使用，否则使用标准库 json，
+也可用环境变量 AI_NEWS_JSON_BACKEND=json|orjson 指定。两个后端的输出逐字节一致
+（缩进格式即 json.dump(ensure_ascii=False, indent=2)，紧凑格式不带空格），
+新闻数组可直接解码为 NewsItem，也可以流式逐条读取大数组
+"""
+
+import json
+import os
+import threading
+from datetime import date, datetime
+from functools import lru_cache
+from typing import IO, TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Union
+
+if TYPE_CHECKING:
+    from data_collector import NewsItem
+
+BACKEND_ENV = 'AI_NEWS_JSON_BACKEND'
+STREAM_CHUNK_CHARS = 1 << 20
+
+# orjson 与标准库只在浮点数的写法上不同：标准库对 abs < 1e-4 和 >= 1e16 的数使用科学计数法（1e-05 / 1e+16），
+# orjson 写作 0.00001 / 1e16；输入中有这类数时改用标准库编码
+_PLAIN_FLOAT_MIN = 1e-4
+_PLAIN_FLOAT_MAX = 1e16
+_WHITESPACE = ' \t\n\r'
+
+
+def _has_irregular_float(values) -> bool:
+    """values（及其中嵌套的字典、列表和 dataclass）是否含有两个后端写法不同的浮点数"""
+    for value in values:
+        kind = type(value)
+        if kind is str or kind is int or value is None or kind is bool:
+            continue
+        if isinstance(value, float):
+            if value != 0.0 and not _PLAIN_FLOAT_MIN <= abs(value) < _PLAIN_FLOAT_MAX:
+                return True
+        elif isinstance(value, dict):
+            if _has_irregular_float(value.values()):
+                return True
+        elif isinstance(value, (list, tuple)):
+            if _has_irregular_float(value):
+                return True
+        elif hasattr(value, '__dataclass_fields__'):
+            if _has_irregular_float(vars(value).values()):
+                return True
+    return False
+
+
+class JsonCodecError(ValueError):
+    """指定的 JSON 后端不存在或未安装"""
+
+
+def _default(obj):
+    """两个后端共用的扩展类型处理，保证输出一致"""
+    from dataclasses import asdict, is_dataclass
+
+    if is_dataclass(obj) and not isinstance(obj, type):
+        return asdict(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if hasattr(obj, 'item'):
+        # NumPy 标量
+        return obj.item()
+    if isinstance(obj, float):
+        return float(obj)
+    raise TypeError(f"无法序列化 {type(obj).__name__} 类型的对象")
+
+
+class StdlibCodec:
+    """标准库 json 后端"""
+    name = 'json'
+
+    def dumps(self, obj: Any, indent: bool = False) -> bytes:
+        if indent:
+            text = json.dumps(obj, ensure_ascii=False, indent=2, default=_default)
+        else:
+            text = json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=_default)
+        return text.encode('utf-8')
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return json.loads(data)
+
+    def loads_news(self, data: Union[bytes, str]) -> List['NewsItem']:
+        # object_hook 在解析到每个对象时直接构造 NewsItem
+        return json.loads(data, object_hook=news_from_dict)
+
+
+class OrjsonCodec(StdlibCodec):
+    """orjson 后端：编码结果与标准库一致，orjson 不支持的输入（超出 64 位的整数、NaN 等）回退到标准库"""
+    name = 'orjson'
+
+    def __init__(self):
+        import orjson
+
+        self._orjson = orjson
+        self._options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        self._indent_options = self._options | orjson.OPT_INDENT_2
+
+    def dumps(self, obj: Any, indent: bool = False) -> bytes:
+        if _has_irregular_float((obj,)):
+            return super().dumps(obj, indent)
+        try:
+            return self._orjson.dumps(obj, default=_default, option=self._indent_options if indent else self._options)
+        except self._orjson.JSONEncodeError:
+            return super().dumps(obj, indent)
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        try:
+            return self._orjson.loads(data)
+        except self._orjson.JSONDecodeError:
+            return super().loads(data)
+
+    def loads_news(self, data: Union[bytes, str]) -> List['NewsItem']:
+        return [news_from_dict(item) for item in self.loads(data)]
+
+
+BACKENDS = {'json': StdlibCodec, 'orjson': OrjsonCodec}
+
+
+@lru_cache(maxsize=None)
+def get_codec(name: Optional[str] = None) -> StdlibCodec:
+    """按名称获取后端；name 为空时读取环境变量，都未指定时优先使用 orjson"""
+    name = name or os.environ.get(BACKEND_ENV)
+    if name is None:
+        try:
+            return OrjsonCodec()
+        except ImportError:
+            return StdlibCodec()
+    if name not in BACKENDS:
+        raise JsonCodecError(f"未知的 JSON 后端: {name}（可选: {', '.join(BACKENDS)}）")
+    try:
+        return BACKENDS[name]()
+    except ImportError as e:
+        raise JsonCodecError(f"JSON 后端 {name} 未安装: {e}") from e
+
+
+def available_backends() -> List[str]:
+    """当前环境中可用的后端"""
+    names = []
+    for name in BACKENDS:
+        try:
+            get_codec(name)
+            names.append(name)
+        except JsonCodecError:
+            pass
+    return names
+
+
+@lru_cache(maxsize=1)
+def _news_layout():
+    """NewsItem 的字段名集合和默认值（首次使用时计算）"""
+    from dataclasses import MISSING, fields
+    from data_collector import NewsItem
+
+    names = frozenset(f.name for f in fields(NewsItem))
+    defaults = {f.name: f.default for f in fields(NewsItem) if f.default is not MISSING}
+    return NewsItem, names, defaults
+
+
+def news_from_dict(raw: Dict) -> 'NewsItem':
+    """把解码出的字典直接用作 NewsItem 的实例字典（字段齐全时不复制）；
+    旧快照缺少的字段取默认值，未知字段丢弃，与 NewsItem(**raw) 的结果相等"""
+    cls, names, defaults = _news_layout()
+    if raw.keys() != names:
+        missing = names - raw.keys() - defaults.keys()
+        if missing:
+            raise TypeError(f"新闻缺少字段: {', '.join(sorted(missing))}")
+        raw = {**defaults, **{key: value for key, value in raw.items() if key in names}}
+    if raw['keywords'] is None:
+        raw['keywords'] = []
+    if raw['created_at'] is None:
+        raw['created_at'] = datetime.now().isoformat()
+    item = object.__new__(cls)
+    item.__dict__ = raw
+    return item
+
+
+def dumps(obj: Any, indent: bool = False) -> bytes:
+    return get_codec().dumps(obj, indent)
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    return get_codec().loads(data)
+
+
+def read_path(path: str) -> Any:
+    with open(path, 'rb') as f:
+        return get_codec().loads(f.read())
+
+
+def read_news(path: str) -> List['NewsItem']:
+    """读取新闻数组文件，直接得到 NewsItem 列表"""
+    with open(path, 'rb') as f:
+        return get_codec().loads_news(f.read())
+
+
+def write_path(path: str, obj: Any, indent: bool = True):
+    """原子写入（先写临时文件再替换）；临时文件名含进程号和线程号，同一进程的多个线程同时写入同一文件时互不干扰"""
+    data = get_codec().dumps(obj, indent)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _followed_by_separator(buffer: str, end: int) -> bool:
+    """end 之后的第一个非空白字符是否为逗号或 ]（用于确认末尾的数字没有被块边界截断，如 7.5 读成 7）"""
+    while end < len(buffer):
+        if buffer[end] not in _WHITESPACE:
+            return buffer[end] in ',]'
+        end += 1
+    return False
+
+
+def iter_array(source: Union[str, IO[str]], object_hook: Optional[Callable[[Dict], Any]] = None,
+               chunk_size: int = STREAM_CHUNK_CHARS) -> Iterator[Any]:
+    """流式读取顶层 JSON 数组，逐个产出元素，内存中只保留当前块（标准库 raw_decode，与后端无关）"""
+    if isinstance(source, str):
+        with open(source, 'r', encoding='utf-8') as f:
+            yield from iter_array(f, object_hook, chunk_size)
+        return
+
+    decoder = json.JSONDecoder(object_hook=object_hook)
+    buffer, pos, eof = '', 0, False
+
+    def fill() -> bool:
+        # 丢弃已消费的部分并读入下一块，返回是否读到了新内容
+        nonlocal buffer, pos, eof
+        chunk = source.read(chunk_size) if not eof else ''
+        if not chunk:
+            eof = True
+            return False
+        buffer, pos = buffer[pos:] + chunk, 0
+        return True
+
+    def next_token() -> str:
+        # 跳过空白，返回下一个非空白字符（文件结束时为空串）
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos < len(buffer) or not fill():
+                return buffer[pos:pos + 1]
+
+    if next_token() != '[':
+        raise json.JSONDecodeError("应为 JSON 数组", buffer, pos)
+    pos += 1
+    if next_token() == ']':
+        return
+    while True:
+        try:
+            value, end = decoder.raw_decode(buffer, pos)
+            complete = eof or buffer[end - 1] in '}]"' or _followed_by_separator(buffer, end)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            complete = False
+        if not complete:
+            # 元素跨块（或数字恰好在块末尾被截断），读入下一块后重新解析
+            fill()
+            continue
+        yield value
+        pos = end
+        token = next_token()
+        pos += 1
+        if token == ']':
+            return
+        if token != ',':
+            raise json.JSONDecodeError("数组元素之间应为逗号", buffer, max(pos - 1, 0))
+        next_token()
+
+
+def iter_news(path: str) -> Iterator['NewsItem']:
+    """流式逐条读取新闻数组文件"""
+    return iter_array(path, object_hook=news_from_dict)
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AI信息聚合平台 - 日志流水线
+调用方（事件循环）只负责采样判断并把日志记录放入内存队列，格式化和写文件由后台线程完成：
+- data_collection.log 每行一条 JSON 记录，带本轮运行 ID（run_id）、数据源（source）和各阶段耗时（timings），
+  按大小轮转；控制台保持原来的文本格式
+- 逐源的高频日志（带 source 字段的记录）按级别采样：同一轮中同一数据源要么全部保留、要么全部丢弃，
+  WARNING 及以上级别始终保留；采样率可用环境变量 AI_NEWS_LOG_SAMPLE=INFO=0.5,DEBUG=0 调整
+- 消息使用 %-style 延迟格式化，被采样丢弃的记录不会格式化参数
+"""
+
+import atexit
+import contextlib
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import time
+import uuid
+import zlib
+from datetime import datetime
+from typing import Dict, Optional
+
+DEFAULT_LOG_FILE = 'data_collection.log'
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 5
+SAMPLE_ENV = 'AI_NEWS_LOG_SAMPLE'
+# 逐源日志各级别的保留比例，未列出的级别（WARNING 及以上）全部保留
+DEFAULT_SAMPLE_RATES = {logging.DEBUG: 0.01, logging.INFO: 0.1}
+CONSOLE_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# 当前运行 ID：asyncio 任务创建时复制上下文，同一轮收集中的所有任务共享
+_run_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('run_id', default=None)
+
+_listener: Optional['FormattingListener'] = None
+_queue_handler: Optional['DeferredQueueHandler'] = None
+
+
+def start_run() -> str:
+    """开始新一轮收集，返回并设置本轮的运行 ID"""
+    run_id = f"{datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:6]}"
+    _run_id.set(run_id)
+    return run_id
+
+
+def current_run_id() -> Optional[str]:
+    return _run_id.get()
+
+
+@contextlib.contextmanager
+def timed(timings: Dict[str, float], stage: str):
+    """把代码块的 wall 时间（毫秒）记入 timings[stage]，随日志记录的 timings 字段输出"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = round((time.perf_counter() - started) * 1000, 2)
+
+
+def parse_sample_rates(spec: Optional[str]) -> Dict[int, float]:
+    """解析 INFO=0.5,DEBUG=0 形式的采样率配置（在默认值基础上覆盖）"""
+    rates = dict(DEFAULT_SAMPLE_RATES)
+    for part in (spec or '').split(','):
+        if not part.strip():
+            continue
+        name, _, value = part.partition('=')
+        level = logging.getLevelName(name.strip().upper())
+        if not isinstance(level, int):
+            raise ValueError(f"未知的日志级别: {name}")
+        rate = float(value)
+        if not 0.0 <= rate <= 1.0:
+            raise ValueError(f"采样率应在 0 到 1 之间: {part}")
+        rates[level] = rate
+    return rates
+
+
+class SourceSampler(logging.Filter):
+    """逐源日志的按级别采样：按 (run_id, source) 的哈希决定保留与否，保证同一源的日志完整"""
+
+    def __init__(self, rates: Optional[Dict[int, float]] = None):
+        super().__init__()
+        self.rates = DEFAULT_SAMPLE_RATES if rates is None else rates
+        self.dropped = 0
+
+    def keep(self, source: str, level: int, run_id: Optional[str]) -> bool:
+        rate = self.rates.get(level, 1.0)
+        if rate >= 1.0:
+            return True
+        if rate <= 0.0:
+            return False
+        return zlib.crc32(f"{run_id}|{source}".encode('utf-8')) < rate * 0x100000000
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.run_id = _run_id.get()
+        source = getattr(record, 'source', None)
+        if source is None or self.keep(source, record.levelno, record.run_id):
+            return True
+        self.dropped += 1
+        return False
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """只入队、不格式化的 QueueHandler（标准实现在调用方线程中格式化消息）；
+    fork 出的子进程中没有写线程，直接交给写线程的处理器同步输出"""
+
+    def __init__(self, log_queue, listener: 'FormattingListener'):
+        super().__init__(log_queue)
+        self.listener = listener
+        self.pid = os.getpid()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 参数在写线程中格式化：调用方传入的参数在记录写出前不应再修改
+        return record
+
+    def emit(self, record: logging.LogRecord):
+        if os.getpid() != self.pid:
+            self.listener.handle(record)
+        else:
+            super().emit(record)
+
+
+class FormattingListener(logging.handlers.QueueListener):
+    """写线程：取出记录后先合并一次消息参数，之后各处理器（轮转判断、文件、控制台）不再重复格式化参数"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """每条记录一行 JSON：ts、level、logger、msg，以及存在时的 run_id、source、timings、exc"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        # RotatingFileHandler 判断轮转和写出时各格式化一次，结果缓存在记录上
+        line = getattr(record, '_json_line', None)
+        if line is None:
+            line = record._json_line = self._render(record)
+        return line
+
+    def _render(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key in ('run_id', 'source', 'timings'):
+            value = getattr(record, key, None)
+            if value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def setup_logging(log_file: Optional[str] = DEFAULT_LOG_FILE, level: int = logging.INFO,
+                  sample_rates: Optional[Dict[int, float]] = None, console: bool = True,
+                  max_bytes: int = DEFAULT_MAX_BYTES, backup_count: int = DEFAULT_BACKUP_COUNT
+                  ) -> DeferredQueueHandler:
+    """把根日志器改为队列 + 后台写线程（替换已有的处理器），重复调用时先停止上一次的写线程"""
+    global _listener, _queue_handler
+    shutdown_logging()
+    if sample_rates is None:
+        sample_rates = parse_sample_rates(os.environ.get(SAMPLE_ENV))
+
+    handlers = []
+    if log_file:
+        file_handler = logging.handlers.RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count,
+                                                            encoding='utf-8')
+        file_handler.setFormatter(JsonFormatter())
+        handlers.append(file_handler)
+    if console:
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+        handlers.append(console_handler)
+
+    log_queue = queue.SimpleQueue()
+    _listener = FormattingListener(log_queue, *handlers, respect_handler_level=True)
+    _queue_handler = DeferredQueueHandler(log_queue, _listener)
+    _queue_handler.addFilter(SourceSampler(sample_rates))
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(_queue_handler)
+    root.setLevel(level)
+    _listener.start()
+    return _queue_handler
+
+
+def shutdown_logging():
+    """写出队列中剩余的记录，停止写线程并关闭文件（根日志器上的队列处理器一并移除）"""
+    global _listener, _queue_handler
+    if _listener is None:
+        return
+    if _queue_handler.pid == os.getpid():
+        _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    logging.getLogger().removeHandler(_queue_handler)
+    _listener = _queue_handler = None
+
+
+atexit.register(shutdown_logging)
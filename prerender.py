@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AI信息聚合平台 - 静态预渲染
+每轮收集后以 index_realdata.html 为模板生成 index_prerendered.html：
+重要性最高的新闻卡片、今日热点和统计数字直接写进 HTML，首屏无需等待 JS 拉取和处理 JSON；
+完整数据仍由 realDataLoader.js 从 latest_news.json 延迟加载。
+模板只在文件变化时重新解析，渲染 1000 条新闻只需几毫秒
+"""
+
+import heapq
+import html
+import logging
+import os
+import re
+import sys
+from dataclasses import asdict, is_dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from scoring import parse_published
+
+logger = logging.getLogger(__name__)
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_TEMPLATE_PATH = os.path.join(PROJECT_DIR, 'index_realdata.html')
+DEFAULT_OUTPUT_PATH = os.path.join(PROJECT_DIR, 'index_prerendered.html')
+LATEST_DATA_PATH = os.path.join(PROJECT_DIR, 'latest_news.json')
+DECAY_PARAMS_PATH = os.path.join(PROJECT_DIR, 'decay_params.json')  # 前端重新计算分数用的衰减参数
+
+TOP_STORIES = 10   # 与前端每页条数一致，JS 接管后首屏内容不变
+HOT_ITEMS = 5
+HIGH_IMPACT = 8.0
+
+# 以下映射与 js/realDataLoader.js、data/mockData.js 保持一致
+SENTIMENTS = {'positive': ('😊', '积极'), 'neutral': ('😐', '中性'), 'negative': ('😞', '消极')}
+SOURCE_ICONS = {
+    'TechCrunch AI': 'https://techcrunch.com/wp-content/uploads/2015/02/cropped-cropped-favicon-gradient.png',
+    'MIT Technology Review': 'https://wp.technologyreview.com/wp-content/uploads/2018/06/favicon-gradient.png',
+    'DeepMind Blog': 'https://deepmind.google/discover/wp-content/uploads/2019/06/favicon.png',
+    'AI News': 'https://artificialintelligence-news.com/wp-content/uploads/2020/06/favicon.png',
+}
+DEFAULT_ICON = ('data:image/svg+xml;base64,PHN2ZyB3aWR0aD0iMTYiIGhlaWdodD0iMTYiIHZpZXdCb3g9IjAgMCAxNiAxNiIgZmlsbD0ibm9uZSIgeG1sbnM9Imh0dHA6Ly93d3cudzMub3JnLzIwMDAvc3ZnIj4KPHJlY3Qgd2lkdGg9IjE2IiBoZWlnaHQ9IjE2IiByeD0iMiIgZmlsbD0iI0Y1RjlGQiIvPgo8dGV4dCB4PSI4IiB5PSI4LjUiIGZvbnQtZmFtaWx5PSJBcmlhbCIgZm9udC1zaXplPSI4IiBmb250LXdlaWdodD0iYm9sZCIgZmlsbD0iI0Y4RkFGQyIgdGV4dC1hbmNob3I9Im1pZGRsZSI+RzwvdGV4dD4KPC9zdmc+')
+TREND_UP_ICON = ('<svg class="trend-icon" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2">'
+                 '<polyline points="23 6 13.5 15.5 8.5 10.5 1 18"></polyline><polyline points="17 6 23 6 23 12"></polyline></svg>')
+
+# 卡片结构与 components.js 中 NewsCard.render() 一致（预渲染卡片不加 fade-in-up 动画，避免首屏延迟）
+CARD_TEMPLATE = (
+    '<div class="news-card" data-id="{id}" onclick="window.open(this.dataset.url, \'_blank\')" data-url="{url}">'
+    '<div class="card-header"><div class="source-info">'
+    '<img src="{icon}" alt="{source}" class="source-icon" loading="lazy">'
+    '<span class="source-name">{source}</span><span class="publish-time">{publish_time}</span></div>'
+    '<div class="importance-badge {level}"><span class="importance-score">{score:.1f}</span>{badges}</div></div>'
+    '<h3 class="card-title">{title}</h3>'
+    '<p class="card-summary">{summary}</p>'
+    '<div class="card-footer">{keywords}'
+    '<div class="sentiment-tag {sentiment}"><span>{sentiment_icon}</span><span>{sentiment_label}</span></div></div>'
+    '</div>'
+)
+HOT_ITEM_TEMPLATE = (
+    '<div class="hot-item" data-id="{id}"><div class="hot-rank{top}">{rank}</div>'
+    '<div class="hot-title">{title}</div><div class="hot-trend">' + TREND_UP_ICON + '<span>{trend}</span></div></div>'
+)
+
+# 模板中需要填充的位置：名称 -> (保留的前缀, 被替换的占位内容)
+SLOTS = {
+    'preload': (r'</title>', r''),
+    'news': (r'<div id="newsContainer" class="news-container"', r'>.*?(?=</div>)'),
+    'hot': (r'<div class="hot-list" id="hotList">', r'.*?(?=</div>)'),
+    'total': (r'<div class="stat-number" id="totalNews">', r'-'),
+    'high': (r'<div class="stat-number" id="highImpact">', r'-'),
+    'sources': (r'<div class="stat-number" id="dataSources">', r'-'),
+    'count_all': (r'<button class="filter-pill active" data-category="all">\s*全部资讯\s*<span class="count">', r'-'),
+    'updated': (r'<span class="last-update" id="lastUpdate">', r'加载中\.\.\.'),
+    'defer': (r'<script src="[^"]+"', r''),
+}
+_SLOT_PATTERN = re.compile('|'.join(f'(?P<{name}>{prefix}){placeholder}' for name, (prefix, placeholder) in SLOTS.items()),
+                           re.DOTALL)
+
+
+@lru_cache(maxsize=4)
+def _compile_template(path: str, mtime: float) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """把模板切成静态片段和填充位置：渲染时 static[0] + slot[0] + static[1] + ...（按修改时间缓存）"""
+    with open(path, 'r', encoding='utf-8') as f:
+        template = f.read()
+    static, slots = [], []
+    position = 0
+    for match in _SLOT_PATTERN.finditer(template):
+        static.append(template[position:match.end(match.lastgroup)])
+        slots.append(match.lastgroup)
+        position = match.end()
+    static.append(template[position:])
+    missing = set(SLOTS) - set(slots)
+    if missing:
+        raise ValueError(f"模板 {path} 缺少预渲染位置: {', '.join(sorted(missing))}")
+    return tuple(static), tuple(slots)
+
+
+def load_template(path: str = DEFAULT_TEMPLATE_PATH) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    return _compile_template(path, os.path.getmtime(path))
+
+
+def _relative_time(published: Optional[str], now: datetime) -> Tuple[str, bool]:
+    """与 realDataLoader.formatTime / isNewNews 相同的相对时间文字，以及是否为 24 小时内的新闻"""
+    pub_time = parse_published(published) if published else None
+    if pub_time is None:
+        return '刚刚', False
+    reference = now.astimezone(pub_time.tzinfo) if pub_time.tzinfo else now
+    minutes = int((reference - pub_time).total_seconds() // 60)
+    if minutes < 60:
+        text = f"{minutes}分钟前"
+    elif minutes < 24 * 60:
+        text = f"{minutes // 60}小时前"
+    elif minutes < 7 * 24 * 60:
+        text = f"{minutes // (24 * 60)}天前"
+    else:
+        text = f"{pub_time.year}/{pub_time.month}/{pub_time.day}"
+    return text, minutes < 24 * 60
+
+
+def _importance_level(score: float) -> str:
+    if score >= 8.5:
+        return 'high'
+    return 'medium' if score >= 7.0 else 'low'
+
+
+def render_card(item: Dict, now: datetime) -> str:
+    escape = html.escape
+    score = item.get('importance_score') or 5.0
+    publish_time, is_new = _relative_time(item.get('published_date'), now)
+    badges = ('<span class="badge new">NEW</span>' if is_new else '') + \
+             ('<span class="badge trending">HOT</span>' if score >= HIGH_IMPACT else '')
+    sentiment = item.get('sentiment') if item.get('sentiment') in SENTIMENTS else 'neutral'
+    icon, label = SENTIMENTS[sentiment]
+    keywords = ''.join(f'<span class="keyword-tag" data-keyword="{escape(k)}">{escape(k)}</span>'
+                       for k in item.get('keywords') or [])
+    return CARD_TEMPLATE.format(
+        id=escape(str(item.get('id', ''))), url=escape(item.get('url') or ''),
+        icon=SOURCE_ICONS.get(item.get('source'), DEFAULT_ICON), source=escape(item.get('source') or ''),
+        publish_time=publish_time, level=_importance_level(score), score=score, badges=badges,
+        title=escape(item.get('title') or ''), summary=escape(item.get('summary') or ''),
+        keywords=keywords, sentiment=sentiment, sentiment_icon=icon, sentiment_label=label,
+    )
+
+
+def _trend_value(score: float) -> str:
+    if score >= 9.0:
+        return '+25%'
+    if score >= 8.0:
+        return '+15%'
+    return '+10%' if score >= 7.0 else '+5%'
+
+
+def render_hot_item(item: Dict, rank: int) -> str:
+    title = item.get('title') or ''
+    if len(title) > 30:
+        title = title[:30] + '...'
+    return HOT_ITEM_TEMPLATE.format(id=html.escape(str(item.get('id', ''))), top=' top-3' if rank <= 3 else '',
+                                    rank=rank, title=html.escape(title),
+                                    trend=_trend_value(item.get('importance_score') or 0.0))
+
+
+def render_page(news: Sequence[Dict], now: Optional[datetime] = None,
+                template_path: str = DEFAULT_TEMPLATE_PATH) -> str:
+    """渲染预渲染页面（news 为新闻字典列表，顺序任意）"""
+    now = now or datetime.now()
+    static, slots = load_template(template_path)
+    score = lambda item: item.get('importance_score') or 0.0
+    top = heapq.nlargest(max(TOP_STORIES, HOT_ITEMS), news, key=score)
+
+    cards = ''.join(render_card(item, now) for item in top[:TOP_STORIES])
+    fragments = {
+        'preload': '\n    <link rel="preload" href="latest_news.json" as="fetch" crossorigin>',
+        'news': ' data-prerendered="true">' + cards,
+        'hot': ''.join(render_hot_item(item, rank) for rank, item in enumerate(top[:HOT_ITEMS], 1)),
+        'total': str(len(news)),
+        'high': str(sum(1 for item in news if score(item) >= HIGH_IMPACT)),
+        'sources': str(len({item.get('source') for item in news})),
+        'count_all': str(len(news)),
+        'updated': f"更新于 {now.strftime('%Y-%m-%d %H:%M')}",
+        'defer': ' defer',
+    }
+    parts = [static[0]]
+    for name, chunk in zip(slots, static[1:]):
+        parts.append(fragments[name])
+        parts.append(chunk)
+    return ''.join(parts)
+
+
+def write_page(news: Sequence[Dict], output_path: str = DEFAULT_OUTPUT_PATH,
+               template_path: str = DEFAULT_TEMPLATE_PATH, now: Optional[datetime] = None) -> str:
+    """渲染并原子写入页面，返回输出路径"""
+    page = render_page(news, now, template_path)
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(page)
+    os.replace(tmp_path, output_path)
+    return output_path
+
+
+def publish(news_list: Sequence, directory: str = PROJECT_DIR) -> Optional[str]:
+    """收集完成后调用：更新 latest_news.json 并重新生成预渲染页面（按写入时刻的衰减分数排序）；
+    衰减参数另存为 decay_params.json，前端据此按浏览器当前时间重新计算分数，不需要在 JS 中另行维护"""
+    from json_codec import write_path
+    from ranking import decay_params, rank_news
+    from snapshots import save_snapshot
+
+    try:
+        news = rank_news([asdict(item) if is_dataclass(item) else item for item in news_list])
+        save_snapshot(os.path.join(directory, os.path.basename(LATEST_DATA_PATH)), news)
+        write_path(os.path.join(directory, os.path.basename(DECAY_PARAMS_PATH)), decay_params())
+        path = write_page(news, os.path.join(directory, os.path.basename(DEFAULT_OUTPUT_PATH)))
+        logger.info("预渲染页面已更新: %s", path)
+        return path
+    except Exception as e:
+        # 页面生成失败不影响本轮收集结果
+        logger.error("生成预渲染页面失败: %s", e)
+        return None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+    from snapshots import load_snapshot
+
+    parser = argparse.ArgumentParser(description='从 latest_news.json 生成预渲染页面')
+    parser.add_argument('--input', default=LATEST_DATA_PATH, help='新闻数据文件')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT_PATH, help='输出页面路径')
+    args = parser.parse_args(argv)
+
+    path = write_page(load_snapshot(args.input), args.output)
+    print(f"✅ 已生成 {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AI信息聚合平台 - 性能剖析
+为收集流水线的各阶段（fetch、parse、_parse_rss_entry、_deduplicate、save_to_news_list）
+记录 cProfile、tracemalloc 和 wall/CPU 时间，输出火焰图用的折叠栈文件和按耗时排序的文本摘要。
+未开启时 stage()/span() 直接返回共享的空上下文，不做任何计时；
+cProfile / pstats / tracemalloc 只在开启剖析后才导入
+"""
+
+import contextlib
+import logging
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import cProfile
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILE_DIR = 'profiles'
+
+# 未开启剖析时所有钩子共用的空上下文
+NULL_STAGE = contextlib.nullcontext()
+
+_active: Optional['Profiler'] = None
+
+
+def stage(name: str, source: Optional[str] = None):
+    """同步阶段钩子：记录 cProfile、内存分配、wall 和 CPU 时间（阶段内不能有 await）"""
+    if _active is None:
+        return NULL_STAGE
+    return _active.stage(name, source)
+
+
+def span(name: str, source: Optional[str] = None):
+    """异步安全的钩子：只记录 wall 时间，用于包含 await 的网络等待"""
+    if _active is None:
+        return NULL_STAGE
+    return _active.span(name, source)
+
+
+def enable() -> 'Profiler':
+    """开启全局剖析"""
+    global _active
+    if _active is None:
+        _active = Profiler()
+        _active.start()
+    return _active
+
+
+def disable() -> Optional['Profiler']:
+    """关闭全局剖析，返回已停止的剖析器"""
+    global _active
+    profiler, _active = _active, None
+    if profiler is not None:
+        profiler.stop()
+    return profiler
+
+
+@dataclass
+class StageStats:
+    """单个阶段的累计数据"""
+    calls: int = 0
+    wall: float = 0.0
+    cpu: float = 0.0
+    alloc_net: int = 0
+    alloc_peak: int = 0
+
+
+@dataclass
+class SourceStats:
+    """单个数据源的累计数据"""
+    wall: float = 0.0       # 整个抓取过程的 wall 时间
+    network: float = 0.0    # 其中等待网络的 wall 时间
+    cpu: float = 0.0        # 各同步阶段的 CPU 时间
+
+
+class Profiler:
+    """流水线剖析器"""
+
+    def __init__(self):
+        self.stages: Dict[str, StageStats] = {}
+        self.sources: Dict[str, SourceStats] = {}
+        self.profiles: Dict[str, 'cProfile.Profile'] = {}
+        self._stack: List['cProfile.Profile'] = []
+        self._started_tracemalloc = False
+        self._memory_snapshot = None
+        self.wall = self.cpu = 0.0
+
+    def start(self):
+        import tracemalloc
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+
+    def stop(self):
+        import tracemalloc
+
+        self.wall = time.perf_counter() - self._wall_start
+        self.cpu = time.process_time() - self._cpu_start
+        if tracemalloc.is_tracing():
+            self._memory_snapshot = tracemalloc.take_snapshot()
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+
+    @contextlib.contextmanager
+    def stage(self, name: str, source: Optional[str] = None):
+        import cProfile
+        import tracemalloc
+
+        # 同一时刻只能有一个 cProfile 生效：嵌套阶段期间暂停外层阶段，各阶段的函数统计互不包含
+        profile = self.profiles.setdefault(name, cProfile.Profile())
+        if self._stack:
+            self._stack[-1].disable()
+        self._stack.append(profile)
+        memory_before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            wall = time.perf_counter() - wall_start
+            cpu = time.thread_time() - cpu_start
+            memory_after, memory_peak = tracemalloc.get_traced_memory()
+            self._stack.pop()
+            if self._stack:
+                self._stack[-1].enable()
+
+            stats = self.stages.setdefault(name, StageStats())
+            stats.calls += 1
+            stats.wall += wall
+            stats.cpu += cpu
+            stats.alloc_net += memory_after - memory_before
+            stats.alloc_peak = max(stats.alloc_peak, memory_peak - memory_before)
+            # 只把最外层阶段的 CPU 计入数据源，避免嵌套阶段重复累计
+            if source is not None and not self._stack:
+                self.sources.setdefault(source, SourceStats()).cpu += cpu
+
+    @contextlib.contextmanager
+    def span(self, name: str, source: Optional[str] = None):
+        wall_start = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            stats = self.stages.setdefault(name, StageStats())
+            stats.calls += 1
+            stats.wall += wall
+            if source is not None:
+                source_stats = self.sources.setdefault(source, SourceStats())
+                if name == 'source':
+                    source_stats.wall += wall
+                else:
+                    source_stats.network += wall
+
+    def collapsed_stacks(self) -> List[str]:
+        """把各阶段的 cProfile 调用图展开成折叠栈（单位：微秒）"""
+        import pstats
+
+        lines = []
+        for stage_name, profile in self.profiles.items():
+            if not profile.getstats():
+                continue
+            stats = pstats.Stats(profile).stats
+            callees: Dict[Tuple, List[Tuple[Tuple, float]]] = {}
+            for func, (_, _, _, _, callers) in stats.items():
+                for caller, edge in callers.items():
+                    callees.setdefault(caller, []).append((func, edge[3]))
+
+            def walk(func, path, scale, depth):
+                _, _, self_time, total_time, _ = stats[func]
+                frames = f"{path};{_frame_label(func)}"
+                micros = int(self_time * scale * 1e6)
+                if micros > 0:
+                    lines.append(f"{frames} {micros}")
+                if depth >= 64:
+                    return
+                for callee, edge_time in callees.get(func, ()):
+                    callee_total = stats[callee][3]
+                    if callee_total <= 0 or f";{_frame_label(callee)};" in f"{frames};":
+                        continue
+                    child_scale = scale * edge_time / callee_total
+                    if child_scale * callee_total >= 1e-6:
+                        walk(callee, frames, child_scale, depth + 1)
+
+            roots = [func for func, (_, _, _, _, callers) in stats.items()
+                     if not any(caller in stats for caller in callers) and not _is_hook_frame(func)]
+            for root in roots:
+                walk(root, stage_name, 1.0, 0)
+        return lines
+
+    def summary(self, top_functions: int = 15) -> str:
+        """按耗时排序的文本摘要"""
+        import pstats
+
+        out = [
+            "# 性能剖析摘要",
+            f"总耗时: wall {self.wall:.3f} s, CPU {self.cpu:.3f} s",
+            "",
+            "## 阶段（按 wall 排序；同步阶段的 wall/CPU 包含嵌套的子阶段，网络阶段只有 wall）",
+            f"{'阶段':<20} {'次数':>6} {'wall(s)':>9} {'CPU(s)':>9} {'净分配KB':>10} {'峰值KB':>9}",
+        ]
+        for name, stats in sorted(self.stages.items(), key=lambda kv: kv[1].wall, reverse=True):
+            out.append(f"{name:<20} {stats.calls:>6} {stats.wall:>9.3f} {stats.cpu:>9.3f} "
+                       f"{stats.alloc_net / 1024:>10.1f} {stats.alloc_peak / 1024:>9.1f}")
+
+        out += ["", "## 数据源（按 wall 排序）",
+                f"{'数据源':<28} {'wall(s)':>9} {'网络(s)':>9} {'CPU(s)':>9}"]
+        for name, stats in sorted(self.sources.items(), key=lambda kv: kv[1].wall, reverse=True):
+            out.append(f"{name:<28} {stats.wall:>9.3f} {stats.network:>9.3f} {stats.cpu:>9.3f}")
+
+        out += ["", "## 各阶段耗时最多的函数（cProfile tottime，不含嵌套子阶段）"]
+        for name, profile in self.profiles.items():
+            if not profile.getstats():
+                continue
+            stats = pstats.Stats(profile).stats
+            ranked = sorted(((func, row) for func, row in stats.items() if not _is_hook_frame(func)),
+                            key=lambda kv: kv[1][2], reverse=True)[:top_functions]
+            out += ["", f"### {name}", f"{'tottime':>9} {'cumtime':>9} {'calls':>8}  函数"]
+            for func, (_, calls, self_time, total_time, _) in ranked:
+                out.append(f"{self_time:>9.4f} {total_time:>9.4f} {calls:>8}  {_frame_label(func)}")
+
+        if self._memory_snapshot is not None:
+            out += ["", "## 内存分配最多的代码行（tracemalloc）"]
+            for stat in self._memory_snapshot.statistics('lineno')[:top_functions]:
+                frame = stat.traceback[0]
+                out.append(f"{stat.size / 1024:>9.1f} KB {stat.count:>8}  {os.path.basename(frame.filename)}:{frame.lineno}")
+        return "\n".join(out) + "\n"
+
+    def write_report(self, directory: str = DEFAULT_PROFILE_DIR) -> Tuple[str, str]:
+        """写出折叠栈文件和文本摘要，返回两个文件路径"""
+        os.makedirs(directory, exist_ok=True)
+        prefix = os.path.join(directory, f"profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        collapsed_path, summary_path = f"{prefix}.collapsed", f"{prefix}.txt"
+        with open(collapsed_path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(self.collapsed_stacks()) + "\n")
+        with open(summary_path, 'w', encoding='utf-8') as f:
+            f.write(self.summary())
+        logger.info("性能剖析结果已写入 %s 和 %s", summary_path, collapsed_path)
+        return collapsed_path, summary_path
+
+
+def _is_hook_frame(func: Tuple[str, int, str]) -> bool:
+    """钩子自身（contextlib 的 __exit__ 和本模块）退出时留下的帧，不计入结果"""
+    filename = func[0]
+    return filename in (__file__, contextlib.__file__) or func[2] == "<method 'disable' of '_lsprof.Profiler' objects>"
+
+
+def _frame_label(func: Tuple[str, int, str]) -> str:
+    """折叠栈中的帧名（分号是折叠栈的分隔符，需要替换掉）"""
+    filename, lineno, name = func
+    if filename == '~':
+        label = name
+    else:
+        label = f"{name} ({os.path.basename(filename)}:{lineno})"
+    return label.replace(';', ',')
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AI信息聚合平台 - 读取时排序
+收集时只存储不随时间变化的基础分（base_score，含信源权威性加分）和发布时间戳（published_ts），
+时效性在读取时按连续衰减叠加：分数 = min(基础分 + max_bonus × 0.5 ^ (发布后小时数 / half_life), 上限)。
+两列预先整理成 NumPy 数组，任意时刻取前 K 条只需一次向量化计算加部分排序，1 万条不到 1 毫秒；
+importance_score 作为兼容字段，在输出时替换为当前时刻的分数
+"""
+
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from scoring import (ScoringWeights, _parse_created_at, default_weights, hours_since, published_timestamp,
+                     recency_bonus)
+
+
+def item_base_and_timestamp(item: Dict, weights: ScoringWeights) -> Tuple[float, Optional[float]]:
+    """新闻字典的 (基础分, 发布时间戳)；旧快照没有 base_score 时，从 importance_score 中扣除收集时的时效性档位加分"""
+    if item.get('base_score') is not None:
+        return float(item['base_score']), item.get('published_ts')
+    published = item.get('published_date')
+    hours = hours_since(published, _parse_created_at(item.get('created_at')))
+    return float(item.get('importance_score') or 0.0) - recency_bonus(weights, hours), published_timestamp(published)
+
+
+def decay_params(weights: Optional[ScoringWeights] = None) -> Dict[str, float]:
+    """前端按浏览器当前时间重新计算分数所需的参数，由 prerender.publish 写入 decay_params.json（字段名同 scoring_weights.yaml）"""
+    weights = weights or default_weights()
+    return {'max_bonus': weights.decay_max_bonus, 'half_life_hours': weights.decay_half_life,
+            'max_score': weights.max_score}
+
+
+class DecayRanker:
+    """一组新闻的读取时排序器（items 为新闻字典列表，构建后不可修改）"""
+
+    def __init__(self, items: Sequence[Dict], weights: Optional[ScoringWeights] = None):
+        weights = weights or default_weights()
+        self.items = items
+        self.max_bonus = weights.decay_max_bonus
+        self.max_score = weights.max_score
+        self._half_life_seconds = weights.decay_half_life * 3600
+        pairs = [item_base_and_timestamp(item, weights) for item in items]
+        self.base = np.fromiter((base for base, _ in pairs), dtype=np.float64, count=len(pairs))
+        # 发布时间换算成“半衰期个数”，没有发布时间的条目为 -inf（衰减加分为 0）
+        self._half_lives = np.fromiter((ts if ts is not None else -np.inf for _, ts in pairs),
+                                       dtype=np.float64, count=len(pairs)) / self._half_life_seconds
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def scores(self, now: Optional[float] = None) -> np.ndarray:
+        """now 时刻（默认当前时间）每条新闻的分数；发布时间晚于 now 的按刚发布计算"""
+        now = time.time() if now is None else now
+        elapsed = np.minimum(self._half_lives - now / self._half_life_seconds, 0.0)
+        return np.minimum(self.base + self.max_bonus * np.exp2(elapsed), self.max_score)
+
+    def top_indices(self, k: int, now: Optional[float] = None) -> np.ndarray:
+        """now 时刻分数最高的 k 条的下标（按分数降序）"""
+        return self._select(self.scores(now), k)
+
+    @staticmethod
+    def _select(scores: np.ndarray, k: int) -> np.ndarray:
+        """先部分排序选出 k 条，只对这 k 条完整排序"""
+        if k <= 0:
+            return np.zeros(0, dtype=np.intp)
+        if k >= len(scores):
+            return np.argsort(-scores, kind='stable')
+        selected = np.argpartition(-scores, k - 1)[:k]
+        return selected[np.argsort(-scores[selected], kind='stable')]
+
+    def top(self, k: Optional[int] = None, now: Optional[float] = None) -> List[Dict]:
+        """now 时刻的前 k 条（默认全部）新闻，返回副本，importance_score 替换为当时的分数"""
+        scores = self.scores(now)
+        k = len(scores) if k is None else k
+        return [{**self.items[i], 'importance_score': float(scores[i])} for i in self._select(scores, k)]
+
+
+def rank_news(news: Sequence[Dict], k: Optional[int] = None, now: Optional[float] = None) -> List[Dict]:
+    """一次性排序（不复用数组时使用）"""
+    return DecayRanker(news).top(k, now)
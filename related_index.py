@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AI信息聚合平台 - 相关文章索引
+对标题和摘要建立哈希 TF-IDF 稀疏向量，分块稀疏矩阵乘法预计算每条新闻的 top-k 相关文章，
+结果写入紧凑的 npz 文件；每轮收集后只对新条目增量计算
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from story_clusters import tokenize
+
+logger = logging.getLogger(__name__)
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_INDEX_PATH = os.path.join(PROJECT_DIR, 'related_index.npz')
+
+FEATURE_BITS = 18        # 哈希特征空间 2^18，无需维护词表
+TOP_K = 10
+MIN_SIMILARITY = 0.1     # 低于该余弦相似度的不视为相关
+BLOCK_ROWS = 1024        # 全量重建时每块的行数，控制稠密相似度块的内存
+
+
+def _term_counts(title: str, summary: str) -> Dict[int, int]:
+    """标题和摘要的哈希词频"""
+    mask = (1 << FEATURE_BITS) - 1
+    counts: Dict[int, int] = {}
+    for token in tokenize(f"{title} {summary or ''}"):
+        feature = zlib.crc32(token.encode('utf-8')) & mask
+        counts[feature] = counts.get(feature, 0) + 1
+    return counts
+
+
+def _tf_matrix(rows: List[Dict[int, int]]):
+    """词频字典列表 -> CSR 词频矩阵"""
+    import numpy as np
+    from scipy import sparse
+
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum([len(r) for r in rows], out=indptr[1:])
+    indices = np.fromiter((f for r in rows for f in r), dtype=np.int32, count=indptr[-1])
+    data = np.fromiter((c for r in rows for c in r.values()), dtype=np.float32, count=indptr[-1])
+    return sparse.csr_matrix((data, indices, indptr), shape=(len(rows), 1 << FEATURE_BITS))
+
+
+class RelatedIndex:
+    """相关文章索引"""
+
+    def __init__(self, path: Optional[str] = DEFAULT_INDEX_PATH, top_k: int = TOP_K):
+        import numpy as np
+
+        self.np = np
+        self.path = path
+        self.top_k = top_k
+        self.ids: List[str] = []
+        self.positions: Dict[str, int] = {}
+        self.tf = _tf_matrix([])
+        self.df = np.zeros(1 << FEATURE_BITS, dtype=np.int32)
+        self.neighbors = np.full((0, top_k), -1, dtype=np.int32)
+        self.scores = np.zeros((0, top_k), dtype=np.float32)
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_INDEX_PATH) -> 'RelatedIndex':
+        """加载索引文件，不存在时返回空索引"""
+        import numpy as np
+        from scipy import sparse
+
+        if not os.path.exists(path):
+            return cls(path)
+        with np.load(path) as data:
+            index = cls(path, top_k=data['neighbors'].shape[1])
+            index.ids = data['ids'].tolist()
+            index.tf = sparse.csr_matrix((data['tf_data'], data['tf_indices'], data['tf_indptr']),
+                                         shape=(len(index.ids), 1 << FEATURE_BITS))
+            index.neighbors = data['neighbors']
+            index.scores = data['scores'].astype(np.float32)
+        index.positions = {news_id: i for i, news_id in enumerate(index.ids)}
+        # 文档频率可由词频矩阵直接还原，无需单独存储
+        index.df = np.bincount(index.tf.indices, minlength=1 << FEATURE_BITS).astype(np.int32)
+        return index
+
+    def save(self, path: Optional[str] = None):
+        """原子写入 npz（相似度以 float16 存储）"""
+        np = self.np
+        path = path or self.path
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            ids=np.array(self.ids, dtype=str),
+            tf_data=self.tf.data.astype(np.uint16),
+            tf_indices=self.tf.indices.astype(np.int32),
+            tf_indptr=self.tf.indptr.astype(np.int64),
+            neighbors=self.neighbors,
+            scores=self.scores.astype(np.float16),
+        )
+        os.replace(tmp_path, path)
+
+    def _weighted(self, tf):
+        """词频矩阵 -> L2 归一化的 TF-IDF 矩阵（对数词频，平滑 IDF）"""
+        np = self.np
+
+        weighted = tf.astype(np.float32)
+        weighted.data = 1.0 + np.log(weighted.data)
+        idf = (np.log((1.0 + len(self.ids)) / (1.0 + self.df)) + 1.0).astype(np.float32)
+        weighted.data *= idf[weighted.indices]
+        norms = np.sqrt(np.add.reduceat(weighted.data ** 2, weighted.indptr[:-1])) if weighted.nnz else None
+        if norms is not None:
+            # reduceat 对空行会取到下一行的值，空行的范数置为 1
+            norms[np.diff(weighted.indptr) == 0] = 1.0
+            weighted.data /= np.repeat(norms, np.diff(weighted.indptr))
+        return weighted
+
+    def _top_k(self, block, offset: int):
+        """从一块稠密相似度中取每行 top-k（排除自身）"""
+        np = self.np
+        rows = np.arange(block.shape[0])
+        self_cols = rows + offset
+        valid = self_cols < block.shape[1]
+        block[rows[valid], self_cols[valid]] = -1.0
+
+        k = min(self.top_k, block.shape[1])
+        if k == 0:
+            return np.full((block.shape[0], self.top_k), -1, np.int32), np.zeros((block.shape[0], self.top_k), np.float32)
+        top = np.argpartition(-block, k - 1, axis=1)[:, :k] if block.shape[1] > k else np.tile(np.arange(k), (block.shape[0], 1))
+        top_scores = np.take_along_axis(block, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1).astype(np.int32)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        top[top_scores < MIN_SIMILARITY] = -1
+        top_scores[top_scores < MIN_SIMILARITY] = 0.0
+
+        neighbors = np.full((block.shape[0], self.top_k), -1, np.int32)
+        scores = np.zeros((block.shape[0], self.top_k), np.float32)
+        neighbors[:, :k] = top
+        scores[:, :k] = top_scores
+        return neighbors, scores
+
+    def _append(self, news_list: Iterable) -> List[int]:
+        """追加未收录的新闻，返回新行号"""
+        np = self.np
+        from scipy import sparse
+
+        rows, new_ids = [], []
+        for news in news_list:
+            if news.id in self.positions:
+                continue
+            self.positions[news.id] = len(self.ids) + len(new_ids)
+            new_ids.append(news.id)
+            rows.append(_term_counts(news.title, news.summary))
+        if not new_ids:
+            return []
+        new_tf = _tf_matrix(rows)
+        self.df += np.bincount(new_tf.indices, minlength=1 << FEATURE_BITS).astype(np.int32)
+        start = len(self.ids)
+        self.ids.extend(new_ids)
+        self.tf = sparse.vstack([self.tf, new_tf], format='csr')
+        return list(range(start, len(self.ids)))
+
+    def rebuild(self, news_list: Iterable) -> int:
+        """全量重建：收录所有新闻并分块计算全部 top-k"""
+        np = self.np
+        self.__init__(self.path, self.top_k)
+        self._append(news_list)
+        matrix = self._weighted(self.tf)
+        transposed = matrix.T.tocsr()
+        n = len(self.ids)
+        self.neighbors = np.full((n, self.top_k), -1, dtype=np.int32)
+        self.scores = np.zeros((n, self.top_k), dtype=np.float32)
+        for start in range(0, n, BLOCK_ROWS):
+            block = (matrix[start:start + BLOCK_ROWS] @ transposed).toarray()
+            stop = start + block.shape[0]
+            self.neighbors[start:stop], self.scores[start:stop] = self._top_k(block, start)
+        return n
+
+    def update(self, news_list: Iterable) -> int:
+        """增量更新：计算新条目的 top-k，并把新条目并入已有条目的相关列表"""
+        np = self.np
+        new_rows = self._append(news_list)
+        if not new_rows:
+            return 0
+
+        # 已有条目的相关列表在下一次全量重建前保持原 IDF 下的分数
+        matrix = self._weighted(self.tf)
+        start = new_rows[0]
+        block = (matrix[start:] @ matrix.T).toarray()
+        new_neighbors, new_scores = self._top_k(block.copy(), start)
+        self.neighbors = np.vstack([self.neighbors, new_neighbors])
+        self.scores = np.vstack([self.scores, new_scores])
+
+        # 新条目只可能挤进那些相似度超过其当前第 k 名的已有条目
+        old = block[:, :start]
+        kth = self.scores[:start, -1]
+        for col in np.flatnonzero((old >= MIN_SIMILARITY).any(axis=0) & (old.max(axis=0) > kth)):
+            merged_ids = np.concatenate([self.neighbors[col], np.asarray(new_rows, dtype=np.int32)])
+            merged_scores = np.concatenate([self.scores[col], old[:, col]])
+            order = np.argsort(-merged_scores, kind='stable')[:self.top_k]
+            keep_scores = merged_scores[order]
+            self.neighbors[col] = np.where(keep_scores >= MIN_SIMILARITY, merged_ids[order], -1)
+            self.scores[col] = np.where(keep_scores >= MIN_SIMILARITY, keep_scores, 0.0)
+        return len(new_rows)
+
+    def related(self, news_id: str, k: Optional[int] = None) -> List[Tuple[str, float]]:
+        """查询相关文章，返回 [(新闻ID, 相似度)]"""
+        position = self.positions.get(news_id)
+        if position is None:
+            return []
+        result = []
+        for neighbor, score in zip(self.neighbors[position][:k], self.scores[position][:k]):
+            if neighbor >= 0:
+                result.append((self.ids[neighbor], round(float(score), 3)))
+        return result
+
+
+def iter_history_items(paths: Optional[List[str]] = None):
+    """按时间顺序产出历史快照中的全部新闻（NewsItem）"""
+    from snapshots import list_snapshot_files, load_news
+
+    for path in paths if paths is not None else list_snapshot_files():
+        yield from load_news(path)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='相关文章索引工具')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    rebuild_parser = subparsers.add_parser('rebuild', help='从全部历史快照重建索引')
+    rebuild_parser.add_argument('--output', default=DEFAULT_INDEX_PATH, help='索引文件路径')
+
+    query_parser = subparsers.add_parser('query', help='查询某条新闻的相关文章')
+    query_parser.add_argument('news_id', help='新闻ID')
+    query_parser.add_argument('--index', default=DEFAULT_INDEX_PATH, help='索引文件路径')
+    query_parser.add_argument('-k', type=int, default=TOP_K, help='返回条数')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'rebuild':
+        started = time.perf_counter()
+        index = RelatedIndex(args.output)
+        count = index.rebuild(iter_history_items())
+        index.save()
+        print(f"✅ 已重建 {count} 条新闻的相关文章索引，耗时 {time.perf_counter() - started:.1f} 秒")
+        print(f"💾 {args.output} ({os.path.getsize(args.output) / 1024:.0f} KB)")
+        return 0
+
+    index = RelatedIndex.load(args.index)
+    related = index.related(args.news_id, args.k)
+    if not related:
+        print(f"❌ 没有找到 {args.news_id} 的相关文章")
+        return 1
+    for news_id, score in related:
+        print(f"{score:.3f}  {news_id}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AI信息聚合平台 - 时间序列汇总
+按小时和按天维护关键词、信源、类别、情感的计数器（时间桶 × 键 的数组），
+每轮收集后只累加首次出现的新闻，区间求和与涨幅榜查询无需重读历史快照
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from scoring import news_timestamp
+
+logger = logging.getLogger(__name__)
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_ROLLUP_PATH = os.path.join(PROJECT_DIR, 'rollups.npz')
+
+DIMENSIONS = ('keyword', 'source', 'category', 'sentiment')
+HOUR = 3600
+DAY = 24 * HOUR
+HOURLY_RETENTION_DAYS = 90  # 小时粒度只保留最近 90 天，按天粒度保留全部历史
+MAX_FUTURE_SKEW = DAY       # 发布时间最多比收集时间晚一天（时区写错等），更晚的视为无效
+MAX_PAST_AGE = 365 * DAY    # 早于收集时间一年以上的发布时间视为无效（如 1970-01-01）
+
+
+def bucket_timestamp(news) -> float:
+    """计入汇总的时间：发布时间，超出 [收集时间 - 1 年, 收集时间 + 1 天] 时改用收集时间，
+    避免一条错误的 pubDate 把时间轴推到未来（清空小时粒度）或拉回 1970 年"""
+    collected = news_timestamp(None, news.created_at)
+    published = news_timestamp(news.published_date, news.created_at)
+    if collected - MAX_PAST_AGE <= published <= collected + MAX_FUTURE_SKEW:
+        return published
+    return collected
+
+
+def rollup_key(dimension: str, value: str) -> str:
+    return f"{dimension}:{value}"
+
+
+def news_keys(news) -> List[str]:
+    """一条新闻计入的全部汇总键"""
+    keys = [rollup_key('keyword', keyword) for keyword in dict.fromkeys(news.keywords or [])]
+    keys.append(rollup_key('source', news.source))
+    keys.append(rollup_key('category', news.category))
+    keys.append(rollup_key('sentiment', news.sentiment))
+    return keys
+
+
+class TimeBucketCounter:
+    """定长时间桶计数器：第 i 行对应 (start + i) 号时间桶，第 j 列对应第 j 个键"""
+
+    def __init__(self, bucket_seconds: int, start: int = 0, counts=None):
+        import numpy as np
+
+        self.np = np
+        self.bucket_seconds = bucket_seconds
+        self.start = start
+        self.counts = counts if counts is not None else np.zeros((0, 0), dtype=np.uint32)
+
+    def bucket_of(self, timestamp: float) -> int:
+        return int(timestamp // self.bucket_seconds)
+
+    def add(self, buckets, columns, num_keys: int):
+        """批量累加 (时间桶, 列) 计数"""
+        np = self.np
+        if len(buckets) == 0:
+            return
+        buckets = np.asarray(buckets, dtype=np.int64)
+        columns = np.asarray(columns, dtype=np.int64)
+        rows, cols = self.counts.shape
+        if rows == 0:
+            self.start = int(buckets.min())
+        first = min(self.start, int(buckets.min()))
+        last = max(self.start + rows - 1, int(buckets.max()))
+        if first != self.start or last - first + 1 != rows or num_keys != cols:
+            grown = np.zeros((last - first + 1, num_keys), dtype=np.uint32)
+            grown[self.start - first:self.start - first + rows, :cols] = self.counts
+            self.counts, self.start = grown, first
+        np.add.at(self.counts, (buckets - self.start, columns), 1)
+
+    def trim_before(self, bucket: int):
+        """丢弃早于指定时间桶的行"""
+        drop = bucket - self.start
+        if drop > 0:
+            self.counts = self.counts[drop:]
+            self.start = bucket
+
+    def window(self, start_ts: float, end_ts: float):
+        """[start_ts, end_ts) 覆盖的行切片"""
+        first = max(self.bucket_of(start_ts) - self.start, 0)
+        last = min(self.bucket_of(end_ts - 1e-6) - self.start + 1, self.counts.shape[0])
+        return self.counts[first:max(first, last)]
+
+
+class RollupStore:
+    """小时/天两级汇总计数器"""
+
+    def __init__(self, path: Optional[str] = DEFAULT_ROLLUP_PATH):
+        self.path = path
+        self.keys: List[str] = []
+        self.columns: Dict[str, int] = {}
+        self.hourly = TimeBucketCounter(HOUR)
+        self.daily = TimeBucketCounter(DAY)
+        self.seen_ids = set()
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_ROLLUP_PATH) -> 'RollupStore':
+        """加载汇总文件，不存在时返回空存储"""
+        import numpy as np
+
+        store = cls(path)
+        if not os.path.exists(path):
+            return store
+        with np.load(path) as data:
+            store.keys = data['keys'].tolist()
+            store.hourly = TimeBucketCounter(HOUR, int(data['hourly_start']), data['hourly'])
+            store.daily = TimeBucketCounter(DAY, int(data['daily_start']), data['daily'])
+            store.seen_ids = set(data['seen_ids'].tolist())
+        store.columns = {key: i for i, key in enumerate(store.keys)}
+        return store
+
+    def save(self, path: Optional[str] = None):
+        """原子写入 npz"""
+        import numpy as np
+
+        path = path or self.path
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            keys=np.array(self.keys, dtype=str),
+            hourly_start=self.hourly.start,
+            hourly=self.hourly.counts,
+            daily_start=self.daily.start,
+            daily=self.daily.counts,
+            seen_ids=np.array(sorted(self.seen_ids), dtype=str),
+        )
+        os.replace(tmp_path, path)
+
+    def _column(self, key: str) -> int:
+        column = self.columns.get(key)
+        if column is None:
+            column = self.columns[key] = len(self.keys)
+            self.keys.append(key)
+        return column
+
+    def update(self, news_list: Iterable, now: Optional[float] = None) -> int:
+        """累加首次出现的新闻，返回计入的条数；小时粒度保留 now（默认当前时间）之前 90 天"""
+        buckets_hourly, buckets_daily, columns = [], [], []
+        added = 0
+        for news in news_list:
+            if news.id in self.seen_ids:
+                continue
+            self.seen_ids.add(news.id)
+            added += 1
+            timestamp = bucket_timestamp(news)
+            hour, day = self.hourly.bucket_of(timestamp), self.daily.bucket_of(timestamp)
+            for key in news_keys(news):
+                buckets_hourly.append(hour)
+                buckets_daily.append(day)
+                columns.append(self._column(key))
+        if not added:
+            return 0
+
+        self.daily.add(buckets_daily, columns, len(self.keys))
+        # 超出保留期的旧新闻只计入按天汇总
+        cutoff = self.hourly.bucket_of(time.time() if now is None else now) - HOURLY_RETENTION_DAYS * 24
+        recent = [(b, c) for b, c in zip(buckets_hourly, columns) if b >= cutoff]
+        self.hourly.add([b for b, _ in recent], [c for _, c in recent], len(self.keys))
+        self.hourly.trim_before(cutoff)
+        return added
+
+    def _counter(self, granularity: str) -> TimeBucketCounter:
+        if granularity not in ('hour', 'day'):
+            raise ValueError(f"不支持的粒度: {granularity}")
+        return self.hourly if granularity == 'hour' else self.daily
+
+    def series(self, key: str, start: float, end: float, granularity: str = 'day') -> List[Tuple[datetime, int]]:
+        """某个键在 [start, end) 内逐个时间桶的计数"""
+        counter = self._counter(granularity)
+        column = self.columns.get(key)
+        first = max(counter.bucket_of(start), counter.start)
+        rows = counter.window(start, end)
+        values = rows[:, column] if column is not None and column < rows.shape[1] else [0] * rows.shape[0]
+        return [(datetime.fromtimestamp((first + i) * counter.bucket_seconds, timezone.utc), int(v))
+                for i, v in enumerate(values)]
+
+    def range_sum(self, key: str, start: float, end: float, granularity: str = 'day') -> int:
+        """某个键在 [start, end) 内的总数"""
+        counter = self._counter(granularity)
+        column = self.columns.get(key)
+        rows = counter.window(start, end)
+        if column is None or column >= rows.shape[1]:
+            return 0
+        return int(rows[:, column].sum())
+
+    def top_movers(self, dimension: str, window_seconds: float, now: Optional[float] = None,
+                   granularity: str = 'hour', limit: int = 10) -> List[Dict]:
+        """与上一个等长窗口相比增量最大的键"""
+        np = self.hourly.np
+        now = now or time.time()
+        counter = self._counter(granularity)
+        prefix = f"{dimension}:"
+        columns = [i for i, key in enumerate(self.keys) if key.startswith(prefix) and i < counter.counts.shape[1]]
+        if not columns:
+            return []
+        current = counter.window(now - window_seconds, now)[:, columns].sum(axis=0, dtype=np.int64)
+        previous = counter.window(now - 2 * window_seconds, now - window_seconds)[:, columns].sum(axis=0, dtype=np.int64)
+        delta = current - previous
+        order = np.argsort(-delta, kind='stable')[:limit]
+        return [{
+            'key': self.keys[columns[i]][len(prefix):],
+            'current': int(current[i]),
+            'previous': int(previous[i]),
+            'delta': int(delta[i]),
+        } for i in order if current[i] > 0]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='时间序列汇总工具')
+    parser.add_argument('--store', default=DEFAULT_ROLLUP_PATH, help='汇总文件路径')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('rebuild', help='从全部历史快照重建汇总')
+
+    sum_parser = subparsers.add_parser('sum', help='查询某个键的区间计数')
+    sum_parser.add_argument('dimension', choices=DIMENSIONS)
+    sum_parser.add_argument('value')
+    sum_parser.add_argument('--days', type=float, default=7, help='最近多少天')
+    sum_parser.add_argument('--granularity', choices=('hour', 'day'), default='day')
+
+    movers_parser = subparsers.add_parser('movers', help='涨幅榜')
+    movers_parser.add_argument('dimension', choices=DIMENSIONS)
+    movers_parser.add_argument('--hours', type=float, default=24, help='比较窗口（小时）')
+    movers_parser.add_argument('--limit', type=int, default=10)
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'rebuild':
+        from related_index import iter_history_items
+
+        started = time.perf_counter()
+        store = RollupStore(args.store)
+        added = store.update(iter_history_items())
+        store.save()
+        print(f"✅ 已汇总 {added} 条新闻、{len(store.keys)} 个键，耗时 {time.perf_counter() - started:.1f} 秒")
+        return 0
+
+    store = RollupStore.load(args.store)
+    now = time.time()
+    if args.command == 'sum':
+        key = rollup_key(args.dimension, args.value)
+        for bucket, count in store.series(key, now - args.days * DAY, now, args.granularity):
+            if count:
+                print(f"{bucket.strftime('%Y-%m-%d %H:%M')}  {count}")
+        print(f"合计: {store.range_sum(key, now - args.days * DAY, now, args.granularity)}")
+        return 0
+
+    for mover in store.top_movers(args.dimension, args.hours * HOUR, now, limit=args.limit):
+        print(f"{mover['delta']:+5d}  {mover['key']} ({mover['previous']} -> {mover['current']})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
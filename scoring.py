@@ -0,0 +1,490 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AI信息聚合平台 - 重要性评分
+评分权重从 scoring_weights.yaml 读取；提供单条评分（收集时使用）和
+基于 NumPy 关键词命中矩阵的批量评分，以及对历史快照重新评分的命令行工具
+"""
+
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WEIGHTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scoring_weights.yaml')
+
+
+@dataclass
+class ScoringWeights:
+    """评分权重"""
+    base: float = 4.0
+    tiers: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    event_words: Dict[str, float] = field(default_factory=dict)
+    keyword_per: float = 0.2
+    keyword_max: float = 1.0
+    recency: List[Tuple[float, float]] = field(default_factory=list)
+    decay_max_bonus: float = 1.5
+    decay_half_life: float = 24.0
+    title_min_length: int = 15
+    title_max_length: int = 80
+    title_length_bonus: float = 0.2
+    number_pattern: str = r'\$[\d.]+[BMK]|\d+%|\d+x'
+    number_bonus: float = 0.5
+    min_score: float = 1.0
+    max_score: float = 10.0
+
+    @classmethod
+    def from_dict(cls, raw: Dict) -> 'ScoringWeights':
+        title = raw.get('title', {})
+        richness = raw.get('keyword_richness', {})
+        decay = raw.get('decay', {})
+        return cls(
+            base=float(raw.get('base', 4.0)),
+            tiers={name: {str(k): float(v) for k, v in table.items()}
+                   for name, table in raw.get('tiers', {}).items()},
+            event_words={str(k): float(v) for k, v in raw.get('event_words', {}).items()},
+            keyword_per=float(richness.get('per_keyword', 0.2)),
+            keyword_max=float(richness.get('max', 1.0)),
+            recency=[(float(hours), float(bonus)) for hours, bonus in raw.get('recency', [])],
+            decay_max_bonus=float(decay.get('max_bonus', 1.5)),
+            decay_half_life=float(decay.get('half_life_hours', 24.0)),
+            title_min_length=int(title.get('min_length', 15)),
+            title_max_length=int(title.get('max_length', 80)),
+            title_length_bonus=float(title.get('length_bonus', 0.2)),
+            number_pattern=title.get('number_pattern', r'\$[\d.]+[BMK]|\d+%|\d+x'),
+            number_bonus=float(title.get('number_bonus', 0.5)),
+            min_score=float(raw.get('min_score', 1.0)),
+            max_score=float(raw.get('max_score', 10.0)),
+        )
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_WEIGHTS_PATH) -> 'ScoringWeights':
+        import yaml
+
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(yaml.load(f, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader)) or {})
+
+    @property
+    def number_regex(self):
+        return _compile(self.number_pattern)
+
+
+@lru_cache(maxsize=None)
+def _compile(pattern: str):
+    return re.compile(pattern)
+
+
+@lru_cache(maxsize=1)
+def default_weights() -> ScoringWeights:
+    """默认权重（每个进程只加载一次）"""
+    return ScoringWeights.load()
+
+
+@lru_cache(maxsize=4096)
+def parse_published(published: str) -> Optional[datetime]:
+    """解析 RSS/ISO 格式的发布时间，失败返回 None"""
+    if not published:
+        return None
+    try:
+        return parsedate_to_datetime(published)
+    except Exception:
+        pass
+    try:
+        return datetime.fromisoformat(published.replace('Z', '+00:00'))
+    except Exception:
+        return None
+
+
+def news_timestamp(published: Optional[str], created_at: Optional[str] = None) -> float:
+    """新闻的时间戳：优先使用发布时间，其次使用收集时间，都无法解析时取当前时间"""
+    pub_time = parse_published(published) if published else None
+    if pub_time is not None:
+        return pub_time.timestamp()
+    try:
+        return datetime.fromisoformat(created_at).timestamp()
+    except (TypeError, ValueError):
+        return time.time()
+
+
+def hours_since(published: Optional[str], reference: Optional[datetime] = None) -> Optional[float]:
+    """发布时间距参考时间（默认当前时间）的小时数"""
+    pub_time = parse_published(published) if published else None
+    if pub_time is None:
+        return None
+    if reference is None:
+        now = datetime.now(pub_time.tzinfo) if pub_time.tzinfo else datetime.now()
+    elif pub_time.tzinfo and reference.tzinfo is None:
+        # 快照中的 created_at 是收集机器的本地时间
+        now = reference.astimezone(pub_time.tzinfo)
+    elif reference.tzinfo and pub_time.tzinfo is None:
+        now = reference.replace(tzinfo=None)
+    else:
+        now = reference
+    return (now - pub_time).total_seconds() / 3600
+
+
+def recency_bonus(weights: ScoringWeights, hours_ago: Optional[float]) -> float:
+    if hours_ago is None:
+        return 0.0
+    for max_hours, bonus in weights.recency:
+        if hours_ago < max_hours:
+            return bonus
+    return 0.0
+
+
+def published_timestamp(published: Optional[str]) -> Optional[float]:
+    """发布时间的时间戳，无法解析时返回 None（排序时不给时效性加分）"""
+    pub_time = parse_published(published) if published else None
+    return pub_time.timestamp() if pub_time is not None else None
+
+
+def score_text(weights: ScoringWeights, title: str, summary: str, keyword_count: int,
+               published_date: Optional[str] = None, reference: Optional[datetime] = None,
+               with_recency: bool = True) -> float:
+    """单条新闻的重要性评分（不含信源权威性加分）；with_recency=False 时得到不随时间变化的基础分"""
+    score = weights.base
+
+    text = (title + ' ' + summary).lower()
+    title_lower = title.lower()
+
+    # 核心关键词：每层只计命中关键词中的最高分
+    tier_score = 0
+    for table in weights.tiers.values():
+        tier_score += max([v for k, v in table.items() if k in text], default=0)
+    score += tier_score
+
+    # 事件类型
+    score += max([v for k, v in weights.event_words.items() if k in title_lower], default=0)
+
+    # 关键词丰富度
+    score += min(keyword_count * weights.keyword_per, weights.keyword_max)
+
+    # 时效性
+    if with_recency:
+        score += recency_bonus(weights, hours_since(published_date, reference))
+
+    # 标题质量
+    if weights.title_min_length <= len(title) <= weights.title_max_length:
+        score += weights.title_length_bonus
+    if weights.number_regex.search(title):
+        score += weights.number_bonus
+
+    return min(max(score, weights.min_score), weights.max_score)
+
+
+def _trie_pattern(keywords) -> str:
+    """由关键词前缀树生成正则：公共前缀只匹配一次，可选后缀贪婪匹配，在每个位置得到最长的关键词"""
+    trie: Dict[str, Dict] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: Dict[str, Dict]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f"(?:{body})?" if '' in node else body
+
+    return build(trie)
+
+
+class BatchScorer:
+    """
+    批量评分器
+
+    先对整批文本去重，再用全部关键词的组合正则扫描一遍，构建 (文本 × 关键词) 的命中矩阵，
+    各层得分由矩阵乘以权重后按行取最大值得到
+    """
+
+    def __init__(self, weights: ScoringWeights, source_bonus: Optional[Dict[str, float]] = None):
+        import numpy as np
+
+        self.np = np
+        self.weights = weights
+        self.source_bonus = source_bonus or {}
+        self._tier_tables = [(list(t.keys()), np.array(list(t.values()), dtype=np.float64))
+                             for t in weights.tiers.values() if t]
+        self._event_table = (list(weights.event_words.keys()),
+                             np.array(list(weights.event_words.values()), dtype=np.float64))
+        self._scanners: Dict[Tuple[str, ...], Tuple] = {}
+
+    def _keyword_scanner(self, keywords: List[str]):
+        """关键词表的组合正则和前缀闭包矩阵（按关键词表缓存）
+
+        正则由关键词前缀树生成并放在零宽前瞻中，在每个位置取以该位置开头的最长关键词；
+        同一位置开头的较短关键词都是它的前缀，由 closure[最长, 前缀] 补齐"""
+        key = tuple(keywords)
+        scanner = self._scanners.get(key)
+        if scanner is None:
+            np = self.np
+            trie = _trie_pattern(k for k in keywords if k)
+            pattern = re.compile(f"(?=({trie}))") if trie else None
+            index = {k: j for j, k in enumerate(keywords)}
+            closure = np.array([[bool(short) and long.startswith(short) for short in keywords]
+                                for long in keywords], dtype=bool).reshape(len(keywords), len(keywords))
+            scanner = self._scanners[key] = (pattern, index, closure)
+        return scanner
+
+    def _hit_matrix(self, texts: List[str], keywords: List[str]) -> 'np.ndarray':
+        """关键词命中矩阵：hits[i, j] 表示 texts[i] 包含 keywords[j]
+
+        全部文本以 \\x00 连接后用组合正则扫描一遍，得到 (文本, 关键词) 命中对，再由前缀闭包补齐"""
+        np = self.np
+        hits = np.zeros((len(texts), len(keywords)), dtype=bool)
+        pattern, index, closure = self._keyword_scanner(keywords)
+        if pattern is None or not texts:
+            return hits
+        matches = [(m.start(), index[m.group(1)]) for m in pattern.finditer('\x00'.join(texts))]
+        if not matches:
+            return hits
+        positions, columns = np.array(matches, dtype=np.intp).T
+        starts = np.cumsum([0] + [len(text) + 1 for text in texts[:-1]])
+        hits[np.searchsorted(starts, positions, side='right') - 1, columns] = True
+        return hits @ closure
+
+    def _max_weight(self, texts: List[str], tables) -> List['np.ndarray']:
+        """对去重后的文本计算每个权重表的命中最高分，返回与原文本对齐的数组列表；
+        各表的关键词合并后只构建一次命中矩阵"""
+        np = self.np
+        unique_index: Dict[str, int] = {}
+        inverse = np.fromiter((unique_index.setdefault(t, len(unique_index)) for t in texts),
+                              dtype=np.intp, count=len(texts))
+        unique_texts = list(unique_index)
+        columns = {k: j for j, k in enumerate(dict.fromkeys(k for keywords, _ in tables for k in keywords))}
+        hits = self._hit_matrix(unique_texts, list(columns)) if unique_texts and columns else None
+
+        results = []
+        for keywords, values in tables:
+            if not keywords or hits is None:
+                results.append(np.zeros(len(texts)))
+                continue
+            table_hits = hits[:, [columns[k] for k in keywords]]
+            results.append((table_hits * values).max(axis=1)[inverse])
+        return results
+
+    def score(self, items: Sequence[Dict], references: Optional[Sequence[Optional[datetime]]] = None,
+              with_source_bonus: bool = True, with_recency: bool = True) -> 'np.ndarray':
+        """
+        为一批新闻字典评分
+
+        references 为每条新闻计算时效性的参考时间（None 表示当前时间），
+        对历史快照重新评分时传入各条目的 created_at 以还原收集时的时效性；
+        with_recency=False 时得到不随时间变化的基础分
+        """
+        return self._score_variants(items, references, with_source_bonus, (with_recency,))[0]
+
+    def base_and_importance(self, items: Sequence[Dict],
+                            references: Optional[Sequence[Optional[datetime]]] = None
+                            ) -> Tuple['np.ndarray', 'np.ndarray']:
+        """(base_score, importance_score)，均含信源加分；关键词匹配只做一次"""
+        base, importance = self._score_variants(items, references, True, (False, True))
+        return base, importance
+
+    def _score_variants(self, items: Sequence[Dict], references, with_source_bonus: bool,
+                        recency_flags: Sequence[bool]) -> List['np.ndarray']:
+        """按 recency_flags 逐个给出不含/含时效性的分数，加分顺序与 score_text 相同以保证结果逐位一致"""
+        np = self.np
+        w = self.weights
+        titles = [item.get('title') or '' for item in items]
+        texts = [(t + ' ' + (item.get('summary') or '')).lower() for t, item in zip(titles, items)]
+
+        score = np.full(len(items), w.base)
+
+        tier_score = np.zeros(len(items))
+        for table_score in self._max_weight(texts, self._tier_tables):
+            tier_score = tier_score + table_score
+        score += tier_score
+
+        score += self._max_weight([t.lower() for t in titles], [self._event_table])[0]
+
+        keyword_counts = np.array([len(item.get('keywords') or []) for item in items], dtype=np.float64)
+        score += np.minimum(keyword_counts * w.keyword_per, w.keyword_max)
+
+        bonus = None
+        if any(recency_flags):
+            if references is None:
+                references = [None] * len(items)
+            hours = np.array([
+                h if (h := hours_since(item.get('published_date'), ref)) is not None else np.nan
+                for item, ref in zip(items, references)
+            ], dtype=np.float64)
+            bonus = np.zeros(len(items))
+            assigned = np.zeros(len(items), dtype=bool)
+            for max_hours, step_bonus in w.recency:
+                in_step = (hours < max_hours) & ~assigned
+                bonus[in_step] = step_bonus
+                assigned |= in_step
+
+        title_lengths = np.array([len(t) for t in titles])
+        title_bonus = np.where((title_lengths >= w.title_min_length) & (title_lengths <= w.title_max_length),
+                               w.title_length_bonus, 0.0)
+        regex = w.number_regex
+        number_bonus = np.where([bool(regex.search(t)) for t in titles], w.number_bonus, 0.0)
+        if with_source_bonus:
+            source_bonus = np.array([self.source_bonus.get(item.get('source'), 0.0) for item in items])
+
+        results = []
+        for with_recency in recency_flags:
+            variant = score + bonus if with_recency else score
+            variant = variant + title_bonus
+            variant = variant + number_bonus
+            variant = np.minimum(np.maximum(variant, w.min_score), w.max_score)
+            if with_source_bonus:
+                variant = np.minimum(variant + source_bonus, w.max_score)
+            results.append(variant)
+        return results
+
+
+def load_source_bonus(registry_path: Optional[str] = None) -> Dict[str, float]:
+    """从数据源注册表读取 {信源名称: 权威性加分}"""
+    from source_registry import DEFAULT_REGISTRY_PATH, SourceRegistry
+
+    return {spec.name: spec.bonus for spec in SourceRegistry.load(registry_path or DEFAULT_REGISTRY_PATH)}
+
+
+def _parse_created_at(value: Optional[str]) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
+def _rescore_chunk(paths: List[str], weights: ScoringWeights, source_bonus: Dict[str, float],
+                   write: bool) -> List[Dict]:
+    """重新评分一组快照文件（在工作进程中运行），返回每个文件的排名变化统计"""
+    import numpy as np
+    from snapshots import load_snapshot, save_snapshot
+
+    snapshots = [(path, load_snapshot(path)) for path in paths]
+    items = [item for _, snapshot in snapshots for item in snapshot]
+    references = [_parse_created_at(item.get('created_at')) for item in items]
+    new_bases, new_scores = BatchScorer(weights, source_bonus).base_and_importance(items, references)
+
+    results = []
+    offset = 0
+    for path, snapshot in snapshots:
+        n = len(snapshot)
+        old = np.array([item.get('importance_score', 0.0) for item in snapshot], dtype=np.float64)
+        new = new_scores[offset:offset + n]
+        bases = new_bases[offset:offset + n]
+        offset += n
+
+        old_order = np.argsort(-old, kind='stable')
+        new_order = np.argsort(-new, kind='stable')
+        old_rank = np.empty(n, dtype=np.int64)
+        old_rank[old_order] = np.arange(n)
+        new_rank = np.empty(n, dtype=np.int64)
+        new_rank[new_order] = np.arange(n)
+        top = min(10, n)
+
+        delta = new - old
+        movers = np.argsort(-np.abs(delta))[:3]
+        results.append({
+            'path': path,
+            'items': n,
+            'changed': int(np.count_nonzero(np.abs(delta) > 1e-9)),
+            'abs_delta_sum': float(np.abs(delta).sum()),
+            'top10_overlap': len(set(old_order[:top]) & set(new_order[:top])) / top if top else 1.0,
+            'top1_changed': bool(n and old_order[0] != new_order[0]),
+            'rank_shift_sum': int(np.abs(old_rank - new_rank).sum()),
+            'movers': [(float(delta[i]), snapshot[i].get('title', ''), float(old[i]), float(new[i]))
+                       for i in movers if abs(delta[i]) > 1e-9],
+        })
+
+        if write:
+            # 读取时排序用的是 base_score + published_ts，只改 importance_score 不会改变 rank_news 的结果
+            for item, base, score in zip(snapshot, bases, new):
+                item['importance_score'] = float(score)
+                item['base_score'] = float(base)
+                item['published_ts'] = published_timestamp(item.get('published_date'))
+            save_snapshot(path, [snapshot[i] for i in new_order])
+
+    return results
+
+
+def rescore_history(paths: List[str], weights: ScoringWeights, source_bonus: Dict[str, float],
+                    workers: int = None, write: bool = False) -> List[Dict]:
+    """并行对快照文件重新评分"""
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(paths) < 2:
+        return _rescore_chunk(paths, weights, source_bonus, write)
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    chunk_size = max(1, len(paths) // (workers * 4))
+    chunks = [paths[i:i + chunk_size] for i in range(0, len(paths), chunk_size)]
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_rescore_chunk, chunk, weights, source_bonus, write) for chunk in chunks]
+        for future in futures:
+            results.extend(future.result())
+    return results
+
+
+def print_report(results: List[Dict], elapsed: float):
+    """输出排名变化报告"""
+    files = len(results)
+    items = sum(r['items'] for r in results)
+    if not items:
+        print("未找到可评分的快照")
+        return
+
+    print(f"📊 重新评分 {files} 个快照 / {items} 条新闻，耗时 {elapsed:.2f}s ({items / elapsed:,.0f} 条/s)")
+    print(f"  - 分数变化条目: {sum(r['changed'] for r in results)} 条")
+    print(f"  - 平均分数变化: {sum(r['abs_delta_sum'] for r in results) / items:.3f}")
+    print(f"  - 平均名次变化: {sum(r['rank_shift_sum'] for r in results) / items:.2f}")
+    print(f"  - 前10名平均重合度: {sum(r['top10_overlap'] for r in results) / files:.1%}")
+    print(f"  - 榜首变化的快照: {sum(r['top1_changed'] for r in results)} 个")
+
+    seen = set()
+    movers = []
+    for delta, title, old, new in sorted((m for r in results for m in r['movers']), key=lambda m: -abs(m[0])):
+        if title not in seen:
+            seen.add(title)
+            movers.append((delta, title, old, new))
+        if len(movers) == 5:
+            break
+    if movers:
+        print("  - 变化最大的新闻:")
+        for delta, title, old, new in movers:
+            print(f"    {old:4.1f} -> {new:4.1f} ({delta:+.1f})  {title[:60]}")
+
+
+def main():
+    """命令行: 用新的权重对历史快照重新评分"""
+    import argparse
+    from snapshots import list_snapshot_files
+
+    parser = argparse.ArgumentParser(description='重要性评分工具')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    rescore_parser = subparsers.add_parser('rescore', help='用权重文件对历史快照重新评分')
+    rescore_parser.add_argument('paths', nargs='*', help='快照文件（默认全部 ai_news_*.json）')
+    rescore_parser.add_argument('--weights', default=DEFAULT_WEIGHTS_PATH, help='评分权重文件')
+    rescore_parser.add_argument('--registry', default=None, help='数据源注册表（信源权威性加分）')
+    rescore_parser.add_argument('--workers', type=int, default=None, help='工作进程数（默认CPU核数）')
+    rescore_parser.add_argument('--write', action='store_true', help='写回新分数并按新分数重新排序')
+    args = parser.parse_args()
+
+    paths = args.paths or list_snapshot_files()
+    weights = ScoringWeights.load(args.weights)
+    source_bonus = load_source_bonus(args.registry)
+
+    started = time.perf_counter()
+    results = rescore_history(paths, weights, source_bonus, workers=args.workers, write=args.write)
+    print_report(results, time.perf_counter() - started)
+    if args.write:
+        print(f"💾 已写回 {len(results)} 个快照")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AI信息聚合平台 - 多进程分片收集器
+协调进程按主机哈希把数据源切分给 N 个工作进程，各进程独立抓取、解析、评分，
+结果按源流式回传，最后由协调进程统一去重和排序
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import queue
+import time
+import zlib
+from typing import Dict, List
+from urllib.parse import urlparse
+
+import profiling
+from data_collector import DataCollector, DataSource, NewsItem
+
+logger = logging.getLogger(__name__)
+
+# 单个工作进程内的最大并发抓取数
+MAX_CONCURRENT_FETCHES = 32
+
+
+def shard_for_url(url: str, num_shards: int) -> int:
+    """按主机名哈希计算分片号（同一主机的源总在同一进程，便于按主机限速）"""
+    host = (urlparse(url).hostname or '').lower()
+    return zlib.crc32(host.encode('utf-8')) % num_shards
+
+
+def split_sources(sources: List[DataSource], num_shards: int) -> List[List[DataSource]]:
+    """把数据源切分成 num_shards 个分片"""
+    shards: List[List[DataSource]] = [[] for _ in range(num_shards)]
+    for source in sources:
+        shards[shard_for_url(source.url, num_shards)].append(source)
+    return shards
+
+
+async def _collect_shard(shard_index: int, sources: List[DataSource], result_queue):
+    """工作进程内的抓取循环：每个源完成后立即把结果放回队列"""
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_FETCHES)
+    host_locks: Dict[str, asyncio.Lock] = {}
+    host_last_start: Dict[str, float] = {}
+
+    async def fetch_one(source: DataSource) -> List[NewsItem]:
+        # 同一主机的请求按 rate_limit 间隔发出，不同主机之间互不等待
+        host = urlparse(source.url).hostname or ''
+        lock = host_locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            wait = host_last_start.get(host, 0.0) + source.rate_limit - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            host_last_start[host] = time.monotonic()
+        async with semaphore:
+            try:
+                return await source.fetch(collector.session)
+            except Exception as e:
+                logger.error("分片 %d 抓取 %s 失败: %s", shard_index, source.name, e, extra={'source': source.name})
+                return []
+
+    started = time.perf_counter()
+    total_items = 0
+    async with DataCollector() as collector:
+        collector.data_sources = sources
+        tasks = [asyncio.create_task(fetch_one(source)) for source in sources]
+        for finished in asyncio.as_completed(tasks):
+            items = await finished
+            if items:
+                total_items += len(items)
+                result_queue.put(('items', shard_index, items))
+
+    result_queue.put(('done', shard_index, {
+        'sources': len(sources),
+        'items': total_items,
+        'elapsed': time.perf_counter() - started,
+    }))
+
+
+def _shard_worker(shard_index: int, sources: List[DataSource], result_queue):
+    """工作进程入口"""
+    try:
+        asyncio.run(_collect_shard(shard_index, sources, result_queue))
+    except Exception as e:
+        logger.error("分片 %d 工作进程异常: %s", shard_index, e)
+        result_queue.put(('done', shard_index, {'sources': len(sources), 'items': 0, 'error': str(e)}))
+
+
+class ShardedCollector(DataCollector):
+    """多进程分片数据收集器（接口与 DataCollector 一致）"""
+
+    def __init__(self, num_workers: int = None, start_method: str = 'spawn'):
+        super().__init__()
+        self.num_workers = num_workers or multiprocessing.cpu_count()
+        self.start_method = start_method
+        self.shard_stats: Dict[int, dict] = {}
+
+    async def __aenter__(self):
+        # 协调进程本身不发起请求，无需创建 HTTP 会话
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+    async def collect_all(self) -> List[NewsItem]:
+        """启动工作进程并合并各分片结果"""
+        loop = asyncio.get_running_loop()
+        sorted_news = await loop.run_in_executor(None, self._run_shards)
+        if self.enrich_top_n:
+            await self._enrich(sorted_news)
+            self._rescore_enriched(sorted_news)
+            sorted_news = self._sort_by_importance(sorted_news)
+        return sorted_news
+
+    def _run_shards(self) -> List[NewsItem]:
+        ctx = multiprocessing.get_context(self.start_method)
+        result_queue = ctx.Queue()
+
+        shards = [s for s in split_sources(self.data_sources, self.num_workers) if s]
+        logger.info("分片收集: %d 个数据源 -> %d 个工作进程", len(self.data_sources), len(shards))
+
+        workers = {}
+        for shard_index, sources in enumerate(shards):
+            process = ctx.Process(target=_shard_worker, args=(shard_index, sources, result_queue), daemon=True)
+            process.start()
+            workers[shard_index] = process
+
+        all_news: List[NewsItem] = []
+        pending = set(workers)
+        self.shard_stats = {}
+        while pending:
+            try:
+                kind, shard_index, payload = result_queue.get(timeout=1)
+            except queue.Empty:
+                # 工作进程异常退出且没有发送 done 消息时不再等待
+                for shard_index in list(pending):
+                    if not workers[shard_index].is_alive():
+                        logger.error("分片 %d 工作进程意外退出 (exitcode=%s)", shard_index, workers[shard_index].exitcode)
+                        pending.discard(shard_index)
+                continue
+
+            if kind == 'items':
+                all_news.extend(payload)
+            elif kind == 'done':
+                self.shard_stats[shard_index] = payload
+                pending.discard(shard_index)
+
+        for process in workers.values():
+            process.join()
+
+        # 全局去重和排序
+        with profiling.stage('_deduplicate'):
+            unique_news = self._deduplicate(all_news)
+        with profiling.stage('_classify'):
+            self._classify(unique_news)
+        sorted_news = self._sort_by_importance(unique_news)
+
+        logger.info("分片收集完成，共获取 %d 条唯一新闻", len(sorted_news))
+        return sorted_news
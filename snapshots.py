@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AI信息聚合平台 - 历史快照读写
+统一 ai_news_*.json 快照的查找、读取和原子写入（编解码见 json_codec）
+"""
+
+import glob
+import os
+from typing import TYPE_CHECKING, Dict, Iterator, List, Tuple
+
+from json_codec import read_news, read_path, write_path
+
+if TYPE_CHECKING:
+    from data_collector import NewsItem
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+SNAPSHOT_PATTERN = 'ai_news_*.json'
+
+
+def list_snapshot_files(directory: str = PROJECT_DIR, pattern: str = SNAPSHOT_PATTERN) -> List[str]:
+    """按时间顺序返回快照文件路径（文件名中的时间戳即排序依据）"""
+    return sorted(glob.glob(os.path.join(directory, pattern)))
+
+
+def load_snapshot(path: str) -> List[Dict]:
+    """读取单个快照，返回新闻字典列表"""
+    return read_path(path)
+
+
+def load_news(path: str) -> List['NewsItem']:
+    """读取单个快照，直接解码为 NewsItem 列表"""
+    return read_news(path)
+
+
+def iter_snapshots(directory: str = PROJECT_DIR, pattern: str = SNAPSHOT_PATTERN) -> Iterator[Tuple[str, List[Dict]]]:
+    """按时间顺序逐个读取快照，产出 (路径, 新闻字典列表)"""
+    for path in list_snapshot_files(directory, pattern):
+        yield path, load_snapshot(path)
+
+
+def save_snapshot(path: str, news_dicts: List[Dict]):
+    """以与 save_to_news_list 相同的格式原子写入快照"""
+    write_path(path, news_dicts)
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AI信息聚合平台 - 数据源注册表
+从 YAML 或 OPML 文件加载数据源配置，校验后按需构建数据源对象
+"""
+
+import logging
+import os
+import sys
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REGISTRY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sources.yaml')
+
+PRIORITIES = ('high', 'medium', 'low')
+PARSER_TYPES = ('rss', 'web')
+MAX_AUTHORITY_BONUS = 2.0
+
+
+class SourceRegistryError(ValueError):
+    """注册表格式错误或条目校验失败"""
+
+
+@dataclass(frozen=True, slots=True)
+class SourceSpec:
+    """单个数据源的配置（只保存配置，数据源对象在使用时才构建）"""
+    name: str
+    url: str
+    priority: str = "medium"
+    category: str = "tech"
+    bonus: float = 0.0
+    rate_limit: float = 1.0
+    parser: str = "rss"
+    interval: int = 30  # 轮询间隔（分钟）
+
+    def build(self):
+        """构建对应的数据源对象"""
+        from data_collector import RSSDataSource, WebDataSource
+
+        source_class = RSSDataSource if self.parser == 'rss' else WebDataSource
+        source = source_class(self.name, self.url, self.priority, self.category)
+        source.authority_bonus = self.bonus
+        source.rate_limit = self.rate_limit
+        source.poll_interval = self.interval
+        return source
+
+
+def _parse_spec(raw: Dict, position: str) -> Tuple[Optional[SourceSpec], List[str]]:
+    """把原始字典转换为 SourceSpec，返回 (spec, 错误列表)"""
+    errors = []
+    name = str(raw.get('name') or '').strip()
+    url = str(raw.get('url') or '').strip()
+
+    if not name:
+        errors.append(f"{position}: 缺少 name")
+    parsed_url = urlparse(url)
+    if parsed_url.scheme not in ('http', 'https') or not parsed_url.netloc:
+        errors.append(f"{position} ({name or '?'}): url 无效: {url!r}")
+
+    priority = raw.get('priority') or 'medium'
+    if priority not in PRIORITIES:
+        errors.append(f"{position} ({name}): priority 必须是 {'/'.join(PRIORITIES)}，实际为 {priority!r}")
+
+    parser = raw.get('parser') or 'rss'
+    if parser not in PARSER_TYPES:
+        errors.append(f"{position} ({name}): parser 必须是 {'/'.join(PARSER_TYPES)}，实际为 {parser!r}")
+
+    try:
+        bonus = float(raw.get('bonus', 0.0))
+        rate_limit = float(raw.get('rate_limit', 1.0))
+        interval = int(raw.get('interval', 30))
+    except (TypeError, ValueError) as e:
+        errors.append(f"{position} ({name}): 数值字段格式错误: {e}")
+        return None, errors
+
+    if not 0.0 <= bonus <= MAX_AUTHORITY_BONUS:
+        errors.append(f"{position} ({name}): bonus 超出范围 [0, {MAX_AUTHORITY_BONUS}]: {bonus}")
+    if rate_limit < 0:
+        errors.append(f"{position} ({name}): rate_limit 不能为负数: {rate_limit}")
+    if interval <= 0:
+        errors.append(f"{position} ({name}): interval 必须大于0: {interval}")
+
+    if errors:
+        return None, errors
+
+    # sys.intern 让上千条目共享相同的优先级/分类字符串
+    return SourceSpec(
+        name=name,
+        url=url,
+        priority=sys.intern(priority),
+        category=sys.intern(str(raw.get('category') or 'tech')),
+        bonus=bonus,
+        rate_limit=rate_limit,
+        parser=sys.intern(parser),
+        interval=interval,
+    ), []
+
+
+def _read_yaml(path: str) -> Iterator[Dict]:
+    import yaml
+
+    loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    with open(path, 'r', encoding='utf-8') as f:
+        document = yaml.load(f, Loader=loader) or {}
+
+    entries = document.get('sources', []) if isinstance(document, dict) else document
+    if not isinstance(entries, list):
+        raise SourceRegistryError(f"{path}: sources 必须是列表")
+    for entry in entries:
+        yield entry if isinstance(entry, dict) else {}
+
+
+def _read_opml(path: str) -> Iterator[Dict]:
+    """读取 OPML 订阅列表：带 xmlUrl 的 outline 为数据源，外层 outline 的文本作为默认分类"""
+    import xml.etree.ElementTree as ET
+
+    folders: List[Optional[str]] = []
+    for event, element in ET.iterparse(path, events=('start', 'end')):
+        if element.tag != 'outline':
+            continue
+        if event == 'start':
+            folders.append(None if element.get('xmlUrl') else element.get('text'))
+            continue
+
+        folders.pop()
+        if element.get('xmlUrl'):
+            folder = next((f for f in reversed(folders) if f), None)
+            yield {
+                'name': element.get('title') or element.get('text'),
+                'url': element.get('xmlUrl'),
+                'priority': element.get('priority'),
+                'category': element.get('category') or folder,
+                'bonus': element.get('bonus', 0.0),
+                'rate_limit': element.get('rate_limit', 1.0),
+                'parser': element.get('parser'),
+                'interval': element.get('interval', 30),
+            }
+        element.clear()
+
+
+class SourceRegistry:
+    """数据源注册表"""
+
+    def __init__(self, specs: List[SourceSpec]):
+        self.specs = specs
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_REGISTRY_PATH, strict: bool = False) -> 'SourceRegistry':
+        """
+        加载注册表文件（按扩展名识别 YAML / OPML）
+
+        strict=False 时无效条目记录警告后跳过，strict=True 时抛出 SourceRegistryError
+        """
+        if path.endswith(('.opml', '.xml')):
+            entries = _read_opml(path)
+        else:
+            entries = _read_yaml(path)
+
+        specs = []
+        errors = []
+        seen_names = set()
+        seen_urls = set()
+        for index, raw in enumerate(entries, 1):
+            spec, entry_errors = _parse_spec(raw, f"第{index}条")
+            if spec is not None:
+                if spec.name in seen_names:
+                    entry_errors.append(f"第{index}条: name 重复: {spec.name}")
+                elif spec.url in seen_urls:
+                    entry_errors.append(f"第{index}条 ({spec.name}): url 重复: {spec.url}")
+            if entry_errors:
+                name = raw.get('name') if isinstance(raw, dict) else None
+                errors.extend((name, error) for error in entry_errors)
+                continue
+            seen_names.add(spec.name)
+            seen_urls.add(spec.url)
+            specs.append(spec)
+
+        if errors:
+            if strict:
+                raise SourceRegistryError(f"{path}: " + "; ".join(error for _, error in errors))
+            for name, error in errors:
+                logger.warning("数据源注册表 %s: %s，已跳过", path, error, extra={'source': name})
+
+        logger.info("从 %s 加载 %d 个数据源", path, len(specs))
+        return cls(specs)
+
+    def __len__(self) -> int:
+        return len(self.specs)
+
+    def __iter__(self) -> Iterator[SourceSpec]:
+        return iter(self.specs)
+
+    def build_sources(self) -> Iterator:
+        """按需逐个构建数据源对象"""
+        for spec in self.specs:
+            yield spec.build()
+
+    def save_yaml(self, path: str):
+        """写出为 YAML 注册表"""
+        import yaml
+
+        entries = [
+            {'name': spec.name, 'url': spec.url, 'priority': spec.priority, 'category': spec.category,
+             'bonus': spec.bonus, 'rate_limit': spec.rate_limit, 'parser': spec.parser,
+             'interval': spec.interval}
+            for spec in self.specs
+        ]
+        with open(path, 'w', encoding='utf-8') as f:
+            yaml.safe_dump({'sources': entries}, f, allow_unicode=True, sort_keys=False)
+
+
+def main():
+    """命令行: 校验注册表或把 OPML 导入为 YAML 注册表"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='数据源注册表工具')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    validate_parser = subparsers.add_parser('validate', help='校验注册表文件')
+    validate_parser.add_argument('path', nargs='?', default=DEFAULT_REGISTRY_PATH)
+
+    import_parser = subparsers.add_parser('import', help='把 OPML/YAML 合并到注册表')
+    import_parser.add_argument('path', help='要导入的 OPML 或 YAML 文件')
+    import_parser.add_argument('--into', default=DEFAULT_REGISTRY_PATH, help='目标 YAML 注册表')
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    try:
+        if args.command == 'validate':
+            registry = SourceRegistry.load(args.path, strict=True)
+            print(f"✅ {args.path}: {len(registry)} 个数据源校验通过")
+        else:
+            imported = SourceRegistry.load(args.path)
+            existing = SourceRegistry.load(args.into) if os.path.exists(args.into) else SourceRegistry([])
+            known_urls = {spec.url for spec in existing}
+            known_names = {spec.name for spec in existing}
+            added = [spec for spec in imported
+                     if spec.url not in known_urls and spec.name not in known_names]
+            SourceRegistry(existing.specs + added).save_yaml(args.into)
+            print(f"✅ 已导入 {len(added)} 个新数据源到 {args.into}（跳过 {len(imported) - len(added)} 个重复项）")
+    except SourceRegistryError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
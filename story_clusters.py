@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AI信息聚合平台 - 跨运行的增量故事聚类
+用 MinHash 签名 + LSH 分桶把每条新闻归入已有故事簇或新建簇，
+每条新闻的归类只做常数次哈希表查找，与历史规模无关；
+故事簇跨运行持久化，并记录信源数与到达速度（按收录时间计，补抓的旧报道不会虚增热度）作为热度信号
+"""
+
+import logging
+import math
+import os
+import re
+import time
+import zlib
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_INDEX_PATH = os.path.join(PROJECT_DIR, 'story_clusters.json')
+
+NUM_HASHES = 64          # MinHash 签名长度
+BAND_ROWS = 2            # 每个 LSH 桶使用的签名行数（共 NUM_HASHES / BAND_ROWS 个桶）
+SIMILARITY_THRESHOLD = 0.35  # 估计 Jaccard 相似度达到该值才归入同一故事
+SUMMARY_TOKENS = 30      # 摘要只取前若干词，避免长摘要稀释标题
+VELOCITY_WINDOW_HOURS = 6.0
+RETENTION_HOURS = 14 * 24  # 超过该时长没有新报道的故事簇会被清理
+
+_TOKEN_RE = re.compile(r'[a-z0-9][a-z0-9\-.]*[a-z0-9]|[一-鿿]+')
+_STOPWORDS = frozenset("""
+    the and for with from that this what when will into over your about after their
+    more than have has are was were its new how why who can not but you our out all
+    says said just now also been being which they them his her one two
+    arxiv announce type abstract replace cross comments
+""".split())
+
+_MERSENNE_PRIME = (1 << 61) - 1
+
+
+def _hash_params():
+    import numpy as np
+
+    rng = np.random.RandomState(20251221)
+    a = rng.randint(1, _MERSENNE_PRIME, size=NUM_HASHES, dtype=np.uint64)
+    b = rng.randint(0, _MERSENNE_PRIME, size=NUM_HASHES, dtype=np.uint64)
+    return a, b
+
+
+def tokenize(text: str, limit: Optional[int] = None) -> List[str]:
+    """英文按词、中文按字符二元组切分，去掉停用词和过短的词，最多返回 limit 个"""
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        if '一' <= token[0] <= '鿿':
+            tokens.extend(token[i:i + 2] for i in range(max(len(token) - 1, 1)))
+        elif len(token) > 2 and token not in _STOPWORDS:
+            tokens.append(token)
+        if limit is not None and len(tokens) >= limit:
+            return tokens[:limit]
+    return tokens
+
+
+def story_tokens(title: str, summary: str) -> Set[str]:
+    """故事特征词：完整标题加摘要开头"""
+    return set(tokenize(title)) | set(tokenize(summary or '', SUMMARY_TOKENS))
+
+
+@dataclass
+class StoryCluster:
+    """故事簇"""
+    id: str
+    title: str
+    signature: bytes
+    first_seen: float
+    last_seen: float
+    sources: Set[str] = field(default_factory=set)
+    item_count: int = 0
+    arrivals: List[float] = field(default_factory=list)  # 最近窗口内的收录时间
+    band_keys: List[bytes] = field(default_factory=list)
+
+    def record(self, source: str, arrival: float):
+        self.sources.add(source)
+        self.item_count += 1
+        self.arrivals.append(arrival)
+        self.first_seen = min(self.first_seen, arrival)
+        self.last_seen = max(self.last_seen, arrival)
+
+    def drop_arrivals_before(self, cutoff: float):
+        """丢弃窗口外的收录时间（在归类和清理时调用，读取热度不修改状态）"""
+        if self.arrivals and self.arrivals[0] < cutoff:
+            self.arrivals = [t for t in self.arrivals if t >= cutoff]
+
+    def velocity(self, now: float, window_hours: float = VELOCITY_WINDOW_HOURS) -> float:
+        """窗口内每小时收录的报道数"""
+        cutoff = now - window_hours * 3600
+        return sum(1 for t in self.arrivals if cutoff <= t <= now) / window_hours
+
+    def trend_score(self, now: float) -> float:
+        """热度信号：到达速度按信源数加权（多家媒体同时跟进的故事更热）"""
+        return self.velocity(now) * math.log2(1 + len(self.sources))
+
+    def to_dict(self) -> Dict:
+        return {
+            'id': self.id,
+            'title': self.title,
+            'signature': self.signature.hex(),
+            'first_seen': self.first_seen,
+            'last_seen': self.last_seen,
+            'sources': sorted(self.sources),
+            'item_count': self.item_count,
+            'arrivals': self.arrivals,
+            'band_keys': [key.hex() for key in self.band_keys],
+        }
+
+    @classmethod
+    def from_dict(cls, raw: Dict) -> 'StoryCluster':
+        return cls(
+            id=raw['id'],
+            title=raw['title'],
+            signature=bytes.fromhex(raw['signature']),
+            first_seen=raw['first_seen'],
+            last_seen=raw['last_seen'],
+            sources=set(raw['sources']),
+            item_count=raw['item_count'],
+            arrivals=raw['arrivals'],
+            band_keys=[bytes.fromhex(key) for key in raw['band_keys']],
+        )
+
+
+class StoryClusterIndex:
+    """增量故事聚类索引"""
+
+    def __init__(self, path: Optional[str] = DEFAULT_INDEX_PATH):
+        import numpy as np
+
+        self.np = np
+        self.path = path
+        self._a, self._b = _hash_params()
+        self.clusters: Dict[str, StoryCluster] = {}
+        self.buckets: Dict[bytes, str] = {}       # LSH 桶键 -> 故事簇ID
+        self.item_clusters: Dict[str, str] = {}   # 新闻ID -> 故事簇ID
+        self._next_id = 0
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_INDEX_PATH) -> 'StoryClusterIndex':
+        """加载持久化的索引，文件不存在时返回空索引"""
+        from json_codec import read_path
+
+        index = cls(path)
+        if not os.path.exists(path):
+            return index
+        try:
+            raw = read_path(path)
+        except (OSError, ValueError) as e:
+            logger.error("读取故事聚类索引 %s 失败: %s，将重新建立", path, e)
+            return index
+
+        index._next_id = raw.get('next_id', 0)
+        index.item_clusters = raw.get('item_clusters', {})
+        for cluster_raw in raw.get('clusters', []):
+            cluster = StoryCluster.from_dict(cluster_raw)
+            index.clusters[cluster.id] = cluster
+            for key in cluster.band_keys:
+                index.buckets[key] = cluster.id
+        return index
+
+    def save(self, path: Optional[str] = None):
+        """原子写入索引"""
+        from json_codec import write_path
+
+        write_path(path or self.path, {
+            'next_id': self._next_id,
+            'item_clusters': self.item_clusters,
+            'clusters': [cluster.to_dict() for cluster in self.clusters.values()],
+        }, indent=False)
+
+    def signature(self, tokens: Set[str]) -> Optional[bytes]:
+        """MinHash 签名（无有效词时返回 None）"""
+        np = self.np
+        if not tokens:
+            return None
+        x = np.fromiter((zlib.crc32(t.encode('utf-8')) for t in tokens), dtype=np.uint64, count=len(tokens))
+        # a * x + b 在 uint64 上溢出回绕后取高32位，作为 NUM_HASHES 个相互独立的哈希
+        hashed = (np.outer(x, self._a) + self._b) >> np.uint64(32)
+        return hashed.min(axis=0).astype(np.uint32).tobytes()
+
+    def _band_keys(self, signature: bytes) -> List[bytes]:
+        width = BAND_ROWS * 4
+        return [bytes([band]) + signature[band * width:(band + 1) * width]
+                for band in range(NUM_HASHES // BAND_ROWS)]
+
+    def _similarity(self, sig_a: bytes, sig_b: bytes) -> float:
+        np = self.np
+        a = np.frombuffer(sig_a, dtype=np.uint32)
+        b = np.frombuffer(sig_b, dtype=np.uint32)
+        return float(np.count_nonzero(a == b)) / NUM_HASHES
+
+    def assign(self, news, now: Optional[float] = None) -> Optional[StoryCluster]:
+        """把一条新闻归入故事簇（已归类过的新闻直接返回原簇，不重复计数）；
+        now 为收录时间（默认当前时间），到达速度按收录时间而不是新闻的发布时间计算"""
+        cluster_id = self.item_clusters.get(news.id)
+        if cluster_id is not None:
+            return self.clusters.get(cluster_id)
+
+        signature = self.signature(story_tokens(news.title, news.summary))
+        if signature is None:
+            return None
+        band_keys = self._band_keys(signature)
+
+        # 只比较与本条新闻落入同一 LSH 桶的候选簇
+        best, best_similarity = None, SIMILARITY_THRESHOLD
+        for candidate_id in {self.buckets[k] for k in band_keys if k in self.buckets}:
+            candidate = self.clusters.get(candidate_id)
+            if candidate is None:
+                continue
+            similarity = self._similarity(signature, candidate.signature)
+            if similarity >= best_similarity:
+                best, best_similarity = candidate, similarity
+
+        arrival = time.time() if now is None else now
+        if best is None:
+            self._next_id += 1
+            best = StoryCluster(id=f"story_{self._next_id}", title=news.title, signature=signature,
+                                first_seen=arrival, last_seen=arrival)
+            self.clusters[best.id] = best
+
+        # 新成员的桶键也指向该簇，使后续换了说法的报道同样能命中
+        for key in band_keys:
+            if key not in self.buckets:
+                self.buckets[key] = best.id
+                best.band_keys.append(key)
+
+        best.drop_arrivals_before(arrival - VELOCITY_WINDOW_HOURS * 3600)
+        best.record(news.source, arrival)
+        self.item_clusters[news.id] = best.id
+        return best
+
+    def assign_all(self, news_list: Iterable, now: Optional[float] = None) -> int:
+        """归类一批新闻并写入 story_id / trend_velocity，返回新归类的条数"""
+        now = now or time.time()
+        assigned = 0
+        placed = []
+        for news in news_list:
+            is_new = news.id not in self.item_clusters
+            cluster = self.assign(news, now)
+            if cluster is not None:
+                assigned += is_new
+                placed.append((news, cluster))
+
+        # 整批归类完成后再计算热度，同一批内先到的条目也能反映后到的报道
+        trend_scores = {}
+        for news, cluster in placed:
+            if cluster.id not in trend_scores:
+                trend_scores[cluster.id] = round(cluster.trend_score(now), 3)
+            news.story_id = cluster.id
+            news.trend_velocity = trend_scores[cluster.id]
+        return assigned
+
+    def trending(self, now: Optional[float] = None, limit: int = 10) -> List[StoryCluster]:
+        """当前最热的故事簇"""
+        now = now or time.time()
+        ranked = sorted(self.clusters.values(), key=lambda c: c.trend_score(now), reverse=True)
+        return [cluster for cluster in ranked[:limit] if cluster.arrivals]
+
+    def prune(self, now: Optional[float] = None, retention_hours: float = RETENTION_HOURS) -> int:
+        """清理长期没有新报道的故事簇和窗口外的收录时间，保持索引规模有界"""
+        now = now or time.time()
+        window_cutoff = now - VELOCITY_WINDOW_HOURS * 3600
+        for cluster in self.clusters.values():
+            cluster.drop_arrivals_before(window_cutoff)
+        cutoff = now - retention_hours * 3600
+        stale = [cluster for cluster in self.clusters.values() if cluster.last_seen < cutoff]
+        stale_ids = {cluster.id for cluster in stale}
+        for cluster in stale:
+            for key in cluster.band_keys:
+                if self.buckets.get(key) == cluster.id:
+                    del self.buckets[key]
+            del self.clusters[cluster.id]
+        if stale_ids:
+            self.item_clusters = {k: v for k, v in self.item_clusters.items() if v not in stale_ids}
+        return len(stale)
+
+    def update(self, news_list: List, now: Optional[float] = None) -> int:
+        """收集完成后调用：归类本轮新闻、清理过期故事并持久化"""
+        now = now or time.time()
+        assigned = self.assign_all(news_list, now)
+        pruned = self.prune(now)
+        if self.path:
+            self.save()
+        logger.info("故事聚类: 新归类 %d 条，当前 %d 个故事，清理 %d 个过期故事", assigned, len(self.clusters), pruned)
+        return assigned
@@ -14,11 +14,10 @@ from pathlib import Path
 # 添加项目路径
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from data_collector import DataCollector
-
 def test_data_collection():
     """测试数据收集功能"""
     print("🧪 测试数据收集功能...")
+    from data_collector import DataCollector
     
     async def run_test():
         async with DataCollector() as collector:
@@ -56,8 +55,8 @@ def test_data_files():
     print(f"📁 使用最新数据文件: {latest_file}")
     
     try:
-        with open(latest_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        from json_codec import read_path
+        data = read_path(str(latest_file))
         
         print(f"✅ 数据文件格式正确，包含 {len(data)} 条新闻")
         
@@ -134,7 +133,7 @@ def test_dependencies():
     """测试依赖包"""
     print("🧪 测试依赖包...")
     
-    required_packages = ['aiohttp', 'feedparser', 'bs4']
+    required_packages = ['aiohttp', 'feedparser', 'bs4', 'yaml', 'numpy', 'scipy']
     missing_packages = []
     
     for package in required_packages:
@@ -150,6 +149,1356 @@ def test_dependencies():
     print("✅ 所有依赖包已安装")
     return True
 
+def test_startup_imports():
+    """测试启动路径的延迟导入与导入耗时预算"""
+    print("🧪 测试启动导入耗时...")
+    from benchmarks import IMPORT_BUDGET_MS, loaded_modules, measure_import_time
+    
+    heavy_modules = {'aiohttp', 'feedparser', 'bs4', 'data_collector'}
+    server_modules = loaded_modules('server')
+    assert not heavy_modules & server_modules, f"server 模式加载了抓取依赖: {heavy_modules & server_modules}"
+    print("✅ server 模式未加载抓取依赖")
+    
+    import subprocess
+    check = subprocess.run(
+        [sys.executable, '-c',
+         "import sys, data_collector; c = data_collector.DataCollector(); "
+         "assert c._data_sources is None; "
+         "assert not {'aiohttp', 'feedparser', 'bs4'} & set(sys.modules)"],
+        cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True
+    )
+    assert check.returncode == 0, f"data_collector 未延迟加载: {check.stderr}"
+    print("✅ data_collector 导入与数据源初始化均为延迟加载")
+    
+    for mode, budget in IMPORT_BUDGET_MS.items():
+        elapsed = min(measure_import_time(mode) for _ in range(3))
+        print(f"  - --mode {mode}: {elapsed:.1f} ms (预算 {budget} ms)")
+        assert elapsed <= budget, f"--mode {mode} 导入耗时超出预算"
+    
+    return True
+
+def test_sharded_collection():
+    """测试多进程分片收集与全局合并"""
+    print("🧪 测试分片收集...")
+    from benchmarks import FeedStandInServer
+    from data_collector import DataCollector
+    from sharded_collector import ShardedCollector, shard_for_url, split_sources
+    
+    with FeedStandInServer(ai_entries_per_feed=2) as server:
+        sources = server.make_sources(12)
+        
+        shards = split_sources(sources, 3)
+        assert sum(len(shard) for shard in shards) == len(sources), "分片后数据源数量不一致"
+        for index, shard in enumerate(shards):
+            assert all(shard_for_url(source.url, 3) == index for source in shard), "同一主机的源被分到不同分片"
+        
+        async def run_single():
+            async with DataCollector() as collector:
+                collector.data_sources = sources
+                return await collector._collect_sources(sources)
+        
+        async def run_sharded():
+            async with ShardedCollector(2) as collector:
+                collector.data_sources = sources
+                return await collector.collect_all(), collector.shard_stats
+        
+        expected = DataCollector()._deduplicate(asyncio.run(run_single()))
+        sharded_news, shard_stats = asyncio.run(run_sharded())
+    
+    ids = [news.id for news in sharded_news]
+    assert len(ids) == len(set(ids)), "分片合并后存在重复新闻"
+    assert set(ids) == {news.id for news in expected}, "分片收集结果与单进程收集不一致"
+    assert sum(stats['sources'] for stats in shard_stats.values()) == len(sources), "存在未抓取的数据源"
+    scores = [news.importance_score for news in sharded_news]
+    assert scores == sorted(scores, reverse=True), "合并结果未按重要性排序"
+    print(f"✅ {len(shard_stats)} 个分片共收集 {len(ids)} 条唯一新闻，与单进程结果一致")
+    
+    return True
+
+def test_source_registry():
+    """测试数据源注册表的加载、校验与规模"""
+    print("🧪 测试数据源注册表...")
+    import tempfile
+    import time
+    import tracemalloc
+    from data_collector import DataCollector
+    from source_registry import SourceRegistry, SourceRegistryError
+    
+    registry = SourceRegistry.load(strict=True)
+    sources = list(registry.build_sources())
+    assert len(sources) == 16, f"默认注册表应有16个数据源，实际 {len(sources)}"
+    openai_news = next(s for s in sources if s.name == 'OpenAI News')
+    assert openai_news.authority_bonus == 0.6 and openai_news.priority == 'high'
+    assert openai_news._apply_source_bonus(5.0) == 5.6, "权威性加分未从注册表读取"
+    print(f"✅ 默认注册表加载 {len(sources)} 个数据源")
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        bad_path = os.path.join(tmp_dir, 'bad.yaml')
+        with open(bad_path, 'w', encoding='utf-8') as f:
+            f.write("sources:\n"
+                    "  - {name: Good, url: 'https://example.com/feed'}\n"
+                    "  - {name: NoUrl}\n"
+                    "  - {name: BadPriority, url: 'https://example.org/feed', priority: urgent}\n"
+                    "  - {name: Good, url: 'https://example.net/feed'}\n")
+        assert len(SourceRegistry.load(bad_path)) == 1, "无效条目未被跳过"
+        try:
+            SourceRegistry.load(bad_path, strict=True)
+            raise AssertionError("strict 模式未拒绝无效条目")
+        except SourceRegistryError:
+            pass
+        print("✅ 无效条目校验通过")
+        
+        count = 5000
+        opml_path = os.path.join(tmp_dir, 'big.opml')
+        with open(opml_path, 'w', encoding='utf-8') as f:
+            f.write('<?xml version="1.0"?><opml version="2.0"><body><outline text="research">')
+            for i in range(count):
+                f.write(f'<outline type="rss" text="Feed {i}" xmlUrl="https://host{i % 97}.example.com/{i}.xml" '
+                        f'priority="low" bonus="0.1" interval="60"/>')
+            f.write('</outline></body></opml>')
+        
+        collector = DataCollector(registry_path=opml_path)
+        assert collector._data_sources is None, "构造 DataCollector 时不应加载注册表"
+        
+        tracemalloc.start()
+        started = time.perf_counter()
+        big_registry = SourceRegistry.load(opml_path, strict=True)
+        elapsed = time.perf_counter() - started
+        retained = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        
+        assert len(big_registry) == count
+        assert all(spec.category == 'research' for spec in big_registry), "OPML 分组未作为默认分类"
+        per_entry = retained / count
+        print(f"  - {count} 条目: 加载 {elapsed * 1000:.0f} ms, 常驻内存 {per_entry:.0f} 字节/条")
+        assert per_entry < 600, "注册表条目内存占用过高"
+        assert elapsed < 5.0, "注册表加载过慢"
+        assert len(collector.data_sources) == count
+    
+    return True
+
+def test_poll_interval_carry_forward():
+    """测试按轮询间隔跳过的数据源：没有到期的源时不覆盖发布结果，未到期源的条目沿用上一轮"""
+    print("🧪 测试轮询间隔与结果沿用...")
+    import glob
+    import shutil
+    import tempfile
+    import time
+    from benchmarks import FeedStandInServer
+    from data_collection_service import DataCollectionService
+    from related_index import RelatedIndex
+    from rollups import RollupStore
+    from snapshots import load_snapshot
+    from story_clusters import StoryClusterIndex
+    
+    tmp_dir = tempfile.mkdtemp()
+    cwd = os.getcwd()
+    try:
+        with FeedStandInServer(ai_entries_per_feed=2) as feeds:
+            fast, slow = feeds.feed_url(0), feeds.feed_url(1)
+            registry_path = os.path.join(tmp_dir, 'sources.yaml')
+            with open(registry_path, 'w', encoding='utf-8') as f:
+                f.write("sources:\n"
+                        f"  - {{name: Fast, url: '{fast}', priority: low, rate_limit: 0, interval: 30}}\n"
+                        f"  - {{name: Slow, url: '{slow}', priority: low, rate_limit: 0, interval: 240}}\n")
+            os.chdir(tmp_dir)
+            service = DataCollectionService()
+            service.registry_path = registry_path
+            service.publish_dir = tmp_dir
+            service.story_index = StoryClusterIndex(os.path.join(tmp_dir, 'stories.json'))
+            service.related_index = RelatedIndex(os.path.join(tmp_dir, 'related.npz'))
+            service.rollup_store = RollupStore(os.path.join(tmp_dir, 'rollups.npz'))
+            
+            def published():
+                return sorted(item['source'] for item in load_snapshot(os.path.join(tmp_dir, 'latest_news.json')))
+            
+            assert asyncio.run(service.run_collection())
+            assert published() == ['Fast', 'Fast', 'Slow', 'Slow'], f"首轮结果不符: {published()}"
+            snapshots = len(glob.glob('ai_news_*.json'))
+            
+            # 15 分钟后（如紧随 30 分钟任务的 02:00 任务）没有到期的源：不写快照、不覆盖 latest_news.json
+            for url in (fast, slow):
+                service.last_polled[url] = time.time() - 15 * 60
+            assert asyncio.run(service.run_collection())
+            assert len(glob.glob('ai_news_*.json')) == snapshots, "没有到期的源时不应写入快照"
+            assert published() == ['Fast', 'Fast', 'Slow', 'Slow'], "没有到期的源时清空了发布结果"
+            
+            # 只有 30 分钟间隔的源到期：未到期源的条目沿用上一轮
+            service.last_polled[fast] = time.time() - 40 * 60
+            requests_before = dict(feeds.feed_requests)
+            time.sleep(1)  # 快照文件名精确到秒
+            assert asyncio.run(service.run_collection())
+            assert feeds.feed_requests[1] == requests_before[1], "未到期的源不应被抓取"
+            assert published() == ['Fast', 'Fast', 'Slow', 'Slow'], f"未到期源的条目丢失: {published()}"
+            latest_snapshot = sorted(glob.glob('ai_news_*.json'))[-1]
+            assert len(load_snapshot(latest_snapshot)) == 4, "快照应包含沿用的条目"
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(tmp_dir)
+    print("✅ 没有到期的源时保留发布结果，未到期源的条目沿用上一轮")
+    
+    return True
+
+def test_content_enrichment():
+    """测试原文抓取：正文提取、磁盘缓存、条件请求、主机并发限制、时间预算与按正文重新评分"""
+    print("🧪 测试原文抓取...")
+    import tempfile
+    import time
+    import aiohttp
+    from benchmarks import FeedStandInServer
+    from content_fetcher import ArticleFetcher, ContentCache
+    from data_collector import DataCollector, NewsItem, RSSDataSource
+    
+    def make_items(server, count):
+        return [NewsItem(id=f"item{i}", title=f"Story {i}", summary="short", content="short",
+                         url=f"http://127.0.0.1:{server.port}/story/{i}/0", source="Stand-in")
+                for i in range(count)]
+    
+    async def enrich(server, cache, items, top_n, **kwargs):
+        async with aiohttp.ClientSession() as session:
+            fetcher = ArticleFetcher(session, cache, **kwargs)
+            return dict(await fetcher.enrich(items, top_n))
+    
+    with tempfile.TemporaryDirectory() as cache_dir, FeedStandInServer(article_latency=0.05) as server:
+        cache = ContentCache(cache_dir)
+        items = make_items(server, 8)
+        stats = asyncio.run(enrich(server, cache, items, 6, per_host_limit=2))
+        assert stats['downloaded'] == 6 and server.article_downloads == 6
+        assert server.max_in_flight_per_host <= 2, f"主机并发超限: {server.max_in_flight_per_host}"
+        assert all('paragraph 4' in news.content for news in items[:6]), "正文提取不完整"
+        assert all('Copyright' not in news.content and 'About us' not in news.content for news in items[:6]), "正文包含导航或页脚"
+        assert items[6].content == "short", "超出 top_n 的条目不应被抓取"
+        print("✅ 正文提取与主机并发限制正常")
+        
+        requests_before = server.request_count
+        stats = asyncio.run(enrich(server, cache, make_items(server, 6), 6))
+        assert stats['cache_hits'] == 6 and server.request_count == requests_before, "新鲜缓存仍发出了请求"
+        
+        stats = asyncio.run(enrich(server, cache, make_items(server, 6), 6, max_age=0))
+        assert stats['not_modified'] == 6 and server.article_downloads == 6, "过期缓存未使用条件请求"
+        print("✅ 缓存命中与 304 条件请求正常")
+        
+        server.article_latency = 2.0
+        slow_items = make_items(server, 12)[8:]
+        started = time.perf_counter()
+        stats = asyncio.run(enrich(server, cache, slow_items, 4, time_budget=0.5))
+        elapsed = time.perf_counter() - started
+        assert stats['timed_out'] == 4 and elapsed < 1.5, f"时间预算未生效: {elapsed:.2f}s"
+        assert all(news.content == "short" for news in slow_items)
+        print(f"✅ 时间预算生效，{elapsed:.2f}s 内返回")
+    
+    # 抓取到正文的新闻按正文重新提取关键词、计算评分后再排序
+    source = RSSDataSource("Stand-in", "https://example.com/feed.xml")
+    plain, enriched = (NewsItem(id=name, title=f"Model update {name}", summary="short", content="short",
+                                url=f"https://example.com/{name}", source="Stand-in",
+                                published_date="Mon, 05 Jan 2026 10:00:00 +0000") for name in ("a", "b"))
+    for news in (plain, enriched):
+        source.rescore_content(news)
+    enriched.content = "OpenAI released GPT-5 with a breakthrough in deep learning. " * 20
+    collector = DataCollector(enrich_top_n=2)
+    collector.data_sources = [source]
+    before = enriched.base_score
+    collector._rescore_enriched([plain, enriched])
+    assert {'OpenAI', 'GPT', 'deep learning'} <= set(enriched.keywords), f"未按正文提取关键词: {enriched.keywords}"
+    assert enriched.base_score > before and plain.keywords == [], "未按正文重新评分"
+    assert collector._sort_by_importance([plain, enriched])[0] is enriched
+    print("✅ 正文抓取后按正文重新计算关键词和评分")
+    
+    return True
+
+def test_batch_rescoring():
+    """测试批量评分与历史快照重新评分"""
+    print("🧪 测试批量评分...")
+    import dataclasses
+    import shutil
+    import tempfile
+    from data_collector import RSSDataSource
+    from ranking import rank_news
+    from scoring import (BatchScorer, ScoringWeights, default_weights, published_timestamp, rescore_history,
+                         score_text)
+    from snapshots import list_snapshot_files, load_snapshot
+    
+    paths = list_snapshot_files()[::50]
+    items = [item for path in paths for item in load_snapshot(path)]
+    weights = default_weights()
+    source = RSSDataSource("测试源", "https://example.com/rss")
+    
+    single = [score_text(weights, i['title'], i['summary'], len(i['keywords']), i['published_date']) for i in items]
+    collector_scores = [source._calculate_importance(i['title'], i['summary'], i['keywords'], i['published_date'])
+                        for i in items]
+    batch = BatchScorer(weights).score(items, with_source_bonus=False)
+    assert single == collector_scores, "收集器评分与 score_text 不一致"
+    assert list(batch) == single, "批量评分与单条评分不一致"
+    print(f"✅ {len(items)} 条新闻批量评分与单条评分完全一致")
+    
+    # 组合正则一次扫描得到的命中矩阵与逐个子串判断一致（前缀、重叠、跨词、正则元字符）
+    import random
+    import numpy as np
+    keywords = ['gpt', 'chatgpt', 'gpt-4', 'open', 'openai', 'ai', 'pen', 'a.i', 'c++', '模型', '大模型']
+    rng = random.Random(7)
+    texts = [''.join(rng.choice(['gpt', 'chat', '-4', 'open', 'ai', 'pen', 'a.i', 'c++', '大', '模型', ' ', 'x'])
+                     for _ in range(rng.randint(0, 8))) for _ in range(2000)]
+    expected = np.array([[keyword in text for keyword in keywords] for text in texts], dtype=bool)
+    assert (BatchScorer(weights)._hit_matrix(texts, keywords) == expected).all(), "关键词命中矩阵与子串判断不一致"
+    
+    boosted = dataclasses.replace(weights, tiers={**weights.tiers, 'tier1': {**weights.tiers['tier1'], 'openai': 3.0}})
+    boosted_scores = BatchScorer(boosted).score(items, with_source_bonus=False)
+    for item, old, new in zip(items, batch, boosted_scores):
+        if 'openai' not in (item['title'] + ' ' + item['summary']).lower():
+            assert old == new, "未命中关键词的条目分数不应变化"
+    assert (boosted_scores > batch).any(), "调高权重后分数未变化"
+    
+    base_scores = BatchScorer(weights).score(items, with_source_bonus=False, with_recency=False)
+    assert list(base_scores) == [score_text(weights, i['title'], i['summary'], len(i['keywords']), with_recency=False)
+                                 for i in items], "批量基础分与单条评分不一致"
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        copies = [shutil.copy(path, tmp_dir) for path in paths[:3]]
+        before = [load_snapshot(path) for path in copies]
+        results = rescore_history(copies, boosted, {'OpenAI News': 0.6}, workers=1, write=True)
+        assert len(results) == 3 and all(0.0 <= r['top10_overlap'] <= 1.0 for r in results)
+        reordered = 0
+        for path, old_items in zip(copies, before):
+            new_items = load_snapshot(path)
+            scores = [item['importance_score'] for item in new_items]
+            assert scores == sorted(scores, reverse=True), "写回的快照未按新分数排序"
+            assert all(item['base_score'] is not None and 'published_ts' in item for item in new_items)
+            # 读取时排序（rank_news 使用 base_score + published_ts）必须反映新的权重
+            now = max(published_timestamp(item['published_date']) or 0.0 for item in new_items)
+            old_order = [item['id'] for item in rank_news(old_items, now=now)]
+            new_order = [item['id'] for item in rank_news(new_items, now=now)]
+            assert sorted(old_order) == sorted(new_order)
+            reordered += old_order != new_order
+        assert reordered, "重新评分写回后 rank_news 的排序没有变化"
+    print("✅ 历史快照重新评分与写回正常")
+    
+    return True
+
+def test_story_clustering():
+    """测试跨运行增量故事聚类"""
+    print("🧪 测试故事聚类...")
+    import os
+    import tempfile
+    import time
+    from datetime import datetime, timedelta
+    from data_collector import NewsItem
+    from story_clusters import StoryClusterIndex
+    
+    now = time.time()
+    recent = (datetime.now() - timedelta(hours=1)).isoformat()
+    
+    def make(news_id, source, title, summary=''):
+        return NewsItem(id=news_id, title=title, summary=summary, content=summary,
+                        url=f"https://example.com/{news_id}", source=source, created_at=recent)
+    
+    story = "OpenAI launches GPT-5.4 with Pro and Thinking versions for ChatGPT users"
+    first_run = [
+        make('a1', 'TechCrunch AI', story, "OpenAI released GPT-5.4 today with Pro and Thinking versions."),
+        make('a2', 'The Verge AI', "OpenAI launches GPT-5.4 with new Pro and Thinking versions",
+             "GPT-5.4 arrives in ChatGPT with Pro and Thinking versions."),
+        make('b1', 'arXiv ML', "Holographic memory for zero-shot compositional reasoning in knowledge graphs"),
+    ]
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'story_clusters.json')
+        index = StoryClusterIndex(path)
+        assert index.update(first_run, now) == 3
+        assert first_run[0].story_id == first_run[1].story_id, "同一故事的报道未归入同一簇"
+        assert first_run[2].story_id != first_run[0].story_id, "不同故事被错误合并"
+        assert first_run[0].trend_velocity > first_run[2].trend_velocity > 0, "多信源故事热度应更高"
+        
+        # 重新加载后继续归类：新信源并入已有故事，重复收集的条目不重复计数
+        index = StoryClusterIndex.load(path)
+        second_run = [make('a3', 'Wired AI', story + " subscribers"), make('a1', 'TechCrunch AI', story)]
+        assert index.update(second_run, now) == 1, "重复收集的条目被重复计数"
+        cluster = index.clusters[first_run[0].story_id]
+        assert second_run[0].story_id == cluster.id, "持久化后的故事簇未被命中"
+        assert cluster.item_count == 3 and len(cluster.sources) == 3
+        assert index.trending(now, limit=1)[0].id == cluster.id
+        
+        # 到达时间取收录时刻：补抓的一周前旧报道按本次收录计入，读取热度不修改状态
+        old = make('a4', 'The Verge AI', story + " archive")
+        old.published_date = (datetime.now() - timedelta(days=7)).isoformat()
+        index.update([old], now + 60)
+        assert cluster.arrivals[-1] == now + 60, "到达时间应为收录时间而非发布时间"
+        arrivals = list(cluster.arrivals)
+        assert cluster.velocity(now + 2 * 24 * 3600) == 0 and cluster.arrivals == arrivals, "velocity() 不应修改到达记录"
+        index.prune(now + 2 * 24 * 3600)
+        assert not cluster.arrivals and cluster.item_count == 4, "清理时应丢弃窗口外的到达记录"
+        
+        # 每条新闻写入的 LSH 桶数有上限，索引随条目数线性增长
+        assert len(index.buckets) <= 4 * 32
+        assert index.prune(now + 30 * 24 * 3600) == 2 and not index.buckets
+    print("✅ 故事聚类、持久化与热度信号正常")
+    
+    return True
+
+def test_related_index():
+    """测试相关文章索引的全量重建与增量更新"""
+    print("🧪 测试相关文章索引...")
+    import os
+    import tempfile
+    from data_collector import NewsItem
+    from related_index import RelatedIndex, iter_history_items
+    from snapshots import list_snapshot_files
+    
+    paths = list_snapshot_files()[-30:]
+    history = list(iter_history_items(paths[:-5]))
+    latest = list(iter_history_items(paths[-5:]))
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'related_index.npz')
+        incremental = RelatedIndex(path)
+        incremental.rebuild(history)
+        incremental.save()
+        incremental = RelatedIndex.load(path)
+        added = incremental.update(latest)
+        assert incremental.update(latest) == 0, "重复收录的条目被再次加入"
+        
+        full = RelatedIndex(None)
+        assert full.rebuild(history + latest) == len(incremental.ids)
+        new_ids = incremental.ids[-added:] if added else []
+        overlap = sum(len({i for i, _ in incremental.related(n)} & {i for i, _ in full.related(n)}) for n in new_ids)
+        expected = sum(len(full.related(n)) for n in new_ids)
+        assert overlap >= 0.9 * expected, f"增量结果与全量重建差异过大: {overlap}/{expected}"
+        print(f"✅ 增量新增 {added} 条，与全量重建的 top-k 重合 {overlap}/{expected}")
+        
+        # 近似重复的报道应互为最相关
+        source = latest[0]
+        twin = NewsItem(id='twin', title=source.title, summary=source.summary, content='',
+                        url='https://example.com/twin', source='测试源')
+        incremental.update([twin])
+        assert incremental.related('twin', 1)[0][0] == source.id
+        assert 'twin' in [i for i, _ in incremental.related(source.id)], "新条目未并入已有条目的相关列表"
+        incremental.save()
+        reloaded = RelatedIndex.load(path)
+        assert [i for i, _ in reloaded.related('twin')] == [i for i, _ in incremental.related('twin')], "保存后结果不一致"
+    print("✅ 相关文章查询与持久化正常")
+    
+    return True
+
+def test_rollups():
+    """测试时间序列汇总的增量累加与查询"""
+    print("🧪 测试时间序列汇总...")
+    import os
+    import tempfile
+    from collections import Counter
+    from related_index import iter_history_items
+    from datetime import datetime
+    from data_collector import NewsItem
+    from rollups import DAY, RollupStore, bucket_timestamp, news_keys, rollup_key
+    from snapshots import list_snapshot_files
+    
+    paths = list_snapshot_files()[-40:]
+    news_list = list(iter_history_items(paths))
+    unique = {news.id: news for news in news_list}
+    # 以快照中最晚的时间作为"当前时间"，小时粒度的保留期不随运行测试的日期变化
+    end = (max(bucket_timestamp(n) for n in unique.values()) // DAY + 1) * DAY
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'rollups.npz')
+        store = RollupStore(path)
+        # 分两轮累加，第二轮与第一轮有重叠（同一条新闻会在多个快照中重复出现）
+        added = (store.update(iter_history_items(paths[:30]), now=end)
+                 + store.update(iter_history_items(paths[20:]), now=end))
+        store.save()
+        store = RollupStore.load(path)
+        assert store.update(news_list, now=end) == 0, "重复收集的新闻被再次计数"
+    
+    assert added == len(unique)
+    
+    # 与直接遍历快照的结果对照（按天对齐的区间）
+    start = end - 14 * DAY
+    expected = Counter()
+    for news in unique.values():
+        if start <= bucket_timestamp(news) < end:
+            expected.update(news_keys(news))
+    for key in store.keys:
+        assert store.range_sum(key, start, end, 'day') == expected[key], f"{key} 按天汇总不一致"
+        assert store.range_sum(key, start, end, 'hour') == expected[key], f"{key} 按小时汇总不一致"
+    series = store.series(rollup_key('category', 'research'), start, end)
+    assert len(series) == 14 and sum(c for _, c in series) == expected['category:research']
+    
+    movers = store.top_movers('source', 7 * DAY, end)
+    assert movers and all(m['delta'] == m['current'] - m['previous'] for m in movers)
+    assert [m['delta'] for m in movers] == sorted((m['delta'] for m in movers), reverse=True)
+    
+    # 错误的发布时间（远在未来或 1970 年）按收集时间计入，不清空小时粒度、不拉长按天数组
+    hours_before, days_start = store.hourly.counts.shape[0], store.daily.start
+    collected = datetime.fromtimestamp(end - DAY).isoformat()
+    bogus = [NewsItem(id=f"bogus-{date}", title="Bogus date", summary="", content="", url="", source="Bogus",
+                      published_date=date, created_at=collected)
+             for date in ('Fri, 01 Jan 2100 00:00:00 GMT', 'Thu, 01 Jan 1970 00:00:00 GMT')]
+    assert store.update(bogus, now=end) == 2
+    assert store.hourly.counts.shape[0] >= hours_before, "未来的发布时间清空了小时粒度的历史"
+    assert store.daily.start == days_start, "1970 年的发布时间拉长了按天数组"
+    assert store.range_sum(rollup_key('source', 'Bogus'), end - 2 * DAY, end, 'hour') == 2
+    print(f"✅ {added} 条新闻的汇总与逐条统计一致，涨幅榜首位: {movers[0]['key']}")
+    
+    return True
+
+def test_profiling():
+    """测试收集流水线的性能剖析"""
+    print("🧪 测试性能剖析...")
+    import tempfile
+    import profiling
+    from benchmarks import FeedStandInServer
+    from data_collector import DataCollector
+    
+    assert profiling.stage('parse', 'Feed 0') is profiling.NULL_STAGE, "未开启时钩子应返回空上下文"
+    assert profiling.span('fetch') is profiling.NULL_STAGE
+    
+    with FeedStandInServer(ai_entries_per_feed=3, latency=0.05) as server:
+        sources = server.make_sources(6)
+        
+        async def run():
+            async with DataCollector() as collector:
+                collector.data_sources = sources
+                news = await collector.collect_all()
+                collector.save_to_news_list(news, os.path.join(tmp_dir, 'news.json'))
+                return news
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            profiling.enable()
+            try:
+                news = asyncio.run(run())
+            finally:
+                profiler = profiling.disable()
+            collapsed_path, summary_path = profiler.write_report(os.path.join(tmp_dir, 'profiles'))
+            with open(collapsed_path, encoding='utf-8') as f:
+                collapsed = f.read().splitlines()
+            with open(summary_path, encoding='utf-8') as f:
+                summary = f.read()
+    
+    assert len(news) == 18
+    for name in ('source', 'fetch', 'parse', '_parse_rss_entry', '_deduplicate', 'save_to_news_list'):
+        assert name in profiler.stages, f"缺少阶段 {name}"
+        assert name in summary
+    assert profiler.stages['_parse_rss_entry'].calls == 18
+    assert set(profiler.sources) == {source.name for source in sources}
+    for stats in profiler.sources.values():
+        # 替身源有 50ms 延迟：网络等待应占据抓取耗时的主要部分，CPU 只来自同步阶段
+        assert stats.wall >= stats.network >= 0.05 and stats.cpu < stats.wall
+    stacks = {line.split(';', 1)[0] for line in collapsed}
+    assert {'parse', '_parse_rss_entry', '_deduplicate', 'save_to_news_list'} <= stacks, "折叠栈缺少阶段"
+    assert all(line.rsplit(' ', 1)[1].isdigit() for line in collapsed), "折叠栈格式错误"
+    assert profiling.stage('parse') is profiling.NULL_STAGE, "关闭后钩子应恢复为空上下文"
+    print(f"✅ 记录 {len(profiler.stages)} 个阶段、{len(profiler.sources)} 个数据源、{len(collapsed)} 条折叠栈")
+    
+    return True
+
+def test_text_normalization():
+    """测试标题/摘要规范化（固定样例 + 全部历史快照）"""
+    print("🧪 测试文本规范化...")
+    import re
+    from data_collector import RSSDataSource
+    from snapshots import iter_snapshots
+    from text_normalize import clean_summary, normalize_text, truncate_text
+    
+    golden = {
+        "comes with a catch: it&#8217;s expensive.Claude Code, Anthropic&rsquo;s terminal":
+            "comes with a catch: it’s expensive.Claude Code, Anthropic’s terminal",
+        "<p>First&nbsp;paragraph</p><p>Second <b>bold</b>ly  said</p>\n":
+            "First paragraph Second boldly said",
+        "Cafe\u0301 &amp; <!-- x --> AT&amp;T <script>track();</script>done": "Café & AT&T done",
+        "1 < 2 and 3 > 2, x &lt; 3 &amp; y &gt; 1": "1 < 2 and 3 > 2, x < 3 & y > 1",
+        # 转义过的标签解码后不能变成真正的标签（前端用 innerHTML 渲染摘要）
+        "Photo: &lt;img src=x onerror=alert(1)&gt;caption": "Photo: caption",
+        "&lt;b&gt;x&lt;/b&gt;": "x",
+        "&amp;lt;script&amp;gt;alert(1)&amp;lt;/script&amp;gt;ok": "ok",
+        "&#60;a href=&#x22;javascript:alert(1)&#x22;&#62;link&#60;/a&#62;": "link",
+        # 解码出的 < 若仍能开启标签（残缺标签、属性里夹着 <）则转义回 &lt;，不能留下可执行的标记
+        "a&lt;b": "a&lt;b",
+        "&lt;script&gt;alert(1)&lt;/script&gt;": "",
+        "&lt;img src=x onerror=alert(1) a=&lt;&gt;": "&lt;img src=x onerror=alert(1) a=<>",
+        "x&lt;svg onload=alert(1) y=&lt;&gt; &gt; z": "x&lt;svg onload=alert(1) y=<> > z",
+        "": "",
+    }
+    for raw, expected in golden.items():
+        assert normalize_text(raw) == expected, f"规范化结果不符: {raw!r} -> {normalize_text(raw)!r}"
+    adversarial = ["&amp;amp;lt;i&amp;amp;gt;deep", "&lt;&lt;b&gt;&gt;", "a &lt;!-- c --&gt; b", "&lt;/p&gt;&lt;p&gt;x",
+                   "<<b>b>", "&amp;nbsp;&amp;#8217;", "&foo; &lt;svg/onload=alert(1)&gt;",
+                   "&lt;img src=x&lt;y onerror=alert(1)&gt;", "&amp;lt;img src=x onerror=alert(1) a=&amp;lt;&amp;gt;"]
+    for raw in adversarial:
+        normalized = normalize_text(raw)
+        assert normalize_text(normalized) == normalized, f"规范化不幂等: {raw!r} -> {normalized!r}"
+        assert not re.search(r'<[a-zA-Z/!]', normalized), f"规范化结果中仍有标签: {raw!r} -> {normalized!r}"
+    
+    english = "OpenAI released GPT-5.4 today. " + "The model improves reasoning across many benchmarks " * 3
+    assert truncate_text(english, 60) == "OpenAI released GPT-5.4 today. The model improves..."
+    assert truncate_text(english, 40) == "OpenAI released GPT-5.4 today."
+    assert truncate_text("深度求索发布了新的开源大模型，推理成本大幅下降" * 4, 30) == "深度求索发布了新的开源大模型，推理成本大幅下降深度求索发布…"
+    assert truncate_text("机器之心报道：" + "字" * 50, 20) == "机器之心报道：" + "字" * 12 + "…"
+    source = RSSDataSource("测试源", "https://example.com/rss")
+    assert source._clean_and_truncate_summary("<p>" + "word " * 100 + "</p>", 50) == "word " * 8 + "word..."
+    
+    # 历史快照中的全部标题和摘要：规范化幂等，已经干净的文本保持不变，截断结果不超长且幂等
+    texts = {text for _, items in iter_snapshots() for item in items for text in (item['title'], item['summary'])}
+    dirty = re.compile(r'<[a-zA-Z/!]|&[a-zA-Z0-9#]+;|[^\S ]|  |^ | $')
+    for text in texts:
+        normalized = normalize_text(text)
+        assert normalize_text(normalized) == normalized, f"规范化不幂等: {text!r}"
+        assert not dirty.search(normalized), f"规范化后仍有标签/实体/多余空白: {normalized!r}"
+        if not dirty.search(text):
+            assert normalized == text, f"干净文本被改动: {text!r}"
+        truncated = clean_summary(text, 120)
+        assert len(truncated) <= 120 and truncate_text(truncated, 120) == truncated, f"截断不幂等: {text!r}"
+    print(f"✅ {len(golden)} 个固定样例与 {len(texts)} 条历史文本规范化正常")
+    
+    return True
+
+def test_hot_cache():
+    """测试热点条目缓存（LRU/TTL 语义 + 数千轮模拟运行的内存浸泡测试）"""
+    print("🧪 测试热点缓存...")
+    import gc
+    from datetime import datetime, timezone
+    from email.utils import format_datetime
+    from types import SimpleNamespace
+    from data_collector import RSSDataSource
+    from hot_cache import HotItemCache
+    
+    now = [0.0]
+    clock = lambda: now[0]
+    
+    # LRU 淘汰与 TTL 过期
+    cache = HotItemCache(max_items=3, ttl=100, clock=clock)
+    for key in 'abc':
+        cache.put(key, key.upper())
+    assert cache.get('a') == 'A'
+    cache.put('d', 'D')
+    assert cache.get('b') is None and cache.get('a') == 'A', "应淘汰最久未使用的条目"
+    now[0] = 150
+    assert cache.get('a') is None and cache.prune() == 2 and len(cache) == 0, "过期条目应被清除"
+    assert cache.memory_bytes == 0 and cache.stats()['evictions'] == 1
+    cache.put('e', 'E')
+    assert 'e' in cache and cache.stats()['hits'] == 2, "成员判断不应计入命中"
+    now[0] = 300
+    assert 'e' not in cache and len(cache) == 0 and cache.memory_bytes == 0, "成员判断遇到过期条目应清除"
+    assert cache.stats()['expirations'] == 4
+    
+    # 命中时复用的派生结果与重新解析一致
+    published = format_datetime(datetime.now(timezone.utc))
+    def entry(source_index, serial):
+        return SimpleNamespace(title=f"OpenAI &amp; partner ship GPT update #{serial}",
+                               summary=f"<p>Source {source_index} reports   AI model release {serial}.</p>",
+                               link=f"https://example.com/{source_index}/{serial}",
+                               published=published, author="")
+    
+    plain = RSSDataSource("对照源", "https://example.com/rss")
+    cached_source = RSSDataSource("对照源", "https://example.com/rss")
+    cached_source.entry_cache = HotItemCache(clock=clock)
+    for _ in range(2):
+        expected, actual = plain._parse_rss_entry(entry(0, 1)), cached_source._parse_rss_entry(entry(0, 1))
+        expected.created_at = actual.created_at
+        assert expected == actual, "缓存命中后的新闻与重新解析的结果不一致"
+    assert cached_source.entry_cache.hits == 1
+    
+    # 定时收集、/run 和 WebSub 推送在不同线程中共用缓存：并发读写、淘汰、过期后计数仍然一致
+    import threading
+    from hot_cache import _entry_size
+    cache = HotItemCache(max_items=50, ttl=0.001)
+    errors = []
+    def worker(seed):
+        try:
+            for i in range(3000):
+                key = f"k{(seed * 7 + i) % 80}"
+                if i % 3 == 0:
+                    cache.put(key, key * 3)
+                elif i % 3 == 1:
+                    cache.get(key)
+                else:
+                    key in cache
+                if i % 500 == 0:
+                    cache.prune()
+        except Exception as e:
+            errors.append(e)
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+    assert not errors, f"并发访问缓存出错: {errors[0]!r}"
+    assert len(cache) <= 50 and cache.memory_bytes == sum(_entry_size(k, v) for k, (_, v, _) in cache._entries.items()), \
+        "并发访问后内存统计与缓存内容不一致"
+    
+    # 浸泡测试：每轮 30 分钟，每个源窗口内 10 条，每轮滚动出 1 条新条目；
+    # 前一半轮次让各模块的 lru_cache 填满，后一半轮次进程内存应保持不变
+    runs, num_sources, window = 4000, 3, 10
+    cache = HotItemCache(max_items=200, ttl=6 * 3600, clock=clock)
+    sources = [RSSDataSource(f"源{i}", f"https://example.com/{i}/rss") for i in range(num_sources)]
+    for source in sources:
+        source.entry_cache = cache
+    early_peak = late_peak = 0
+    for run in range(runs):
+        now[0] = run * 1800.0
+        for i, source in enumerate(sources):
+            for serial in range(run, run + window):
+                assert source._parse_rss_entry(entry(i, serial)) is not None
+        cache.prune()
+        if run == runs // 2:
+            gc.collect()
+            baseline = sys.getallocatedblocks()
+        if run < runs // 10:
+            early_peak = max(early_peak, cache.memory_bytes)
+        else:
+            late_peak = max(late_peak, cache.memory_bytes)
+    gc.collect()
+    growth = sys.getallocatedblocks() - baseline
+    
+    stats = cache.stats()
+    assert len(cache) <= num_sources * 13, f"TTL 未生效: {len(cache)} 条"
+    assert late_peak <= early_peak, "缓存内存占用随运行次数增长"
+    assert growth < 500, f"浸泡后半程进程内存增长 {growth} 个内存块"
+    assert stats['hit_rate'] > 0.85, f"命中率过低: {stats}"
+    print(f"✅ {runs} 轮模拟运行: 命中率 {stats['hit_rate']:.1%}, 缓存 {stats['items']} 条 / "
+          f"{stats['memory_kb']:.0f} KB, 后半程内存块增长 {growth}")
+    
+    return True
+
+def test_url_canonicalization():
+    """测试 URL 规范化、稳定 ID 和历史 ID 迁移"""
+    print("🧪 测试URL规范化...")
+    import shutil
+    import tempfile
+    from types import SimpleNamespace
+    from data_collector import DataCollector, NewsItem, RSSDataSource
+    from snapshots import iter_snapshots, load_snapshot
+    from url_canonical import apply_id_migration, build_id_migration, canonicalize_url, entry_url, stable_id
+    
+    golden = {
+        "http://www.TechCrunch.com/2026/01/02/foo/?utm_source=rss&utm_medium=feed#comments": "https://techcrunch.com/2026/01/02/foo",
+        "https://techcrunch.com/2026/01/02/foo/amp/": "https://techcrunch.com/2026/01/02/foo",
+        "https://www.theverge.com/news/1/story.amp.html?outputType=amp": "https://theverge.com/news/1/story.html",
+        "https://arxiv.org/pdf/2605.16311v2.pdf": "https://arxiv.org/abs/2605.16311",
+        "https://youtu.be/ShusuVq32hc?si=abc": "https://youtube.com/watch?v=ShusuVq32hc",
+        "https://old.reddit.com/r/MachineLearning/comments/1s9nj3a/p_fed/?rdt=1": "https://reddit.com/r/MachineLearning/comments/1s9nj3a/p_fed",
+        "https://www.google.com/url?q=https://www.wired.com/story/x/&sa=D": "https://wired.com/story/x",
+        "https://example.com:443/a?b=2&a=1&fbclid=x": "https://example.com/a?a=1&b=2",
+        "https://openai.com/index/gpt?id=7": "https://openai.com/index/gpt?id=7",
+        # ref 只在有主机规则的站点上视为跟踪参数；m./amp. 子域名只对这些站点还原
+        "https://github.com/org/repo/blob/main/x.py?ref=v2": "https://github.com/org/repo/blob/main/x.py?ref=v2",
+        "https://medium.com/p/abc?ref=feed&source=rss": "https://medium.com/p/abc",
+        "https://m.youtube.com/watch?v=ShusuVq32hc&feature=share": "https://youtube.com/watch?v=ShusuVq32hc",
+        "https://mobile.twitter.com/openai/status/1?ref_src=twsrc": "https://x.com/openai/status/1",
+        "https://m.example.com/a": "https://m.example.com/a",
+        "https://amp.example.org/a": "https://amp.example.org/a",
+    }
+    for raw, expected in golden.items():
+        assert canonicalize_url(raw) == expected, f"规范化结果不符: {raw} -> {canonicalize_url(raw)}"
+    assert entry_url("http://feedproxy.google.com/~r/blog/abc", "https://blog.example.com/post") == "https://blog.example.com/post"
+    assert entry_url("https://blog.example.com/post", "tag:example.com,2026:1") == "https://blog.example.com/post"
+    
+    # 历史 URL：规范化幂等，不同文章不会被合并
+    urls = {item['url'] for _, items in iter_snapshots() for item in items if item['url']}
+    canonical = {url: canonicalize_url(url) for url in urls}
+    assert all(canonicalize_url(c) == c for c in canonical.values()), "规范化不幂等"
+    assert len(set(canonical.values())) >= len(urls) - 5, "规范化合并了过多的历史 URL"
+    
+    # 标题修改、跟踪参数不改变 ID；同一篇文章的两个 URL 变体被去重
+    source = RSSDataSource("测试源", "https://example.com/rss")
+    def entry(title, link):
+        return SimpleNamespace(title=title, summary="OpenAI releases a new AI model", link=link, published="")
+    first = source._parse_rss_entry(entry("OpenAI ships GPT update", "https://example.com/a/?utm_source=rss"))
+    edited = source._parse_rss_entry(entry("OpenAI ships GPT update (corrected)", "http://www.example.com/a"))
+    assert first.id == edited.id == stable_id("测试源", "https://example.com/a"), "标题修改或 URL 变体改变了 ID"
+    other = NewsItem(id="x", title="完全不同的标题 Anthropic", summary="", content="", url="https://example.com/a/amp", source="另一源")
+    assert len(DataCollector()._deduplicate([first, other])) == 1, "URL 变体未被去重"
+    
+    # 在临时目录中迁移两个历史快照
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        paths = []
+        for path, _ in list(iter_snapshots())[:2]:
+            paths.append(shutil.copy(path, tmp_dir))
+        mapping = build_id_migration(paths)
+        rewritten = apply_id_migration(mapping, paths, story_index_path=os.path.join(tmp_dir, 'clusters.json'))
+        for path in paths:
+            for item in load_snapshot(path):
+                assert item['id'] == stable_id(item['source'], item['url'], title=item['title']), "迁移后ID不一致"
+        assert not build_id_migration(paths), "迁移后再次迁移应为空"
+    finally:
+        shutil.rmtree(tmp_dir)
+    print(f"✅ {len(golden)} 个固定样例、{len(urls)} 个历史 URL 规范化正常，迁移 {len(mapping)} 个ID（{rewritten} 个快照）")
+    
+    return True
+
+def test_prerender():
+    """测试静态预渲染页面"""
+    print("🧪 测试预渲染页面...")
+    import html
+    import shutil
+    import tempfile
+    import time
+    from prerender import load_template, publish, render_page
+    from ranking import decay_params
+    from snapshots import load_snapshot
+    
+    news = load_snapshot('latest_news.json')
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        path = publish(news, directory=tmp_dir)
+        assert path and os.path.exists(path), "预渲染页面未生成"
+        # latest_news.json 按写入时刻的衰减分数排序，其余字段不变
+        top = load_snapshot(os.path.join(tmp_dir, 'latest_news.json'))
+        assert sorted(item['id'] for item in top) == sorted(item['id'] for item in news), "latest_news.json 内容不一致"
+        scores = [item['importance_score'] for item in top]
+        assert scores == sorted(scores, reverse=True), "latest_news.json 未按当前分数排序"
+        # 前端重新计算分数所用的衰减参数随数据输出，不在 JS 中硬编码
+        assert load_snapshot(os.path.join(tmp_dir, 'decay_params.json')) == decay_params(), "衰减参数未输出"
+        assert not any('decay' in item for item in top), "衰减参数不应逐条重复"
+        with open(path, 'r', encoding='utf-8') as f:
+            page = f.read()
+        assert not [name for name in os.listdir(tmp_dir) if '.tmp' in name], "残留临时文件"
+    finally:
+        shutil.rmtree(tmp_dir)
+    
+    assert 'data-prerendered="true"' in page and page.count('class="news-card"') == min(10, len(news))
+    assert html.escape(top[0]['title']) in page, "首屏未包含重要性最高的新闻"
+    assert page.count('class="hot-item"') == min(5, len(news))
+    assert f'id="totalNews">{len(news)}<' in page and '加载中...' not in page
+    assert page.count(' defer></script>') == 5 and 'rel="preload" href="latest_news.json"' in page
+    
+    # 标题中的 HTML 必须转义；模板解析结果被缓存
+    hostile = dict(news[0], title='<script>alert(1)</script>', importance_score=10.0)
+    assert '<script>alert(1)' not in render_page([hostile])
+    assert load_template() is load_template(), "模板未缓存"
+    
+    items = [dict(news[i % len(news)], id=f"item_{i}") for i in range(1000)]
+    started = time.perf_counter()
+    for _ in range(10):
+        render_page(items)
+    elapsed = (time.perf_counter() - started) / 10 * 1000
+    assert elapsed < 50, f"渲染 1000 条新闻耗时 {elapsed:.1f} ms"
+    print(f"✅ 预渲染页面正常，1000 条新闻渲染耗时 {elapsed:.2f} ms")
+    
+    return True
+
+def _coordinated_replica(backend_url, replica_id, feed_urls, result_queue, ttl=30.0, crash_after_claim=False):
+    """多副本测试的副本进程：加租约后只抓取自己持有的源；crash_after_claim 时加完租约直接退出"""
+    from coordination import SourceCoordinator, open_backend
+    from data_collector import DataCollector, RSSDataSource
+    
+    coordinator = SourceCoordinator(open_backend(backend_url), replica_id, claim_ttl=ttl, heartbeat_ttl=ttl)
+    sources = []
+    for index, url in enumerate(feed_urls):
+        source = RSSDataSource(f"Feed {index}", url, "low", "tech")
+        source.rate_limit = 0
+        sources.append(source)
+    if crash_after_claim:
+        result_queue.put((replica_id, len(coordinator.claim(sources)), []))
+        result_queue.close()
+        result_queue.join_thread()
+        os._exit(1)
+    
+    async def run():
+        async with DataCollector(last_polled={}, coordinator=coordinator) as collector:
+            collector.data_sources = sources
+            return await collector.collect_all()
+    
+    news = asyncio.run(run())
+    result_queue.put((replica_id, coordinator.last_claim.get('claimed', 0), [item.id for item in news]))
+
+def test_coordination():
+    """测试多副本租约协调：多进程无重复抓取、全覆盖，副本退出后租约转移"""
+    print("🧪 测试多副本协调...")
+    import multiprocessing
+    import shutil
+    import tempfile
+    import time
+    from benchmarks import FeedStandInServer, RespStandInServer
+    from coordination import SourceCoordinator, open_backend
+    
+    def run_replicas(backend_url, replica_ids, feed_urls, ttl=30.0, crash_after_claim=False):
+        # 模拟各副本已在运行：先登记存活心跳，每个副本按存活数分得相同份额
+        for rid in replica_ids:
+            SourceCoordinator(open_backend(backend_url), rid, heartbeat_ttl=ttl).heartbeat()
+        result_queue = multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=_coordinated_replica,
+                                             args=(backend_url, rid, feed_urls, result_queue, ttl, crash_after_claim))
+                     for rid in replica_ids]
+        for process in processes:
+            process.start()
+        results = [result_queue.get(timeout=60) for _ in processes]
+        for process in processes:
+            process.join(timeout=30)
+        return results
+    
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        with FeedStandInServer(ai_entries_per_feed=2) as server, RespStandInServer() as redis_server:
+            backends = {'sqlite': f"sqlite:{os.path.join(tmp_dir, 'leases.db')}", 'redis': redis_server.url}
+            for name, backend_url in backends.items():
+                feeds = [server.feed_url(feed_id + (100 if name == 'redis' else 0)) for feed_id in range(12)]
+                results = run_replicas(backend_url, ['r1', 'r2', 'r3'], feeds)
+                requested = {k: v for k, v in server.feed_requests.items() if (k >= 100) == (name == 'redis')}
+                assert len(requested) == 12, f"{name}: 只抓取了 {len(requested)}/12 个数据源"
+                assert set(requested.values()) == {1}, f"{name}: 存在被重复抓取的数据源 {requested}"
+                ids = [news_id for _, _, replica_ids in results for news_id in replica_ids]
+                assert len(ids) == len(set(ids)) == 24, f"{name}: 各副本合计 {len(ids)} 条新闻，存在重复或缺失"
+                assert sorted(claimed for _, claimed, _ in results) == [4, 4, 4], "数据源未在副本间均分"
+    
+                # 抓取后租约延长到轮询间隔，各副本立即再运行一轮也不会重复抓取
+                run_replicas(backend_url, ['r1', 'r2'], feeds)
+                again = {k: v for k, v in server.feed_requests.items() if (k >= 100) == (name == 'redis')}
+                assert again == requested, f"{name}: 轮询间隔内数据源被再次抓取"
+                print(f"✅ {name}: 3 个副本各抓取 4 个数据源，无重复抓取")
+    
+            # 副本加租约后崩溃：租约到期前其他副本跳过，到期后接手全部数据源
+            feeds = [server.feed_url(feed_id) for feed_id in range(200, 206)]
+            backend_url = f"sqlite:{os.path.join(tmp_dir, 'failover.db')}"
+            [(_, crashed_claims, _)] = run_replicas(backend_url, ['dead'], feeds, ttl=1.0, crash_after_claim=True)
+            assert crashed_claims == 6
+            from data_collector import RSSDataSource
+            alive = SourceCoordinator(open_backend(backend_url), 'alive')
+            assert alive.claim([RSSDataSource(url, url) for url in feeds]) == [], "崩溃副本的租约未生效"
+            time.sleep(1.2)
+            [(_, claimed, failover_ids)] = run_replicas(backend_url, ['alive'], feeds)
+            failed_over = {k: v for k, v in server.feed_requests.items() if k >= 200}
+            assert claimed == 6 and len(failed_over) == 6 and set(failed_over.values()) == {1}, "租约未转移到存活副本"
+            assert len(failover_ids) == 12
+    finally:
+        shutil.rmtree(tmp_dir)
+    print("✅ 崩溃副本的租约到期后由存活副本接手，全部数据源各抓取一次")
+    
+    return True
+
+def test_classifier():
+    """测试本地分类器：哈希特征、训练/内存映射加载、批量推理吞吐与启发式回退"""
+    print("🧪 测试本地分类器...")
+    import shutil
+    import tempfile
+    import time
+    import numpy as np
+    from classifier import (_split, classify_news, get_classifier, hashed_features, news_text, train,
+                            weak_sentiment, MIN_CONFIDENCE)
+    from data_collector import NewsItem
+    from snapshots import iter_snapshots
+    
+    # 同一个词在任何位置、任何批次中都落在同一个特征桶
+    items, features = hashed_features(['lawsuit', 'big lawsuit here', '诉讼 新诉讼'])
+    assert items.tolist() == [0, 1, 1, 1, 2, 2, 2, 2, 2]
+    assert features[0] == features[2] and features[4] == features[7] and features[5] == features[8]
+    assert (hashed_features(['big lawsuit here'])[1] == features[1:4]).all(), "特征与批次组成有关"
+    
+    # 没有模型文件时回退到关键词启发式
+    news = NewsItem(id='t1', title='Startup faces lawsuit', summary='A lawsuit', content='', url='', source='T',
+                    category='tech', importance_score=5.0, published_date='', keywords=[], sentiment='neutral')
+    assert get_classifier('/nonexistent/models') is None
+    assert classify_news([news], get_classifier('/nonexistent/models')) == 0 and news.sentiment == 'neutral'
+    
+    unique = {}
+    for _, snapshot in iter_snapshots():
+        for item in snapshot:
+            unique[item['id']] = item
+    train_items, test_items = _split(list(unique.values()), 0.2)
+    model_dir = tempfile.mkdtemp()
+    try:
+        train(train_items, bits=16, epochs=60).save(model_dir)
+        model = get_classifier(model_dir)
+        assert isinstance(model.weights, np.memmap), "权重未以内存映射方式加载"
+        assert get_classifier(model_dir) is model, "模型未按进程缓存"
+        
+        # 对照弱标注：置信度足够时采用模型结果，正面/负面的召回率应明显高于原启发式
+        texts = [news_text(item['title'], item['summary']) for item in test_items]
+        truth = [weak_sentiment(text) for text in texts]
+        labels, confidence = model.predict(texts)['sentiment']
+        merged = [label if c >= MIN_CONFIDENCE else item['sentiment']
+                  for label, c, item in zip(labels, confidence, test_items)]
+        polar = [i for i, label in enumerate(truth) if label != 'neutral']
+        model_recall = sum(merged[i] == truth[i] for i in polar) / len(polar)
+        heuristic_recall = sum(test_items[i]['sentiment'] == truth[i] for i in polar) / len(polar)
+        assert model_recall > heuristic_recall + 0.2, f"模型召回率 {model_recall:.2f} 未超过启发式 {heuristic_recall:.2f}"
+        
+        batch = texts * (20000 // len(texts) + 1)
+        model.predict(batch[:1000])
+        started = time.perf_counter()
+        model.predict(batch)
+        rate = len(batch) / (time.perf_counter() - started)
+        assert rate > 25000, f"批量推理仅 {rate:.0f} 条/秒"
+        
+        assert classify_news([news], model) >= 1 and news.sentiment == 'negative', "分类结果未写回新闻"
+    finally:
+        shutil.rmtree(model_dir)
+    print(f"✅ 情感少数类召回率 {heuristic_recall:.2f} -> {model_recall:.2f}，批量推理 {rate:.0f} 条/秒")
+    
+    return True
+
+def test_ranking():
+    """测试读取时排序：基础分与发布时间分开存储，任意时刻按连续时效衰减取前 K 条"""
+    print("🧪 测试读取时排序...")
+    import time
+    from datetime import datetime
+    from types import SimpleNamespace
+    import numpy as np
+    from data_collection_service import DataCollectionService
+    from data_collector import RSSDataSource
+    from ranking import DecayRanker, item_base_and_timestamp
+    from scoring import default_weights, hours_since, recency_bonus
+    from snapshots import load_snapshot
+    
+    # 新发布的低基础分新闻先排在前面，随着时间推移让位给基础分更高的旧新闻
+    now = time.time()
+    fresh = {'id': 'fresh', 'base_score': 7.0, 'published_ts': now}
+    older = {'id': 'older', 'base_score': 8.0, 'published_ts': now - 72 * 3600}
+    undated = {'id': 'undated', 'base_score': 7.9, 'published_ts': None}
+    ranker = DecayRanker([older, undated, fresh])
+    assert [item['id'] for item in ranker.top(3, now)] == ['fresh', 'older', 'undated']
+    assert ranker.top(1, now)[0]['importance_score'] == 8.5 and fresh.get('importance_score') is None
+    assert [item['id'] for item in ranker.top(3, now + 48 * 3600)] == ['older', 'undated', 'fresh'], "衰减未随时间生效"
+    
+    # 收集时写入基础分和发布时间；importance_score 兼容字段仍是收集时的档位分数
+    source = RSSDataSource("测试源", "https://example.com/rss")
+    published = time.strftime('%a, %d %b %Y %H:%M:%S +0000', time.gmtime(now - 3600))
+    entry = SimpleNamespace(title="OpenAI launches GPT-5 with 50% faster inference", summary="<p>AI model release.</p>",
+                            link="https://example.com/gpt5", published=published, author="")
+    news = source._parse_rss_entry(entry)
+    expected = source._calculate_importance(news.title, news.summary, news.keywords, published)
+    assert abs(news.importance_score - expected) < 1e-9, "兼容字段与收集时评分不一致"
+    assert news.base_score == source._calculate_importance(news.title, news.summary, news.keywords, with_recency=False)
+    assert abs(news.published_ts - (now - 3600)) < 1
+    
+    # 旧快照没有 base_score：从 importance_score 扣除收集时的档位加分
+    snapshot = load_snapshot('latest_news.json')
+    legacy = snapshot[0]
+    hours = hours_since(legacy['published_date'], datetime.fromisoformat(legacy['created_at']))
+    base, _ = item_base_and_timestamp({k: v for k, v in legacy.items() if k != 'base_score'}, default_weights())
+    assert abs(base - (legacy['importance_score'] - recency_bonus(default_weights(), hours))) < 1e-9
+    
+    # 部分排序的结果与完整排序一致；1 万条取前 10 条在毫秒级以内
+    rng = np.random.default_rng(0)
+    items = [{'id': str(i), 'base_score': float(b), 'published_ts': now - float(age)}
+             for i, (b, age) in enumerate(zip(rng.uniform(3, 9, 10000), rng.uniform(0, 7 * 86400, 10000)))]
+    ranker = DecayRanker(items)
+    scores = ranker.scores(now)
+    assert (scores[ranker.top_indices(10, now)] == np.sort(scores)[::-1][:10]).all(), "前 K 条与完整排序不一致"
+    timings = []
+    for _ in range(50):
+        started = time.perf_counter()
+        ranker.top_indices(10)
+        timings.append(time.perf_counter() - started)
+    median = sorted(timings)[25] * 1000
+    assert median < 2.0, f"1 万条取前 10 条耗时 {median:.2f} ms"
+    
+    # 服务的 /top 复用排序器，新闻更新后重建
+    service = DataCollectionService()
+    service._latest_dicts = items
+    top = service.get_top_news(5)
+    ranker = service._ranker
+    assert len(top) == 5 and [t['importance_score'] for t in top] == sorted((t['importance_score'] for t in top), reverse=True)
+    service.get_top_news(5)
+    assert service._ranker is ranker, "排序器未复用"
+    service._latest_dicts = items[:100]
+    assert len(service.get_top_news(500)) == 100 and service._ranker is not ranker
+    print(f"✅ 时效衰减排序随时间变化正确，1 万条取前 10 条耗时 {median:.3f} ms")
+    
+    return True
+
+def test_json_codec():
+    """测试 JSON 编解码层：两个后端输出逐字节一致、直接解码为 NewsItem、流式读取"""
+    print("🧪 测试 JSON 编解码...")
+    import io
+    import shutil
+    import tempfile
+    from dataclasses import asdict
+    from datetime import datetime
+    import numpy as np
+    from data_collector import NewsItem
+    from json_codec import (JsonCodecError, available_backends, get_codec, iter_array, iter_news, news_from_dict,
+                            read_news)
+    from snapshots import list_snapshot_files
+    
+    backends = available_backends()
+    assert 'json' in backends
+    try:
+        get_codec('simdjson')
+        assert False, "未知后端应报错"
+    except JsonCodecError:
+        pass
+    
+    # 各后端解码、编码的结果一致，并且与历史快照文件（json.dump 写入）逐字节相同
+    paths = list_snapshot_files()[::40]
+    for path in paths:
+        with open(path, 'rb') as f:
+            raw = f.read()
+        for name in backends:
+            codec = get_codec(name)
+            assert codec.dumps(codec.loads(raw), indent=True) == raw, f"{name}: 重新编码后与原文件不一致"
+    tricky = {'float': [1e16, 1e-05, 0.1, 2.5e-300], 'big': 2 ** 70, 'text': '引号"反斜杠\\控制\x01\n😀',
+              'when': datetime(2026, 1, 2, 3, 4, 5), 'np': np.float64(8.5), 1: [], 'nested': [{}, [[]]]}
+    outputs = {name: (get_codec(name).dumps(tricky), get_codec(name).dumps(tricky, indent=True)) for name in backends}
+    assert len(set(outputs.values())) == 1, f"后端输出不一致: {outputs}"
+    
+    # 直接解码为 NewsItem，与 NewsItem(**dict) 相等；旧快照缺少的字段取默认值
+    expected = [NewsItem(**item) for item in json.load(open(paths[-1], encoding='utf-8'))]
+    for name in backends:
+        with open(paths[-1], 'rb') as f:
+            assert get_codec(name).loads_news(f.read()) == expected, f"{name}: NewsItem 解码结果不一致"
+    legacy = {k: v for k, v in asdict(expected[0]).items() if k not in ('base_score', 'published_ts', 'keywords')}
+    restored = news_from_dict(dict(legacy, unknown_field=1))
+    assert restored.keywords == [] and restored.base_score is None and not hasattr(restored, 'unknown_field')
+    
+    # 流式读取：任意块大小（包括数字被块边界截断）都与整体解码一致
+    doc = '[123456, 7.5e3 ,"a]b", {"x": [1, 2]}, null, true, [], -1.5E-3]'
+    for chunk_size in (1, 2, 5, 64):
+        assert list(iter_array(io.StringIO(doc), chunk_size=chunk_size)) == json.loads(doc)
+    for bad in ('[1,]', '[1 2]', '{"a": 1}', '[1'):
+        try:
+            list(iter_array(io.StringIO(bad), chunk_size=2))
+            assert False, f"非法输入 {bad} 未报错"
+        except json.JSONDecodeError:
+            pass
+    assert list(iter_news(paths[-1])) == expected
+    
+    # save_to_news_list 直接序列化 NewsItem，格式与 json.dump(ensure_ascii=False, indent=2) 相同
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        from data_collector import DataCollector
+        target = os.path.join(tmp_dir, 'ai_news_test.json')
+        DataCollector().save_to_news_list(expected, target)
+        with open(target, 'r', encoding='utf-8') as f:
+            assert f.read() == json.dumps([asdict(n) for n in expected], ensure_ascii=False, indent=2)
+        assert read_news(target) == expected
+    finally:
+        shutil.rmtree(tmp_dir)
+    print(f"✅ 后端 {', '.join(backends)} 输出一致，NewsItem 直接解码与流式读取正常")
+    
+    return True
+
+def test_logging_pipeline():
+    """测试日志流水线：后台线程写出 JSON 行，逐源日志按级别采样、延迟格式化，按大小轮转"""
+    print("🧪 测试日志流水线...")
+    import contextvars
+    import logging
+    import shutil
+    import tempfile
+    from log_pipeline import SourceSampler, parse_sample_rates, setup_logging, shutdown_logging, start_run
+    
+    rates = parse_sample_rates('INFO=0.5,debug=0')
+    assert rates[logging.INFO] == 0.5 and rates[logging.DEBUG] == 0.0, f"采样率解析错误: {rates}"
+    for bad in ('VERBOSE=1', 'INFO=2'):
+        try:
+            parse_sample_rates(bad)
+            assert False, f"非法采样率 {bad} 未报错"
+        except ValueError:
+            pass
+    
+    # 采样按 (run_id, source) 决定：结果可重复，保留比例接近采样率
+    sampler = SourceSampler({logging.INFO: 0.3})
+    kept = [sampler.keep(f"source-{i}", logging.INFO, 'run-1') for i in range(2000)]
+    assert kept == [sampler.keep(f"source-{i}", logging.INFO, 'run-1') for i in range(2000)], "采样结果不可重复"
+    assert 0.25 < sum(kept) / len(kept) < 0.35, f"保留比例偏离采样率: {sum(kept) / len(kept):.3f}"
+    assert all(sampler.keep(f"source-{i}", logging.WARNING, 'run-1') for i in range(100)), "WARNING 不应被采样"
+    
+    class Probe:
+        # 记录参数被格式化的次数
+        formatted = 0
+        
+        def __str__(self):
+            Probe.formatted += 1
+            return 'probe'
+    
+    root = logging.getLogger()
+    saved_handlers, saved_level = root.handlers[:], root.level
+    tmp_dir = tempfile.mkdtemp()
+    log_file = os.path.join(tmp_dir, 'collection.log')
+    logger = logging.getLogger('test_logging_pipeline')
+    
+    def emit():
+        run_id = start_run()
+        logger.info("抓取 %s", Probe(), extra={'source': 'A'})
+        logger.warning("源 %s 返回状态码: %s", Probe(), 500, extra={'source': 'A', 'timings': {'fetch': 1.5}})
+        logger.info("本轮完成", extra={'timings': {'collect': 12.0}})
+        return run_id
+    
+    try:
+        setup_logging(log_file, sample_rates={logging.INFO: 0.0}, console=False, max_bytes=4000, backup_count=2)
+        run_id = contextvars.copy_context().run(emit)
+        shutdown_logging()
+        with open(log_file, 'r', encoding='utf-8') as f:
+            records = [json.loads(line) for line in f]
+        assert [r['msg'] for r in records] == ["源 probe 返回状态码: 500", "本轮完成"], f"采样结果错误: {records}"
+        assert Probe.formatted == 1, "被采样丢弃的记录不应格式化参数"
+        assert all(r['run_id'] == run_id for r in records), "记录缺少运行 ID"
+        assert records[0]['source'] == 'A' and records[0]['level'] == 'WARNING'
+        assert records[0]['timings'] == {'fetch': 1.5} and records[1]['timings'] == {'collect': 12.0}
+        
+        # 超过 max_bytes 后轮转，最多保留 backup_count 个旧文件
+        setup_logging(log_file, sample_rates={}, console=False, max_bytes=4000, backup_count=2)
+        for i in range(400):
+            logger.info("轮转测试 %d %s", i, 'x' * 40, extra={'source': f"source-{i}"})
+        shutdown_logging()
+        names = sorted(os.listdir(tmp_dir))
+        assert names == ['collection.log', 'collection.log.1', 'collection.log.2'], f"轮转文件不符: {names}"
+        assert all(os.path.getsize(os.path.join(tmp_dir, name)) <= 4000 for name in names)
+        with open(log_file, 'r', encoding='utf-8') as f:
+            last = [json.loads(line) for line in f][-1]
+        assert last['msg'].startswith("轮转测试 399") and last['source'] == 'source-399'
+    finally:
+        shutdown_logging()
+        for handler in saved_handlers:
+            root.addHandler(handler)
+        root.setLevel(saved_level)
+        shutil.rmtree(tmp_dir)
+    
+    # 日志统一使用 %-style 延迟格式化（benchmarks.py 中保留的是用于对照的原实现）
+    import re
+    eager = re.compile(r'\blog(?:ger|ging)\.(?:debug|info|warning|error|critical|exception)\(f["\']')
+    project_dir = os.path.dirname(os.path.abspath(__file__))
+    offenders = []
+    for name in sorted(os.listdir(project_dir)):
+        if name.endswith('.py') and name not in ('benchmarks.py', 'test_system.py'):
+            with open(os.path.join(project_dir, name), 'r', encoding='utf-8') as f:
+                offenders.extend(f"{name}:{i}" for i, line in enumerate(f, 1) if eager.search(line))
+    assert not offenders, f"仍有 f-string 日志调用: {offenders}"
+    print("✅ JSON 行记录、按源采样、延迟格式化与轮转正常")
+    
+    return True
+
+def test_websub():
+    """测试 WebSub 推送接收：hub 发现、订阅验证与续订、签名校验，推送条目经评分和去重后立即可见"""
+    print("🧪 测试 WebSub 推送接收...")
+    import shutil
+    import tempfile
+    import threading
+    import time
+    import urllib.error
+    import urllib.request
+    from http.server import HTTPServer
+    import data_collection_service
+    from benchmarks import FeedStandInServer, WebSubHubStandIn
+    from data_collector import DataCollector
+    from related_index import RelatedIndex
+    from rollups import RollupStore
+    from snapshots import load_snapshot
+    from story_clusters import StoryClusterIndex
+    from websub import WebSubManager, discover, subscription_id
+    import feedparser
+    
+    # HTTP Link 头优先于 feed 中的 atom:link；没有 hub 时不订阅
+    with FeedStandInServer(hub_url='http://hub.example/h') as feeds:
+        feed = feedparser.parse(feeds.feed_xml(1))
+        plain = feedparser.parse(FeedStandInServer.feed_xml(feeds, 1).replace('rel="hub"', 'rel="alternate"'))
+    assert discover(feed, None, 'http://a.example/feed.xml') == ('http://hub.example/h', 'http://a.example/feed.xml')
+    assert discover(feed, '<https://h2.example/>; rel="hub", </f>; rel="self"', 'http://a.example/x') == \
+        ('https://h2.example/', 'http://a.example/f')
+    assert discover(plain, None, 'http://a.example/feed.xml') is None
+    
+    # 订阅只在 service 模式的定时收集中发起和续订，其他模式拒绝 --websub-callback
+    import subprocess
+    for mode, returncode in (('server', 2), ('once', 2), ('service', 0)):
+        result = subprocess.run([sys.executable, 'data_collection_service.py', '--mode', mode, '--dry-run',
+                                 '--websub-callback', 'http://127.0.0.1:1'],
+                                cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True)
+        assert result.returncode == returncode, f"--mode {mode} --websub-callback 返回 {result.returncode}: {result.stderr}"
+    
+    tmp_dir = tempfile.mkdtemp()
+    service = data_collection_service.DataCollectionService()
+    service.publish_dir = tmp_dir
+    service.story_index = StoryClusterIndex(os.path.join(tmp_dir, 'stories.json'))
+    service.related_index = RelatedIndex(os.path.join(tmp_dir, 'related.npz'))
+    service.rollup_store = RollupStore(os.path.join(tmp_dir, 'rollups.npz'))
+    saved_service, data_collection_service.service = data_collection_service.service, service
+    admin = HTTPServer(('127.0.0.1', 0), data_collection_service.create_web_server())
+    threading.Thread(target=admin.serve_forever, daemon=True).start()
+    callback_base = f"http://127.0.0.1:{admin.server_address[1]}"
+    state_path = os.path.join(tmp_dir, 'websub.json')
+    
+    def post(path, body=b'', signature=None):
+        request = urllib.request.Request(f"{callback_base}{path}", data=body, method='POST',
+                                         headers={'X-Hub-Signature': signature or ''})
+        try:
+            with urllib.request.urlopen(request, timeout=5) as response:
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+    
+    try:
+        # hub 在回应订阅请求之前就发来验证（订阅状态需在发送请求前置为等待验证）
+        with WebSubHubStandIn(lease_seconds=3600, verify_before_accept=True) as hub, \
+                FeedStandInServer(ai_entries_per_feed=2, hub_url=hub.url) as feeds:
+            service.websub = WebSubManager(callback_base, state_path)
+            sources = feeds.make_sources(3)
+            
+            async def collect():
+                async with DataCollector(websub=service.websub) as collector:
+                    collector.data_sources = sources
+                    return await collector.collect_all()
+            
+            service.latest_news = asyncio.run(collect())
+            service.push_sources = {source.url: source for source in sources}
+            polled = {news.id for news in service.latest_news}
+            assert len(polled) == 6, f"轮询结果数量不符: {len(polled)}"
+            assert hub.wait_subscribed(3) == 3 and hub.subscribe_requests == 3, "订阅未完成验证"
+            subscriptions = [service.websub.get(subscription_id(source.url)) for source in sources]
+            assert all(s.state == 'active' and s.lease_seconds == 3600 for s in subscriptions), "订阅状态未更新为 active"
+            
+            # 推送的新条目经过解析评分后立即出现在最新新闻和 latest_news.json 中
+            topic = subscriptions[0].topic
+            assert hub.publish(topic, feeds.update_xml(0, 1)) == [202]
+            latest = service.get_latest_news()
+            pushed = [item for item in latest if item['id'] not in polled]
+            assert len(pushed) == 1 and '0-u1' in pushed[0]['title'], f"推送条目未并入: {pushed}"
+            assert pushed[0]['base_score'] is not None and pushed[0]['published_ts'] is not None
+            assert pushed[0]['source'] == sources[0].name and pushed[0]['story_id'], "推送条目未经过评分和聚类"
+            on_disk = load_snapshot(os.path.join(tmp_dir, 'latest_news.json'))
+            assert pushed[0]['id'] in {item['id'] for item in on_disk}, "latest_news.json 未更新"
+            
+            # 重复推送、其他源转发同一链接（规范化 URL 相同）都被去重；错误签名回应 2xx 但丢弃
+            assert hub.publish(topic, feeds.update_xml(0, 1)) == [202]
+            assert hub.publish(subscriptions[1].topic, feeds.update_xml(0, 1)) == [202]
+            assert hub.publish(topic, feeds.update_xml(0, 2), secret='wrong') == [202]
+            assert len(service.get_latest_news()) == 7, f"去重或签名校验失败: {len(service.get_latest_news())} 条"
+            assert post('/websub/unknown', b'<rss/>') == 410, "未知订阅应回应 410"
+            
+            # 只确认自己发起的订阅：退订验证和 topic 不符的验证回应 404
+            verify = f"/websub/{subscriptions[0].id}?hub.mode=unsubscribe&hub.topic={topic}&hub.challenge=x"
+            try:
+                urllib.request.urlopen(f"{callback_base}{verify}", timeout=5)
+                assert False, "退订验证不应被确认"
+            except urllib.error.HTTPError as e:
+                assert e.code == 404
+            
+            # 租约临近到期时由下一轮收集续订；订阅状态持久化
+            subscriptions[2].expires_at = time.time() + 60
+            before = subscriptions[2].expires_at
+            asyncio.run(collect())
+            assert hub.subscribe_requests == 4, f"续订请求数不符: {hub.subscribe_requests}"
+            assert subscriptions[2].state == 'active' and subscriptions[2].expires_at > before + 3000, "续订未生效"
+            restored = WebSubManager.load(callback_base, state_path)
+            assert {s.id: s.state for s in restored.subscriptions.values()} == \
+                {s.id: 'active' for s in subscriptions}, "订阅状态未持久化"
+            assert service.get_status()['websub']['active'] == 3
+            
+            # 验证（HTTP 线程）与续订（收集线程）同时保存订阅状态时互不干扰
+            errors = []
+            def save_many():
+                try:
+                    for _ in range(50):
+                        service.websub.save()
+                except Exception as e:
+                    errors.append(e)
+            savers = [threading.Thread(target=save_many) for _ in range(4)]
+            for saver in savers:
+                saver.start()
+            for saver in savers:
+                saver.join()
+            assert not errors, f"并发保存订阅状态出错: {errors[0]!r}"
+            assert len(WebSubManager.load(callback_base, state_path).subscriptions) == 3
+            assert not [name for name in os.listdir(tmp_dir) if name.endswith('.tmp')], "残留临时文件"
+    finally:
+        admin.shutdown()
+        admin.server_close()
+        data_collection_service.service = saved_service
+        shutil.rmtree(tmp_dir)
+    print("✅ hub 发现、订阅验证与续订正常，推送条目经评分去重后立即可见")
+    
+    return True
+
 def main():
     """主测试函数"""
     print("🚀 AI信息聚合平台 - 系统测试")
@@ -159,7 +1508,27 @@ def main():
         ("依赖包检查", test_dependencies),
         ("数据收集测试", test_data_collection),
         ("数据文件测试", test_data_files),
-        ("Web文件测试", test_web_files)
+        ("Web文件测试", test_web_files),
+        ("启动导入测试", test_startup_imports),
+        ("分片收集测试", test_sharded_collection),
+        ("数据源注册表测试", test_source_registry),
+        ("轮询间隔沿用测试", test_poll_interval_carry_forward),
+        ("原文抓取测试", test_content_enrichment),
+        ("批量评分测试", test_batch_rescoring),
+        ("故事聚类测试", test_story_clustering),
+        ("相关文章索引测试", test_related_index),
+        ("时间序列汇总测试", test_rollups),
+        ("性能剖析测试", test_profiling),
+        ("文本规范化测试", test_text_normalization),
+        ("热点缓存测试", test_hot_cache),
+        ("URL规范化测试", test_url_canonicalization),
+        ("预渲染页面测试", test_prerender),
+        ("多副本协调测试", test_coordination),
+        ("本地分类器测试", test_classifier),
+        ("读取时排序测试", test_ranking),
+        ("JSON编解码测试", test_json_codec),
+        ("日志流水线测试", test_logging_pipeline),
+        ("WebSub推送测试", test_websub)
     ]
     
     passed = 0
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AI信息聚合平台 - 文本规范化
+一次正则扫描完成 HTML 标签去除、实体解码和空白折叠，再做 Unicode NFC 规范化；
+解码后残留的、无法作为完整标签去掉的 < 重新转义，输出可以直接交给前端的 innerHTML；
+截断时优先在句末断开，中英文混排时不会把英文单词截成两半
+"""
+
+import html
+import re
+import unicodedata
+from functools import lru_cache
+
+# 块级标签视为空白（<p>a</p><p>b</p> -> "a b"），行内标签直接去掉
+_BLOCK_TAGS = frozenset('address article aside blockquote br dd div dl dt figcaption figure footer h1 h2 h3 h4 h5 h6 '
+                        'header hr li main nav ol p pre section table td th tr ul'.split())
+
+# 两类匹配合成一个正则，一次扫描完成：
+#   1. 连续的空白、注释、标签、script/style 整段和 &nbsp;，整段折叠成一个空格或直接去掉
+#   2. 其他 HTML 实体，解码成对应字符
+#   单个普通空格本身就是规范结果，不参与匹配，否则每个词之间都要回调一次
+_MARKUP = (r'<!--.*?-->|<script\b[^>]*>.*?</script\s*>|<style\b[^>]*>.*?</style\s*>'
+           r'|</?[a-zA-Z][^<>]*>|&(?:nbsp|#160|#x[aA]0);')
+# 开头的两个先行断言让正则引擎按字符集快速跳过普通字符和词间单个空格
+_PATTERN = re.compile(
+    rf'(?=[\s<&])(?=[^ ]| [\s<&])(?:(?P<gap> ?(?:[^\S ]|\s\s|{_MARKUP})(?:\s|{_MARKUP})*)'
+    r'|(?P<entity>&(?:[a-zA-Z][a-zA-Z0-9]{1,31}|#[0-9]{1,7}|#[xX][0-9a-fA-F]{1,6});))',
+    re.DOTALL,
+)
+# 解码后重新出现的标签或实体（如 &lt;img&gt;、&amp;lt;），需要再处理一轮
+_RESIDUE = re.compile(r'<[a-zA-Z/!]|&(?:[a-zA-Z][a-zA-Z0-9]{1,31}|#[0-9]{1,7}|#[xX][0-9a-fA-F]{1,6});')
+# 去完标签后仍可能被浏览器当作标签开头的 <（如 a<b、<img ... a=<>），输出前转义成 &lt;
+_TAG_OPEN = re.compile(r'<(?=[a-zA-Z/!?])')
+_GAP_TAGS = re.compile(r'<!--.*?-->|</?[a-zA-Z][^<>]*>', re.DOTALL)
+_TAG_NAME = re.compile(r'</?([a-zA-Z][a-zA-Z0-9]*)')
+
+_SENTENCE_END = re.compile(r'[.!?](?=\s|$)|[。！？；]')
+_CJK_BREAK = re.compile(r'[，、：]')
+
+
+@lru_cache(maxsize=4096)
+def _gap_replacement(gap: str) -> str:
+    """去掉标签后还剩空白、&nbsp; 或脚本内容，或者包含块级标签时折叠成一个空格；纯行内标签直接去掉"""
+    if gap.isspace() or _GAP_TAGS.sub('', gap):
+        return ' '
+    return ' ' if any(name.lower() in _BLOCK_TAGS for name in _TAG_NAME.findall(gap)) else ''
+
+
+@lru_cache(maxsize=4096)
+def _entity_replacement(entity: str) -> str:
+    decoded = html.unescape(entity)
+    return ' ' if decoded.isspace() else decoded
+
+
+def _replace(match: 're.Match') -> str:
+    if match.lastgroup == 'entity':
+        return _entity_replacement(match.group())
+    return _gap_replacement(match.group())
+
+
+def normalize_text(text: str) -> str:
+    """去除标签、解码实体、折叠空白并做 NFC 规范化（幂等）
+
+    实体解码出的标签（&lt;img onerror=...&gt;）会在下一轮被去掉，多重转义（&amp;lt;）逐层解开，
+    直到结果里不再有完整的标签和可解码的实体；最后把仍能开启标签的 <（a&lt;b 解码出的 a<b、
+    属性里夹着 < 而无法整体匹配的残缺标签）转义回 &lt;，输出不会包含可被浏览器当作 HTML 解析的标签。
+    转义只作用于 < 后紧跟字母、/、!、? 的位置，再次规范化时先解码再转义，结果不变
+    """
+    if not text:
+        return ''
+    if '<' in text or '&' in text:
+        while True:
+            cleaned = _PATTERN.sub(_replace, text).strip()
+            if cleaned == text:
+                break
+            text = cleaned
+            if not _RESIDUE.search(text):
+                break
+        if '<' in text:
+            text = _TAG_OPEN.sub('&lt;', text)
+    else:
+        # 没有标签和实体时只需折叠空白（str.split 按 Unicode 空白切分）
+        text = ' '.join(text.split())
+    if not unicodedata.is_normalized('NFC', text):
+        text = unicodedata.normalize('NFC', text)
+    return text
+
+
+def _is_cjk(char: str) -> bool:
+    return '　' <= char <= '鿿' or '豈' <= char <= '﫿' or '＀' <= char <= '￯'
+
+
+def truncate_text(text: str, max_length: int = 300) -> str:
+    """截断到 max_length 个字符以内（含省略号，因此结果再次截断时不变）
+
+    - 句末（. ! ? 后跟空白，或 。！？；）位于后 40% 内时在句末截断，不加省略号
+    - 否则在最后一个中文逗号/顿号、空格或汉字之后截断，加省略号（中文用 …，其他用 ...）
+    - 不会把连续的英文/数字单词截成两半（除非整段没有可断开的位置）
+    """
+    if len(text) <= max_length:
+        return text
+
+    floor = int(max_length * 0.6)
+    sentence_ends = [m.end() for m in _SENTENCE_END.finditer(text, 0, max_length + 1) if m.end() <= max_length]
+    if sentence_ends and sentence_ends[-1] > floor:
+        return text[:sentence_ends[-1]].rstrip()
+
+    # 为省略号留出位置：中文省略号占 1 个字符，英文占 3 个
+    cut = max_length - (1 if _is_cjk(text[max_length - 2]) else 3)
+    window = text[:cut + 1]
+    # 截断点落在英文单词中间时，退回到单词开头
+    if text[cut - 1].isalnum() and text[cut].isalnum() and not _is_cjk(text[cut - 1]):
+        position = cut - 1
+        while position > 0 and text[position - 1].isalnum() and not _is_cjk(text[position - 1]):
+            position -= 1
+        if position > floor:
+            cut = position
+    else:
+        # 中文在逗号/顿号处断开，找不到时每个汉字之后都可以直接截断；英文在最后一个空格处断开
+        cjk_break = max((m.end() for m in _CJK_BREAK.finditer(window, 0, cut)), default=-1)
+        best = cjk_break if _is_cjk(text[cut - 1]) else max(cjk_break, window.rfind(' ', 0, cut))
+        if best > floor:
+            cut = best
+
+    head = text[:cut].rstrip(' ，、：,;:')
+    if head and _is_cjk(head[-1]):
+        return head + '…'
+    return head[:max_length - 3] + '...'
+
+
+def clean_summary(summary: str, max_length: int = 300) -> str:
+    """RSS 摘要：规范化后截断"""
+    return truncate_text(normalize_text(summary), max_length)
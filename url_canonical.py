@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AI信息聚合平台 - URL 规范化与稳定 ID
+去除跟踪参数、统一协议和主机名、还原 AMP/移动版/跳转链接，按主机规则归并同一篇文章的不同 URL；
+新闻 ID 由规范化 URL 派生（无 URL 时用 GUID），标题修改不再产生新 ID。
+提供把历史快照中的旧 ID 迁移为新 ID 的命令行工具
+"""
+
+import argparse
+import hashlib
+import logging
+import re
+import sys
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MIGRATION_PATH = 'id_migration.json'
+
+# 跟踪/统计参数：精确匹配或按前缀匹配
+TRACKING_PARAMS = frozenset({
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'igshid', 'mc_cid', 'mc_eid', '_hsenc', '_hsmi',
+    'ref_src', 'ref_url', 'referrer', 'cmpid', 'ncid', 'sr_share', 'smid', 'soc_src', 'soc_trk',
+    'spm', 'guccounter', 'guce_referrer', 'guce_referrer_sig', 'amp', 'outputtype', 'taid',
+})
+TRACKING_PREFIXES = ('utm_', 'pk_', 'hsa_', 'oly_', 'vero_', 'mkt_', 'trk_', 'wt.', 'at_', '__s')
+# 只在 HOST_RULES 中的主机上视为跟踪参数：ref 在代码托管、文档等站点上是内容参数（分支、版本）
+RULE_HOST_TRACKING_PARAMS = frozenset({'ref'})
+
+# 移动版 / AMP 子域名：只有去掉前缀后是 HOST_RULES 中的主机时才还原，其他站点的 m./amp. 可能是独立的站点
+MOBILE_PREFIXES = ('m.', 'mobile.', 'amp.')
+
+# 跳转包装链接：主机 -> (路径前缀, 目标 URL 所在参数)
+REDIRECT_WRAPPERS = {
+    'google.com': ('/url', ('q', 'url')),
+    'l.facebook.com': ('/l.php', ('u',)),
+    'out.reddit.com': ('/', ('url',)),
+    'news.ycombinator.com': ('/out', ('url',)),
+    'lnkd.in': ('/', ('url',)),
+}
+# RSS 跳转域名：链接本身不含原文地址，有 GUID 永久链接时改用 GUID
+FEED_REDIRECT_HOSTS = frozenset({'feedproxy.google.com', 'feeds.feedburner.com', 'feeds.feedblitz.com',
+                                 'rss.feedsportal.com', 'news.google.com'})
+
+# AMP 版本的路径后缀：/amp、/amp/、.amp 和 .amp.html
+_AMP_PATH = re.compile(r'/amp/?$|\.amp(?=\.html?$)|\.amp$', re.IGNORECASE)
+_SLASHES = re.compile(r'/{2,}')
+_ARXIV_ID = re.compile(r'^/(?:abs|pdf|html)/([^/]+?)(?:v\d+)?(?:\.pdf)?/?$')
+
+
+def _arxiv(host: str, path: str, query: List[Tuple[str, str]]):
+    """论文的 abs/pdf/html 页面和各版本号都归并到 /abs/<编号>"""
+    match = _ARXIV_ID.match(path)
+    if match:
+        return 'arxiv.org', f"/abs/{match.group(1)}", []
+    return 'arxiv.org', path, query
+
+
+def _youtube(host: str, path: str, query: List[Tuple[str, str]]):
+    """youtu.be 短链、shorts 和 watch 页面统一为 watch?v=，只保留视频 ID"""
+    if host == 'youtu.be' and path.strip('/'):
+        return 'youtube.com', '/watch', [('v', path.strip('/'))]
+    if path.startswith('/shorts/'):
+        return 'youtube.com', '/watch', [('v', path[len('/shorts/'):].strip('/'))]
+    return 'youtube.com', path, [(k, v) for k, v in query if k == 'v']
+
+
+def _reddit(host: str, path: str, query: List[Tuple[str, str]]):
+    """old./np. 等镜像子域统一，帖子链接只保留到 comments/<ID>/<slug>"""
+    parts = path.split('/')
+    if len(parts) > 6 and parts[3] == 'comments':
+        path = '/'.join(parts[:6])
+    return 'reddit.com', path, []
+
+
+def _twitter(host: str, path: str, query: List[Tuple[str, str]]):
+    return 'x.com', path, []
+
+
+def _medium(host: str, path: str, query: List[Tuple[str, str]]):
+    """Medium 的 source 参数标记来源页面，与文章无关"""
+    return host, path, [(k, v) for k, v in query if k != 'source']
+
+
+# 按主机的规则：主机名（已去掉 www./m. 等前缀）-> 规则函数
+HOST_RULES: Dict[str, Callable] = {
+    'arxiv.org': _arxiv,
+    'export.arxiv.org': _arxiv,
+    'youtube.com': _youtube,
+    'youtu.be': _youtube,
+    'reddit.com': _reddit,
+    'old.reddit.com': _reddit,
+    'np.reddit.com': _reddit,
+    'new.reddit.com': _reddit,
+    'twitter.com': _twitter,
+    'x.com': _twitter,
+    'medium.com': _medium,
+}
+
+
+def _is_tracking(key: str, rule_host: bool = False) -> bool:
+    key = key.lower()
+    return (key in TRACKING_PARAMS or key.startswith(TRACKING_PREFIXES)
+            or (rule_host and key in RULE_HOST_TRACKING_PARAMS))
+
+
+def _strip_host(host: str) -> str:
+    host = host.lower().rstrip('.')
+    if host.endswith(':80') or host.endswith(':443'):
+        host = host.rsplit(':', 1)[0]
+    if host.startswith('www.') and host.count('.') > 1:
+        host = host[len('www.'):]
+    for prefix in MOBILE_PREFIXES:
+        if host.startswith(prefix) and host[len(prefix):] in HOST_RULES:
+            return host[len(prefix):]
+    return host
+
+
+@lru_cache(maxsize=4096)
+def canonicalize_url(url: str) -> str:
+    """规范化 URL（幂等）；结果只用于比较和生成 ID，不保证仍可访问"""
+    url = (url or '').strip()
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in ('http', 'https') or not parts.netloc:
+        return url
+
+    host = _strip_host(parts.netloc.rsplit('@', 1)[-1])
+    path = parts.path or '/'
+    if '//' in path:
+        path = _SLASHES.sub('/', path)
+    query = parse_qsl(parts.query, keep_blank_values=True) if parts.query else []
+
+    # 跳转包装链接：取出目标 URL 再规范化
+    wrapper = REDIRECT_WRAPPERS.get(host)
+    if wrapper is not None and path.startswith(wrapper[0]):
+        for key, value in query:
+            if key in wrapper[1] and value.startswith(('http://', 'https://')):
+                return canonicalize_url(value)
+
+    rule = HOST_RULES.get(host)
+    if query:
+        query = [(k, v) for k, v in query if not _is_tracking(k, rule is not None)]
+    if 'amp' in path.lower():
+        path = _AMP_PATH.sub('', path) or '/'
+    if rule is not None:
+        host, path, query = rule(host, path, query)
+    path = path.rstrip('/') if len(path) > 1 else ''
+    return f"https://{host}{path}?{urlencode(sorted(query))}" if query else f"https://{host}{path}"
+
+
+def entry_url(link: str, guid: Optional[str] = None) -> str:
+    """RSS 条目的原文链接：链接是 RSS 跳转地址而 GUID 是永久链接时改用 GUID"""
+    if guid and guid.startswith(('http://', 'https://')):
+        if not link or _strip_host(urlsplit(link).netloc) in FEED_REDIRECT_HOSTS:
+            return guid
+    return link
+
+
+def stable_id(source: str, url: str, guid: Optional[str] = None, title: str = '') -> str:
+    """新闻 ID：信源名 + 规范化 URL 的哈希（无 URL 时依次用 GUID、标题）"""
+    key = canonicalize_url(url) if url else (guid or title)
+    return f"{source}_{hashlib.md5(key.encode()).hexdigest()[:16]}"
+
+
+def build_id_migration(paths: Optional[List[str]] = None) -> Dict[str, str]:
+    """扫描历史快照，返回 {旧ID: 新ID}（只包含发生变化的条目）"""
+    from snapshots import iter_snapshots, load_snapshot
+
+    snapshots = ((path, load_snapshot(path)) for path in paths) if paths is not None else iter_snapshots()
+    mapping: Dict[str, str] = {}
+    for _, items in snapshots:
+        for item in items:
+            new_id = stable_id(item['source'], item.get('url') or '', title=item.get('title') or '')
+            if new_id != item['id']:
+                mapping[item['id']] = new_id
+    return mapping
+
+
+def apply_id_migration(mapping: Dict[str, str], paths: Optional[List[str]] = None,
+                       story_index_path: Optional[str] = None) -> int:
+    """把快照和故事聚类索引中的旧 ID 改写为新 ID，返回改写的快照文件数"""
+    from snapshots import list_snapshot_files, load_snapshot, save_snapshot
+    from story_clusters import DEFAULT_INDEX_PATH, StoryClusterIndex
+
+    rewritten = 0
+    for path in paths if paths is not None else list_snapshot_files():
+        items = load_snapshot(path)
+        changed = False
+        for item in items:
+            new_id = mapping.get(item['id'])
+            if new_id is not None:
+                item['id'] = new_id
+                changed = True
+        if changed:
+            save_snapshot(path, items)
+            rewritten += 1
+
+    story_index = StoryClusterIndex.load(story_index_path or DEFAULT_INDEX_PATH)
+    if story_index.item_clusters:
+        story_index.item_clusters = {mapping.get(k, k): v for k, v in story_index.item_clusters.items()}
+        story_index.save()
+    return rewritten
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='URL 规范化与新闻 ID 迁移工具')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    canon_parser = subparsers.add_parser('canonical', help='输出 URL 的规范化形式')
+    canon_parser.add_argument('urls', nargs='+')
+
+    migrate_parser = subparsers.add_parser('migrate', help='生成历史快照的旧ID -> 新ID 映射')
+    migrate_parser.add_argument('--output', default=DEFAULT_MIGRATION_PATH, help='映射文件路径')
+    migrate_parser.add_argument('--apply', action='store_true', help='同时改写快照和故事聚类索引中的ID')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'canonical':
+        for url in args.urls:
+            print(canonicalize_url(url))
+        return 0
+
+    from json_codec import write_path
+
+    mapping = build_id_migration()
+    write_path(args.output, mapping)
+    merged = len(mapping) - len(set(mapping.values()))
+    print(f"✅ {len(mapping)} 个旧ID 映射到 {len(set(mapping.values()))} 个新ID（{merged} 个合并），已写入 {args.output}")
+    if args.apply:
+        rewritten = apply_id_migration(mapping)
+        print(f"💾 已改写 {rewritten} 个快照文件和故事聚类索引")
+        print("请重建相关文章索引和时间序列汇总: python3 related_index.py rebuild && python3 rollups.py rebuild")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AI信息聚合平台 - WebSub 推送接收
+RSS 源抓取时从 HTTP Link 头和 feed 中的 <link rel="hub"> 发现 hub，收集结束后向 hub 订阅（带租约）；
+hub 先以 GET 请求回调地址 /websub/<订阅ID> 验证订阅，之后在源更新时 POST 推送新内容（带 HMAC 签名）。
+推送的条目由服务经过与轮询相同的解析、评分和去重后立即并入最近一轮的新闻。
+租约到期前由下一轮收集自动续订；轮询保持不变作为兜底，hub 不可用或推送丢失时最迟在下一次轮询时收到
+"""
+
+import hashlib
+import hmac
+import logging
+import os
+import re
+import secrets
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Dict, Mapping, Optional, Tuple
+from urllib.parse import urljoin
+
+if TYPE_CHECKING:
+    import aiohttp
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATE_PATH = 'websub_subscriptions.json'
+CALLBACK_PREFIX = '/websub/'
+DEFAULT_LEASE_SECONDS = 24 * 3600  # 请求的租约，hub 可以在验证时改为其他值
+RENEW_BEFORE = 2 * 3600            # 剩余租约不足 2 小时时续订（服务每 30 分钟收集一次，有足够的重试机会）
+PENDING_TIMEOUT = 10 * 60          # 订阅请求发出后 10 分钟内没有收到验证，下一轮重新订阅
+DENIED_RETRY = 24 * 3600           # 被 hub 拒绝的订阅一天后再尝试
+SIGNATURE_METHODS = ('sha1', 'sha256', 'sha384', 'sha512')
+
+_LINK_HEADER = re.compile(r'<([^>]*)>\s*((?:;\s*[^;,]*)*)')
+_LINK_REL = re.compile(r'rel\s*=\s*"?([^";]*)"?', re.I)
+
+
+def _header_links(link_header: Optional[str]) -> Dict[str, str]:
+    """解析 HTTP Link 头，返回 rel -> URL（同一 rel 取第一个）"""
+    links = {}
+    for url, params in _LINK_HEADER.findall(link_header or ''):
+        match = _LINK_REL.search(params)
+        if match:
+            for rel in match.group(1).lower().split():
+                links.setdefault(rel, url.strip())
+    return links
+
+
+def discover(feed, link_header: Optional[str] = None, feed_url: str = '') -> Optional[Tuple[str, str]]:
+    """按 WebSub 规范发现 (hub, topic)：优先 HTTP Link 头，其次 feed 中的 atom:link；
+    没有声明 rel="self" 时以抓取地址为 topic，没有 hub 时返回 None"""
+    links = _header_links(link_header)
+    if 'hub' not in links:
+        links = {}
+        for link in getattr(feed, 'feed', {}).get('links', []):
+            rel, href = link.get('rel'), link.get('href')
+            if rel in ('hub', 'self') and href:
+                links.setdefault(rel, href)
+    if 'hub' not in links:
+        return None
+    return urljoin(feed_url, links['hub']), urljoin(feed_url, links.get('self') or feed_url)
+
+
+def subscription_id(source_url: str) -> str:
+    """回调地址中的订阅 ID（由数据源地址确定，重启和续订后不变）"""
+    return hashlib.sha1(source_url.encode('utf-8')).hexdigest()[:16]
+
+
+@dataclass
+class Subscription:
+    """单个数据源在 hub 上的订阅"""
+    source_url: str
+    topic: str
+    hub: str
+    secret: str
+    state: str = 'new'         # new（待订阅）/ pending（等待验证）/ active / denied
+    lease_seconds: int = 0
+    expires_at: float = 0.0
+    requested_at: float = 0.0
+    deliveries: int = 0        # 已接收的推送次数
+
+    @property
+    def id(self) -> str:
+        return subscription_id(self.source_url)
+
+    def needs_request(self, now: float) -> bool:
+        """本轮是否需要（重新）发送订阅请求"""
+        if self.state == 'new':
+            return True
+        if self.state == 'pending':
+            return now - self.requested_at >= PENDING_TIMEOUT
+        if self.state == 'active':
+            # hub 给出的租约较短时，在剩余一半时续订
+            return self.expires_at - now < min(RENEW_BEFORE, self.lease_seconds / 2)
+        return now - self.requested_at >= DENIED_RETRY
+
+
+class WebSubManager:
+    """全部订阅的状态：收集线程发现 hub 并发送订阅请求，管理服务器线程处理验证和推送"""
+
+    def __init__(self, callback_base: str, path: Optional[str] = DEFAULT_STATE_PATH):
+        self.callback_base = callback_base.rstrip('/')
+        self.path = path
+        self.subscriptions: Dict[str, Subscription] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, callback_base: str, path: str = DEFAULT_STATE_PATH) -> 'WebSubManager':
+        """加载持久化的订阅状态，文件不存在或损坏时从空状态开始"""
+        manager = cls(callback_base, path)
+        if not os.path.exists(path):
+            return manager
+        from json_codec import read_path
+        try:
+            for raw in read_path(path):
+                subscription = Subscription(**raw)
+                manager.subscriptions[subscription.id] = subscription
+        except (OSError, ValueError, TypeError) as e:
+            logger.error("读取 WebSub 订阅状态 %s 失败: %s，将重新订阅", path, e)
+        return manager
+
+    def save(self):
+        if not self.path:
+            return
+        from json_codec import write_path
+        # verify（HTTP 线程）和 sync（收集线程）都会保存，写入也在锁内完成，后写入的总是较新的状态
+        with self._lock:
+            write_path(self.path, [asdict(subscription) for subscription in self.subscriptions.values()])
+
+    def callback_url(self, subscription: Subscription) -> str:
+        return f"{self.callback_base}{CALLBACK_PREFIX}{subscription.id}"
+
+    def get(self, subscription_id: str) -> Optional[Subscription]:
+        return self.subscriptions.get(subscription_id)
+
+    def note(self, source_url: str, hub: str, topic: str):
+        """记录抓取时发现的 hub；新的源或 hub/topic 变化时在本轮结束后订阅"""
+        key = subscription_id(source_url)
+        with self._lock:
+            existing = self.subscriptions.get(key)
+            if existing is not None and existing.hub == hub and existing.topic == topic:
+                return
+            self.subscriptions[key] = Subscription(source_url, topic, hub, secrets.token_hex(20))
+        logger.info("📡 发现 WebSub hub: %s -> %s", source_url, hub, extra={'source': topic})
+
+    async def sync(self, session: 'aiohttp.ClientSession', now: Optional[float] = None) -> int:
+        """发送新订阅和续订请求（hub 返回 202 后等待验证），返回发出的请求数"""
+        now = time.time() if now is None else now
+        with self._lock:
+            due = [s for s in self.subscriptions.values() if s.needs_request(now)]
+        for subscription in due:
+            # hub 可能在返回 202 之前就发来验证请求，先把状态置为等待验证，请求失败时恢复
+            with self._lock:
+                previous = subscription.state, subscription.requested_at
+                if subscription.state != 'active':
+                    subscription.state = 'pending'
+                subscription.requested_at = now
+            form = {
+                'hub.mode': 'subscribe',
+                'hub.topic': subscription.topic,
+                'hub.callback': self.callback_url(subscription),
+                'hub.lease_seconds': str(DEFAULT_LEASE_SECONDS),
+                'hub.secret': subscription.secret,
+            }
+            try:
+                async with session.post(subscription.hub, data=form, timeout=10) as response:
+                    status = response.status
+            except Exception as e:
+                logger.warning("WebSub 订阅请求失败 %s: %s", subscription.hub, e, extra={'source': subscription.topic})
+                status = None
+            if status not in (202, 204):
+                if status is not None:
+                    logger.warning("WebSub hub %s 拒绝订阅 %s: 状态码 %s", subscription.hub, subscription.topic, status,
+                                   extra={'source': subscription.topic})
+                with self._lock:
+                    if subscription.state == 'pending':
+                        subscription.state, subscription.requested_at = previous
+        if due:
+            self.save()
+        return len(due)
+
+    def verify(self, subscription_id: str, params: Mapping[str, str], now: Optional[float] = None) -> Optional[str]:
+        """处理 hub 的验证请求：确认订阅时返回 challenge，拒绝时返回 None（回应 404）；
+        hub.mode=denied 表示 hub 拒绝了订阅，返回空串"""
+        now = time.time() if now is None else now
+        mode = params.get('hub.mode')
+        with self._lock:
+            subscription = self.subscriptions.get(subscription_id)
+            if subscription is None or params.get('hub.topic') != subscription.topic:
+                return None
+            if mode == 'denied':
+                subscription.state = 'denied'
+                subscription.requested_at = now
+                logger.warning("WebSub hub 拒绝订阅 %s: %s", subscription.topic, params.get('hub.reason', ''),
+                               extra={'source': subscription.topic})
+                challenge = ''
+            elif mode == 'subscribe' and subscription.state in ('pending', 'active') and params.get('hub.challenge'):
+                try:
+                    lease = int(params.get('hub.lease_seconds') or DEFAULT_LEASE_SECONDS)
+                except ValueError:
+                    lease = DEFAULT_LEASE_SECONDS
+                subscription.state = 'active'
+                subscription.lease_seconds = lease
+                subscription.expires_at = now + lease
+                challenge = params['hub.challenge']
+            else:
+                # 只确认自己发起的订阅；本服务从不主动退订
+                return None
+        self.save()
+        return challenge
+
+    def signature_valid(self, subscription: Subscription, body: bytes, signature: Optional[str]) -> bool:
+        """校验推送的 X-Hub-Signature（method=hexdigest）"""
+        method, _, digest = (signature or '').partition('=')
+        if method not in SIGNATURE_METHODS or not digest:
+            return False
+        expected = hmac.new(subscription.secret.encode('utf-8'), body, method).hexdigest()
+        return hmac.compare_digest(expected, digest.strip().lower())
+
+    def record_delivery(self, subscription: Subscription):
+        with self._lock:
+            subscription.deliveries += 1
+
+    def stats(self) -> Dict[str, int]:
+        """各状态的订阅数和累计推送次数（用于 /status）"""
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for subscription in self.subscriptions.values():
+                counts[subscription.state] = counts.get(subscription.state, 0) + 1
+            counts['deliveries'] = sum(s.deliveries for s in self.subscriptions.values())
+        return counts
+